@@ -0,0 +1,26 @@
+"""
+Configuración de gunicorn para la app web.
+
+Activa el modo multiproceso de prometheus_client: cada worker escribe sus
+métricas en PROMETHEUS_MULTIPROC_DIR y `/metrics` devuelve la suma de
+todos (ver shared/utils/metrics.py). La variable se define aquí, en el
+proceso maestro, para que los workers la hereden antes de importar la app.
+"""
+
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+# Directorio de métricas compartido por los workers
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/price_alarm_metrics')
+
+def on_starting(server):
+    """Vacía el directorio: los archivos de un arranque anterior sumarían de más."""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    """Quita los gauges del worker que terminó (los contadores se conservan)."""
+    multiprocess.mark_process_dead(worker.pid)
@@ -10,8 +10,9 @@ This app provides:
 """
 
 import os
+import time
 from pathlib import Path
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, g, render_template, jsonify, request
 from flask_cors import CORS
 
 # Import shared modules
@@ -19,6 +20,7 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from shared.utils.database import PriceDatabase
+from shared.utils.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, render
 
 
 def create_app(config=None):
@@ -35,6 +37,22 @@ def create_app(config=None):
     # Initialize database
     db = PriceDatabase()
     
+    @app.before_request
+    def start_request_timer():
+        """Start timing the request for the latency histogram."""
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def observe_request_latency(response):
+        """Record request latency per route (the URL rule, not the raw path, to bound cardinality)."""
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method, route=route, status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+    
     @app.route('/')
     def dashboard():
         """Main dashboard page."""
@@ -244,6 +262,11 @@ def create_app(config=None):
         """Health check endpoint."""
         return jsonify({"status": "healthy", "service": "price-alarm-web"})
     
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics (request latency, DB queries), summed over all gunicorn workers."""
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+    
     return app
 
 
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pipeline de scraping contra el sitio sintético local.
+
+Corre el mismo bucle que track.py (run_queue, o el motor asíncrono con
+--concurrency, o el pipeline por etapas con --pipeline) sobre N páginas de benchmarks/synthetic_site.py y reporta
+URLs/s, latencia por URL (p50/p95/p99) y RSS máximo del árbol de procesos
+(incluye Chromium). El resultado sale en JSON para comparar corridas.
+
+La BD es un doble en memoria y las alertas de Telegram se desactivan: se
+mide el scraper, no Postgres ni la red.
+
+Uso:
+    python benchmarks/scrape_benchmark.py --urls 500 --latency-ms 50 --page-kb 300
+    python benchmarks/scrape_benchmark.py --browser --concurrency 8 --output results.json
+    python benchmarks/scrape_benchmark.py --concurrency 8 --pipeline
+"""
+
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_site import SiteConfig, SyntheticSite
+from shared.adapters.registry import get_registry
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.timing import STAGE_TOTAL
+from scraper import track
+from scraper.browser_pool import process_tree_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de muestreo del RSS
+RSS_SAMPLE_SECONDS = 0.2
+
+class BenchmarkDB:
+    """BD en memoria con la interfaz que usa el procesamiento de productos."""
+
+    def __init__(self):
+        self.prices: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get_last_price(self, url: str) -> Optional[float]:
+        with self._lock:
+            history = self.prices.get(url)
+            return history[-1][1] if history else None
+
+    def get_price_history(self, url: str, limit: int = 10) -> List[tuple]:
+        with self._lock:
+            return list(reversed(self.prices.get(url, [])))[:limit]
+
+    def save_price(self, url: str, name: str, official_price: float, discounted_price: Optional[float] = None) -> None:
+        effective_price = discounted_price or official_price
+        with self._lock:
+            self.prices.setdefault(url, []).append(
+                (name, official_price, discounted_price, effective_price, datetime.now())
+            )
+
+class RssSampler:
+    """Muestrea en un hilo el RSS del árbol de procesos y guarda el máximo."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        rss = process_tree_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb or 0.0, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentil `q` (0-100) con interpolación lineal, o None sin valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99, media y máximo de las latencias por URL, en ms."""
+    summary = {f"p{q}": percentile(latencies_ms, q) for q in (50, 95, 99)}
+    summary['mean'] = sum(latencies_ms) / len(latencies_ms) if latencies_ms else None
+    summary['max'] = max(latencies_ms) if latencies_ms else None
+    return {key: round(value, 2) if value is not None else None for key, value in summary.items()}
+
+def git_commit() -> Optional[str]:
+    """Commit actual del repositorio, para identificar la corrida."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmark(urls: int, site_config: SiteConfig, browser: bool = False, concurrency: int = 1,
+                  pipeline: bool = False) -> Dict:
+    """Ejecuta una corrida y retorna el reporte (serializable a JSON)."""
+    latencies_ms: List[float] = []
+    db = BenchmarkDB()
+    # Sin rate limit: el sitio es local
+    limiter = DomainRateLimiter(default={'rate': 1_000_000, 'burst': 1_000_000})
+
+    original_process = track.process_product
+
+    def timed_process(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_process(*args, **kwargs)
+        finally:
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    with SyntheticSite(site_config) as site, RssSampler() as rss, \
+            patch.object(track, 'send_price_alert_sync', lambda *args, **kwargs: None), \
+            patch.object(track, 'HTTP_FIRST', not browser), \
+            patch.object(track, 'process_product', timed_process):
+        # Las URLs del sitio local se scrapean con el adaptador de Alkosto
+        get_registry().register(site.domain, 'shared.adapters.alkosto')
+        url_infos = site.url_infos(urls)
+
+        pipeline_report = None
+        if concurrency > 1 and pipeline:
+            from scraper.pipeline import PipelineEngine
+
+            engine = PipelineEngine(db, concurrency=concurrency, limiter=limiter)
+            stats = asyncio.run(engine.run(url_infos))
+            # Las etapas no pasan por process_product: la latencia es la del total de cada URL
+            latencies_ms = [seconds * 1000 for seconds in stats.timings.by_stage().get(STAGE_TOTAL, [])]
+            pipeline_report = engine.monitor.report()
+        elif concurrency > 1:
+            from scraper.engine import AsyncScrapeEngine
+
+            engine = AsyncScrapeEngine(db, concurrency=concurrency, limiter=limiter)
+            original_async = engine.process_product
+
+            async def timed_async(page, url_info):
+                start = time.perf_counter()
+                try:
+                    return await original_async(page, url_info)
+                finally:
+                    latencies_ms.append((time.perf_counter() - start) * 1000)
+
+            engine.process_product = timed_async
+            stats = asyncio.run(engine.run(url_infos))
+        elif browser:
+            stats = track.run_sequential(db, url_infos, limiter=limiter)
+        else:
+            # Camino HTTP: el navegador no llega a hacer falta
+            stats = track.run_queue(db, url_infos, page=None, limiter=limiter)
+
+        server_requests = site.requests
+
+    return {
+        'benchmark': 'scrape_pipeline',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {
+            'urls': urls,
+            'mode': ('pipeline' if pipeline else 'engine') if concurrency > 1 else ('browser' if browser else 'http'),
+            'concurrency': concurrency,
+            'latency_ms': site_config.latency_ms,
+            'jitter_ms': site_config.jitter_ms,
+            'page_kb': site_config.page_kb,
+            'discount_ratio': site_config.discount_ratio,
+            'seed': site_config.seed,
+        },
+        'results': {
+            'succeeded': stats.succeeded,
+            'failed': stats.failed,
+            'elapsed_s': round(stats.elapsed, 3),
+            'urls_per_sec': round((stats.succeeded + stats.failed) / stats.elapsed, 2) if stats.elapsed else None,
+            'latency_ms': latency_summary(latencies_ms),
+            'paths': dict(stats.paths),
+            'stages_ms': {
+                stage: {key: round(value, 2) for key, value in values.items()}
+                for stage, values in stats.timings.stage_stats().items()
+            },
+            'pipeline': pipeline_report,
+            'peak_rss_mb': round(rss.peak_mb, 1) if rss.peak_mb is not None else None,
+            'server_requests': server_requests,
+        },
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de scraping (offline)")
+    parser.add_argument("--urls", type=int, default=200, help="Páginas sintéticas a scrapear")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latencia de cada respuesta del sitio")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Variación aleatoria de la latencia (±)")
+    parser.add_argument("--page-kb", type=int, default=200, help="Peso aproximado de cada página")
+    parser.add_argument("--discount-ratio", type=float, default=0.3, help="Fracción de productos con descuento")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los productos sintéticos")
+    parser.add_argument("--browser", action="store_true", help="Forzar el camino del navegador (requiere Chromium)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Con > 1 usa el motor asíncrono (requiere Chromium)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Con --concurrency > 1, usar el motor por etapas de scraper/pipeline.py")
+    parser.add_argument("--output", type=Path, help="Archivo JSON donde guardar el reporte (por defecto stdout)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    """Función principal del benchmark."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    report = run_benchmark(
+        args.urls,
+        SiteConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, page_kb=args.page_kb,
+                   discount_ratio=args.discount_ratio, seed=args.seed),
+        browser=args.browser, concurrency=args.concurrency, pipeline=args.pipeline,
+    )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n", encoding='utf-8')
+        results = report['results']
+        print(f"{results['urls_per_sec']} URLs/s, p95 {results['latency_ms']['p95']} ms, "
+              f"RSS máx {results['peak_rss_mb']} MB -> {args.output}")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Servidor HTTP local con páginas de producto sintéticas al estilo Alkosto.
+
+Cada producto se genera de forma determinista a partir de su ID y de la
+semilla: nombre, precio y (según `discount_ratio`) precio tachado, con la
+misma estructura que parsea shared/adapters/alkosto.py. El peso de la página
+y la latencia de respuesta son configurables para simular la tienda real
+sin salir a la red.
+"""
+
+import time
+import random
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+HOST = '127.0.0.1'
+
+# Relleno que imita el peso de los scripts y el markup de una página real
+FILLER_BLOCK = (
+    '<div class="product-carousel__item"><a href="/otro/p/{i}">'
+    '<img src="/media/{i}.webp" alt="Producto relacionado {i}"></a>'
+    '<span class="price">$ {i}.900</span></div>\n'
+)
+
+@dataclass
+class SiteConfig:
+    """Parámetros de las páginas sintéticas."""
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    page_kb: int = 200
+    discount_ratio: float = 0.3
+    seed: int = 0
+
+def format_price(value: int) -> str:
+    """Precio con el formato colombiano de la tienda: $1.299.900."""
+    return "$" + f"{value:,}".replace(",", ".")
+
+def synthetic_product(product_id: int, config: SiteConfig) -> Tuple[str, float, Optional[float]]:
+    """
+    Producto de un ID, tal como debería extraerlo el adaptador.
+
+    Returns:
+        (nombre, precio oficial, precio con descuento o None)
+    """
+    rng = random.Random(f"{config.seed}:{product_id}")
+    price = rng.randrange(20_000, 5_000_000, 100)
+    name = f"Producto sintético {product_id}"
+    if rng.random() < config.discount_ratio:
+        discounted = int(price * rng.uniform(0.6, 0.95)) // 100 * 100
+        return name, float(price), float(discounted)
+    return name, float(price), None
+
+def render_product_page(product_id: int, config: SiteConfig) -> bytes:
+    """HTML de la página de producto, rellenado hasta ~`page_kb` KB."""
+    name, price, discounted = synthetic_product(product_id, config)
+    if discounted:
+        prices = (
+            f'<p id="js-original_price">{format_price(int(discounted))}</p>'
+            f'<p id="js-original_price_old"><span>{format_price(int(price))}</span>'
+            f'<div>-{round((1 - discounted / price) * 100)}%</div></p>'
+        )
+    else:
+        prices = f'<p id="js-original_price">{format_price(int(price))}</p>'
+
+    head = (
+        f'<html><head><title>{name} | Alkosto</title></head><body><main>'
+        f'<section><div><div><div><h1>{name}</h1></div></div></div></section>'
+        f'<section>{prices}</section><section class="related">\n'
+    )
+    tail = '</section></main></body></html>'
+
+    parts = [head]
+    size = len(head) + len(tail)
+    target = config.page_kb * 1024
+    i = 0
+    while size < target:
+        block = FILLER_BLOCK.format(i=i)
+        parts.append(block)
+        size += len(block)
+        i += 1
+    parts.append(tail)
+    return "".join(parts).encode('utf-8')
+
+class SyntheticSite:
+    """
+    Servidor de páginas sintéticas en un hilo aparte.
+
+    Uso:
+        with SyntheticSite(SiteConfig(latency_ms=80)) as site:
+            urls = site.url_infos(100)
+    """
+
+    def __init__(self, config: SiteConfig = SiteConfig(), port: int = 0):
+        self.config = config
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((HOST, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def domain(self) -> str:
+        """Dominio con el que el registro de adaptadores reconoce las URLs del sitio."""
+        return HOST
+
+    def url_for(self, product_id: int) -> str:
+        return f"http://{HOST}:{self.port}/producto-sintetico/p/{product_id}"
+
+    def url_infos(self, count: int) -> List[Dict]:
+        """Lista aplanada de URLs, con el formato de load_config()."""
+        return [{
+            'url': self.url_for(product_id),
+            'product_name': f"Producto sintético {product_id}",
+            'alias': f"sintetico_{product_id}",
+            'store_name': "Alkosto sintético",
+            'presentation_size': "Unidad",
+            'unit_count': 1,
+        } for product_id in range(count)]
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+
+                try:
+                    product_id = int(self.path.rstrip('/').rsplit('/', 1)[-1])
+                except ValueError:
+                    self.send_error(404)
+                    return
+
+                config = site.config
+                delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+                time.sleep(max(0.0, delay) / 1000)
+
+                body = render_product_page(product_id, config)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Sin una línea de log por petición
+                pass
+
+        return Handler
+
+    def start(self) -> "SyntheticSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="synthetic-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SyntheticSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
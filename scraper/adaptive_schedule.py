@@ -0,0 +1,197 @@
+"""
+Programación adaptativa del scraping según la volatilidad de cada precio.
+
+En lugar de revisar todas las URLs con la misma cadencia, cada URL recibe un
+intervalo propio calculado a partir de cuántas veces cambió su precio en la
+tabla `prices`:
+
+- los precios que cambian seguido se revisan más a menudo;
+- los que están cerca de disparar una alerta (a pocos puntos de su mínimo
+  histórico) también;
+- los estables se revisan menos, pero al menos una vez cada MAX_INTERVAL.
+
+La suma de revisiones por día no puede superar un presupuesto global: si la
+demanda lo excede, todos los intervalos se estiran en la misma proporción.
+
+Si no se puede leer el historial, se vuelve a la cadencia fija de una pasada
+completa cada FALLBACK_INTERVAL, no a revisar todo en cada pasada.
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límites del intervalo entre revisiones de una misma URL, en horas
+MIN_INTERVAL_HOURS = float(os.getenv('SCRAPER_MIN_INTERVAL_HOURS', '1'))
+MAX_INTERVAL_HOURS = float(os.getenv('SCRAPER_MAX_INTERVAL_HOURS', '24'))
+# Intervalo para URLs con poco historial
+COLD_START_INTERVAL_HOURS = 6.0
+# Mediciones necesarias para confiar en la tasa de cambio observada
+MIN_SAMPLES = 3
+# Revisiones deseadas por cada cambio de precio esperado
+POLLS_PER_CHANGE = 4
+# Cambios "a priori" que suavizan la tasa de las URLs que nunca cambiaron
+PRIOR_CHANGES = 0.5
+# Distancia al mínimo histórico (fracción) a partir de la cual se acorta el intervalo
+NEAR_ALERT_MARGIN = 0.03
+NEAR_ALERT_FACTOR = 0.5
+# Días de historial que se consideran
+HISTORY_DAYS = 30
+# Tolerancia al decidir si una URL está pendiente: una pasada que llega unos
+# minutos antes de la hora exacta no la deja esperando a la siguiente
+DUE_SLACK = timedelta(minutes=5)
+# Cadencia fija cuando falla la consulta del historial (la de antes de la programación adaptativa)
+FALLBACK_INTERVAL = timedelta(hours=1)
+
+def default_daily_budget(url_count: int, baseline_per_day: float) -> float:
+    """
+    Presupuesto de revisiones por día: SCRAPER_DAILY_BUDGET si está definido,
+    o lo que costaría revisar todas las URLs con la cadencia fija `baseline_per_day`.
+    """
+    configured = os.getenv('SCRAPER_DAILY_BUDGET')
+    return float(configured) if configured else url_count * baseline_per_day
+
+@dataclass
+class ScheduleEntry:
+    """Cuándo toca revisar una URL y por qué."""
+    url_info: Dict
+    interval_hours: float
+    next_due: datetime
+    reason: str
+
+    @property
+    def url(self) -> str:
+        return self.url_info['url']
+
+    def is_due(self, now: datetime, slack: timedelta = timedelta(0)) -> bool:
+        return self.next_due <= now + slack
+
+def change_rate_per_day(stats: Dict, now: datetime) -> Optional[float]:
+    """
+    Cambios de precio por día observados, o None si hay poco historial.
+
+    Se suma PRIOR_CHANGES para que "nunca cambió en 2 días" no se lea como
+    "no cambiará nunca".
+    """
+    if not stats or stats.get('samples', 0) < MIN_SAMPLES:
+        return None
+    span_days = max((now - stats['first_seen']).total_seconds() / 86400, 1.0)
+    return (stats.get('changes', 0) + PRIOR_CHANGES) / span_days
+
+def near_alert(stats: Dict) -> bool:
+    """True si el último precio está a menos de NEAR_ALERT_MARGIN de su mínimo histórico."""
+    last_price = float(stats.get('last_price') or 0)
+    min_price = float(stats.get('min_price') or 0)
+    if not last_price or not min_price:
+        return False
+    return (last_price - min_price) / min_price <= NEAR_ALERT_MARGIN
+
+def base_interval_hours(stats: Optional[Dict], now: datetime) -> Tuple[float, str]:
+    """Intervalo deseado para una URL (antes de aplicar el presupuesto) y su motivo."""
+    rate = change_rate_per_day(stats, now)
+    if rate is None:
+        return COLD_START_INTERVAL_HOURS, "poco historial"
+
+    interval = 24 / (rate * POLLS_PER_CHANGE)
+    reason = f"{rate:.2f} cambios/día"
+    if near_alert(stats):
+        interval *= NEAR_ALERT_FACTOR
+        reason += ", cerca del mínimo histórico"
+    return interval, reason
+
+def _clamp(hours: float) -> float:
+    return max(MIN_INTERVAL_HOURS, min(MAX_INTERVAL_HOURS, hours))
+
+def compute_schedule(urls_to_process: List[Dict], stats_by_url: Dict[str, Dict], now: datetime,
+                     daily_budget: Optional[float] = None) -> List[ScheduleEntry]:
+    """
+    Calcula el intervalo y la próxima revisión de cada URL.
+
+    Args:
+        urls_to_process: Lista aplanada de URLs de load_config()
+        stats_by_url: Resultado de PriceDatabase.get_price_change_stats() indexado por URL
+        now: Momento de referencia
+        daily_budget: Máximo de revisiones por día entre todas las URLs (None = sin límite)
+    """
+    desired = []
+    for url_info in urls_to_process:
+        stats = stats_by_url.get(url_info['url'])
+        hours, reason = base_interval_hours(stats, now)
+        desired.append((url_info, stats, _clamp(hours), reason))
+
+    # Presupuesto global: estirar todos los intervalos en la misma proporción
+    demand = sum(24 / hours for _, _, hours, _ in desired)
+    scale = demand / daily_budget if daily_budget and demand > daily_budget else 1.0
+    if scale > 1:
+        logger.info(f"Demanda de {demand:.0f} revisiones/día supera el presupuesto de {daily_budget:.0f}: "
+                    f"intervalos x{scale:.2f}")
+
+    entries = []
+    for url_info, stats, hours, reason in desired:
+        hours = min(MAX_INTERVAL_HOURS, hours * scale)
+        last_scraped = stats.get('last_scraped') if stats else None
+        # Nunca revisada: toca ya
+        next_due = last_scraped + timedelta(hours=hours) if last_scraped else now
+        entries.append(ScheduleEntry(url_info, hours, next_due, reason))
+    return entries
+
+class AdaptiveScheduler:
+    """
+    Decide qué URLs toca revisar en cada pasada, según el historial de la BD.
+
+    El daemon usa la misma instancia en todas sus pasadas: recuerda cuándo
+    fue la última pasada completa por falta de historial.
+    """
+
+    def __init__(self, db, daily_budget: Optional[float] = None, history_days: int = HISTORY_DAYS,
+                 slack: timedelta = DUE_SLACK):
+        self.db = db
+        self.daily_budget = daily_budget
+        self.history_days = history_days
+        self.slack = slack
+        self.last_fallback: Optional[datetime] = None
+
+    def plan(self, urls_to_process: List[Dict], now: Optional[datetime] = None) -> Optional[List[ScheduleEntry]]:
+        """Calcula la programación de todas las URLs, o None si no se pudo leer el historial."""
+        now = now or datetime.now()
+        rows = self.db.get_price_change_stats(self.history_days)
+        if rows is None:
+            return None
+        stats_by_url = {row['url']: row for row in rows}
+        return compute_schedule(urls_to_process, stats_by_url, now, self.daily_budget)
+
+    def fallback_due(self, urls_to_process: List[Dict], now: datetime) -> List[Dict]:
+        """Sin historial: todas las URLs una vez cada FALLBACK_INTERVAL, ninguna en las pasadas intermedias."""
+        if self.last_fallback and now + self.slack < self.last_fallback + FALLBACK_INTERVAL:
+            logger.warning(
+                f"Sin historial de precios: se omite la pasada, la próxima completa es a las "
+                f"{self.last_fallback + FALLBACK_INTERVAL:%H:%M}"
+            )
+            return []
+        self.last_fallback = now
+        logger.warning(f"Sin historial de precios: pasada completa de {len(urls_to_process)} URLs")
+        return list(urls_to_process)
+
+    def due(self, urls_to_process: List[Dict], now: Optional[datetime] = None) -> List[Dict]:
+        """Retorna las URLs que toca revisar ahora y registra en el log la programación."""
+        now = now or datetime.now()
+        entries = self.plan(urls_to_process, now)
+        if entries is None:
+            return self.fallback_due(urls_to_process, now)
+        due = [entry for entry in entries if entry.is_due(now, self.slack)]
+
+        for entry in entries:
+            logger.debug(
+                f"{entry.url}: cada {entry.interval_hours:.1f}h ({entry.reason}), "
+                f"próxima {entry.next_due:%Y-%m-%d %H:%M}"
+            )
+        upcoming = min((entry.next_due for entry in entries if not entry.is_due(now, self.slack)), default=None)
+        logger.info(
+            f"Programación adaptativa: {len(due)}/{len(entries)} URLs pendientes"
+            + (f", próxima a las {upcoming:%H:%M}" if upcoming else "")
+        )
+        return [entry.url_info for entry in due]
@@ -0,0 +1,212 @@
+"""
+Navegador persistente para el daemon de scraper/main.py.
+
+En lugar de lanzar y cerrar Chromium en cada ciclo, el BrowserPool mantiene
+el navegador vivo durante todo el daemon y entrega la página bajo demanda
+(misma interfaz `.get()` que LazyPage). Además:
+
+- revisa la salud del navegador al empezar cada ciclo y antes de cada uso,
+  y lo reinicia si se cayó;
+- recicla el contexto (y con él sus procesos de renderizado) cada N
+  navegaciones o cuando la memoria del árbol de procesos supera un umbral.
+
+Los objetos de playwright.sync_api quedan atados al hilo que los creó: el
+pool debe crearse y usarse siempre desde el mismo hilo (ver main.py).
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+
+from shared.utils.resource_blocker import ResourceBlocker
+from shared.utils.metrics import BROWSER_RECYCLES, BROWSER_RESTARTS
+from scraper.track import USER_AGENT, VIEWPORT
+
+logger = logging.getLogger(__name__)
+
+# Navegaciones por contexto antes de reciclarlo
+MAX_NAVIGATIONS = int(os.getenv('SCRAPER_POOL_MAX_NAVIGATIONS', '200'))
+# Memoria (RSS del proceso y sus hijos, en MB) a partir de la cual se recicla
+MAX_MEMORY_MB = float(os.getenv('SCRAPER_POOL_MAX_MEMORY_MB', '1024'))
+# Cada cuántas navegaciones se mide la memoria (recorrer /proc no es gratis)
+MEMORY_CHECK_EVERY = 10
+
+def _read_ppid(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            # El nombre del proceso va entre paréntesis y puede tener espacios
+            fields = f.read().rsplit(')', 1)[1].split()
+        return int(fields[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _read_rss_bytes(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return 0
+
+def process_tree_rss_mb(root_pid: Optional[int] = None) -> Optional[float]:
+    """
+    RSS total (MB) de un proceso y todos sus descendientes, leído de /proc.
+
+    Chromium corre como nietos de este proceso (vía el driver de Playwright),
+    así que se suma el árbol completo. Retorna None si /proc no existe.
+    """
+    if not os.path.isdir('/proc'):
+        return None
+
+    root_pid = root_pid or os.getpid()
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            ppid = _read_ppid(int(entry))
+            if ppid is not None:
+                children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += _read_rss_bytes(pid)
+        stack.extend(children.get(pid, []))
+    return total / 1_048_576
+
+class BrowserPool:
+    """Navegador de larga vida con chequeos de salud, reciclado y reinicio."""
+
+    def __init__(self, blocker: Optional[ResourceBlocker] = None, headless: bool = True,
+                 extra_headers: Optional[Dict[str, str]] = None,
+                 max_navigations: int = MAX_NAVIGATIONS, max_memory_mb: float = MAX_MEMORY_MB,
+                 memory_probe=process_tree_rss_mb):
+        self.blocker = blocker
+        self.headless = headless
+        self.extra_headers = extra_headers
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self._memory_probe = memory_probe
+        self._thread_id: Optional[int] = None
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._page: Optional[Page] = None
+        self.navigations = 0
+        self.restarts = 0
+        self.recycles = 0
+
+    def _check_thread(self) -> None:
+        current = threading.get_ident()
+        if self._thread_id is None:
+            self._thread_id = current
+        elif self._thread_id != current:
+            raise RuntimeError("BrowserPool usado desde un hilo distinto al que lo creó")
+
+    def _start(self) -> None:
+        """Lanza Playwright y el navegador."""
+        logger.info("Iniciando navegador persistente...")
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._new_context()
+
+    def _new_context(self) -> None:
+        """Abre un contexto y una página nuevos con la configuración del scraper."""
+        self._context = self._browser.new_context(
+            user_agent=USER_AGENT, viewport=VIEWPORT, extra_http_headers=self.extra_headers
+        )
+        self._page = self._context.new_page()
+        if self.blocker:
+            self.blocker.install(self._page)
+        self.navigations = 0
+
+    def _close_quietly(self, resource) -> None:
+        try:
+            if resource:
+                resource.close()
+        except Exception as e:
+            logger.debug(f"Error cerrando recurso del navegador: {e}")
+
+    def restart(self) -> None:
+        """Cierra todo lo que quede del navegador y lo vuelve a lanzar."""
+        self.restarts += 1
+        BROWSER_RESTARTS.inc()
+        self.close()
+        self._start()
+
+    def recycle(self) -> None:
+        """Cierra el contexto actual (liberando sus renderers) y abre otro."""
+        self.recycles += 1
+        BROWSER_RECYCLES.inc()
+        self._close_quietly(self._context)
+        self._new_context()
+
+    def is_alive(self) -> bool:
+        """Chequeo barato: navegador conectado y página abierta."""
+        return (self._browser is not None and self._browser.is_connected()
+                and self._page is not None and not self._page.is_closed())
+
+    def health_check(self) -> bool:
+        """Chequeo completo (un viaje al navegador); reinicia si falla."""
+        self._check_thread()
+        if self._browser is None:
+            return True  # Se lanzará al primer uso
+
+        try:
+            healthy = self.is_alive() and self._page.evaluate("1") == 1
+        except Exception as e:
+            logger.warning(f"Chequeo de salud del navegador falló: {e}")
+            healthy = False
+
+        if not healthy:
+            logger.warning("Navegador no responde, reiniciando...")
+            self.restart()
+        return healthy
+
+    def _memory_exceeded(self) -> bool:
+        if not self.max_memory_mb or self.navigations % MEMORY_CHECK_EVERY:
+            return False
+        rss_mb = self._memory_probe()
+        if rss_mb is not None and rss_mb > self.max_memory_mb:
+            logger.info(f"Memoria del navegador {rss_mb:.0f} MB supera {self.max_memory_mb:.0f} MB")
+            return True
+        return False
+
+    def get(self) -> Page:
+        """Retorna una página sana, reiniciando o reciclando si hace falta."""
+        self._check_thread()
+
+        if self._browser is None:
+            self._start()
+        elif not self.is_alive():
+            logger.warning("El navegador se cayó, reiniciando...")
+            self.restart()
+        elif self.navigations >= self.max_navigations:
+            logger.info(f"Reciclando contexto tras {self.navigations} navegaciones")
+            self.recycle()
+        elif self._memory_exceeded():
+            self.recycle()
+            if (self._memory_probe() or 0) > self.max_memory_mb:
+                # El exceso no era de los renderers del contexto: reiniciar todo
+                self.restart()
+
+        self.navigations += 1
+        return self._page
+
+    def close(self) -> None:
+        """Cierra el navegador y detiene Playwright."""
+        self._close_quietly(self._browser)
+        self._browser = self._context = self._page = None
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Error deteniendo Playwright: {e}")
+            self._playwright = None
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        return f"Navegador persistente: {self.recycles} reciclados, {self.restarts} reinicios"
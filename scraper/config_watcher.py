@@ -0,0 +1,123 @@
+"""
+Recarga en caliente de products.yml para el daemon (scraper/main.py).
+
+Sondea el archivo cada pocos segundos comparando sólo su `stat` (mtime y
+tamaño); si cambió, lo vuelve a leer (con el caché por hash de
+shared/utils/config_cache.py) y calcula qué URLs se agregaron, quitaron o
+modificaron. El daemon usa ese diff para dar de alta sólo los productos
+nuevos y programar su primera pasada de inmediato, sin reiniciar ni
+recorrer todo el catálogo.
+
+Se usa sondeo en vez de inotify: funciona igual en Docker con volúmenes
+montados y con editores que reemplazan el archivo al guardar.
+"""
+
+import os
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.getenv('SCRAPER_CONFIG_POLL_SECONDS', '5'))
+
+@dataclass
+class ConfigDiff:
+    """Cambios de URLs entre dos lecturas de products.yml."""
+    added: List[Dict] = field(default_factory=list)
+    removed: List[Dict] = field(default_factory=list)
+    # Misma URL con otros datos (nombre, presentación, tienda...)
+    changed: List[Dict] = field(default_factory=list)
+    # Productos de la nueva configuración
+    products: List[Dict] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} URLs, -{len(self.removed)} URLs, {len(self.changed)} modificadas"
+
+def diff_urls(old: Dict[str, Dict], new: Dict[str, Dict]) -> ConfigDiff:
+    """Compara dos mapas URL -> url_info (en el orden de la configuración nueva)."""
+    return ConfigDiff(
+        added=[info for url, info in new.items() if url not in old],
+        removed=[info for url, info in old.items() if url not in new],
+        changed=[info for url, info in new.items() if url in old and old[url] != info],
+    )
+
+class ConfigWatcher:
+    """
+    Última versión leída de products.yml y detección de cambios por sondeo.
+
+    `poll()` se llama periódicamente (un job del scheduler); `current()` y
+    `has()` dan la configuración vigente a los ciclos de scraping.
+    """
+
+    def __init__(self, path: Path, load: Callable[[], Tuple[List[Dict], List[Dict]]],
+                 on_change: Optional[Callable[[ConfigDiff], None]] = None):
+        self.path = Path(path)
+        self._load = load
+        self._on_change = on_change
+        self._signature: Optional[Tuple[int, int]] = None
+        self._products: List[Dict] = []
+        self._urls: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def prime(self) -> None:
+        """Primera lectura, sin notificar: todo el catálogo lo cubre el ciclo normal."""
+        self._signature = self._stat_signature()
+        products, urls = self._load()
+        with self._lock:
+            self._products = products
+            self._urls = {info['url']: info for info in urls}
+
+    def current(self) -> Tuple[List[Dict], List[Dict]]:
+        """Productos y lista aplanada de URLs vigentes."""
+        with self._lock:
+            return list(self._products), list(self._urls.values())
+
+    def has(self, url: str) -> bool:
+        """True si la URL sigue en la configuración vigente."""
+        with self._lock:
+            return url in self._urls
+
+    def poll(self) -> Optional[ConfigDiff]:
+        """Relee el archivo si su stat cambió. Retorna el diff si hubo cambios de URLs."""
+        signature = self._stat_signature()
+        if signature is None or signature == self._signature:
+            return None
+
+        # Aunque la lectura falle: el próximo guardado vuelve a cambiar el stat
+        self._signature = signature
+        try:
+            products, urls = self._load()
+        except Exception as e:
+            # Archivo a medio guardar o YAML inválido: se mantiene la configuración anterior
+            logger.warning(f"No se pudo recargar {self.path.name}, se mantiene la configuración anterior: {e}")
+            return None
+
+        new_urls = {info['url']: info for info in urls}
+        with self._lock:
+            diff = diff_urls(self._urls, new_urls)
+            self._products = products
+            self._urls = new_urls
+        diff.products = products
+
+        if diff.is_empty:
+            logger.info(f"{self.path.name} cambió sin afectar a las URLs")
+            return None
+
+        logger.info(f"{self.path.name} recargado: {diff.summary()}")
+        if self._on_change:
+            self._on_change(diff)
+        return diff
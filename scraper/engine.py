@@ -0,0 +1,248 @@
+"""
+Motor de scraping asíncrono y concurrente.
+
+Procesa varias URLs a la vez sobre un pool de páginas de Playwright
+(playwright.async_api), con un límite de concurrencia configurable.
+El orden lo decide una DomainWorkQueue: cada dominio respeta su rate
+limit y los reintentos se difieren sin ocupar una página.
+
+Cada adaptador debe exponer `get_price_async(page, url)` con el mismo
+contrato que `get_price` (y opcionalmente `get_price_from_html` para el
+camino HTTP sin navegador). La parte de BD y alertas reutiliza
+`handle_extracted_price` de track.py, ejecutada en un hilo para no
+bloquear el event loop.
+
+scraper/pipeline.py reutiliza el pool y la cola de este motor, pero reparte
+cada URL en etapas con su propia concurrencia (--pipeline).
+"""
+
+import os
+import math
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+from shared.utils.database import PriceDatabase
+from shared.utils.rate_limit import DomainRateLimiter
+from scraper.stats import RunStats, PATH_HTTP, PATH_BROWSER
+from scraper.work_queue import DomainWorkQueue, WorkItem
+from shared.utils.circuit_breaker import DomainCircuitBreaker
+from shared.utils.checkpoint import RunCheckpoint
+from shared.utils.snapshots import get_snapshot_session
+from shared.utils.timing import STAGE_BROWSER, span, timed_url
+from shared.utils.metrics import BROWSER_PAGES_IN_USE, record_attempt
+from scraper.track import (
+    create_resource_blocker, fetch_price_http, finish_queue, get_adapter_for_url, handle_extracted_price,
+    load_rate_limiter, retry_delay, save_learned_state,
+    MAX_RETRIES, USER_AGENT, VIEWPORT
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncScrapeEngine:
+    """Procesa URLs en paralelo usando un pool de páginas sobre varios contextos."""
+
+    def __init__(self, db: PriceDatabase, concurrency: int = 4, pages_per_context: int = 2,
+                 max_retries: int = MAX_RETRIES, headless: bool = True,
+                 limiter: Optional[DomainRateLimiter] = None,
+                 checkpoint: Optional[RunCheckpoint] = None):
+        self.db = db
+        self.checkpoint = checkpoint
+        self.concurrency = max(1, concurrency)
+        self.pages_per_context = max(1, pages_per_context)
+        self.max_retries = max_retries
+        self.headless = headless
+        self.limiter = limiter or load_rate_limiter()
+        self.blocker = create_resource_blocker()
+        self.stats = RunStats()
+        self._queue = DomainWorkQueue(self.limiter)
+        self._in_flight = 0
+        self._pages: "asyncio.Queue[Page]" = asyncio.Queue()
+        self._contexts: List[BrowserContext] = []
+
+    async def _open_pool(self, browser: Browser) -> None:
+        """Crea los contextos y las páginas del pool."""
+        context_count = math.ceil(self.concurrency / self.pages_per_context)
+        remaining = self.concurrency
+
+        for _ in range(context_count):
+            context = await browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+            self._contexts.append(context)
+
+            for _ in range(min(self.pages_per_context, remaining)):
+                page = await context.new_page()
+                if self.blocker:
+                    await self.blocker.install_async(page)
+                if get_snapshot_session():
+                    await get_snapshot_session().install_async(page)
+                self._pages.put_nowait(page)
+                remaining -= 1
+
+        logger.info(f"Pool listo: {self.concurrency} páginas en {context_count} contextos")
+
+    async def _close_pool(self) -> None:
+        """Cierra todos los contextos (y con ellos sus páginas)."""
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando contexto: {e}")
+        self._contexts.clear()
+
+    async def process_product(self, page: Page, url_info: Dict) -> bool:
+        """
+        Hace un intento de procesar una URL. Retorna True si se guardó el precio.
+
+        Los reintentos no se hacen aquí: el worker los difiere en la cola para
+        no ocupar la página mientras tanto.
+        """
+        url = url_info['url']
+        product_name = url_info['product_name']
+        store_name = url_info['store_name']
+
+        adapter = get_adapter_for_url(url)
+        if not adapter:
+            return False
+
+        if not hasattr(adapter, 'get_price_async'):
+            logger.error(f"El adaptador {adapter.__name__} no soporta el motor asíncrono")
+            return False
+
+        try:
+            # Cada worker es una tarea con su propio contexto: las etapas no se mezclan
+            with timed_url(self.stats.timings, url):
+                # Primero el camino HTTP (sin navegador), en un hilo para no bloquear el loop
+                extracted = await asyncio.to_thread(fetch_price_http, adapter, url)
+                path = PATH_HTTP
+
+                if extracted is None:
+                    with span(STAGE_BROWSER):
+                        extracted = await adapter.get_price_async(page, url)
+                    path = PATH_BROWSER
+
+                    if get_snapshot_session():
+                        await get_snapshot_session().flush_async(page)
+
+                extracted_name, official_price, discounted_price = extracted
+
+                # BD y alertas son síncronas: se ejecutan en un hilo aparte
+                await asyncio.to_thread(
+                    handle_extracted_price, self.db, url_info,
+                    extracted_name, official_price, discounted_price
+                )
+            record_attempt(url, ok=True)
+            self.stats.record_path(url, path)
+            return True
+
+        except Exception as e:
+            record_attempt(url, ok=False)
+            logger.warning(f"Intento falló para {product_name} en {store_name}: {e}")
+            return False
+
+    async def _next_item(self) -> Optional[WorkItem]:
+        """
+        Espera la próxima URL lista según el rate limit de su dominio.
+
+        Retorna None cuando no queda nada pendiente ni en curso (un intento en
+        curso todavía puede devolver un reintento a la cola).
+        """
+        while True:
+            item, wait = self._queue.next_ready()
+            if item:
+                self._in_flight += 1
+                return item
+            if not len(self._queue) and not self._in_flight:
+                return None
+            await asyncio.sleep(wait or 0.05)
+
+    async def _complete(self, item: WorkItem, ok: bool) -> None:
+        """
+        Cierra un intento tomado con `_next_item`: informa al circuit breaker y
+        difiere el reintento o cuenta el resultado final (con su checkpoint).
+        """
+        try:
+            self._queue.record_result(item, ok)
+
+            if ok:
+                self.stats.succeeded += 1
+            elif item.attempt < self.max_retries:
+                self._queue.add(item.url_info, attempt=item.attempt + 1, delay=retry_delay(item.attempt))
+                return
+            else:
+                logger.error(f"Se agotaron los {self.max_retries} intentos para {item.url}")
+                self.stats.failed += 1
+
+            if self.checkpoint:
+                await asyncio.to_thread(self.checkpoint.mark, item.url, ok)
+        finally:
+            self._in_flight -= 1
+
+    async def _worker(self) -> None:
+        """Toma una página del pool y procesa URLs de la cola hasta vaciarla."""
+        page = await self._pages.get()
+        try:
+            while (item := await self._next_item()) is not None:
+                url_info = item.url_info
+                logger.info(
+                    f"Procesando: {url_info['product_name']} en {url_info['store_name']} "
+                    f"(intento {item.attempt}/{self.max_retries})"
+                )
+
+                # Ocupada sólo mientras procesa: esperando el rate limit la página está ociosa
+                BROWSER_PAGES_IN_USE.inc()
+                try:
+                    ok = await self.process_product(page, url_info)
+                finally:
+                    BROWSER_PAGES_IN_USE.dec()
+                await self._complete(item, ok)
+        finally:
+            self._pages.put_nowait(page)
+
+    async def _process_all(self) -> None:
+        """Procesa la cola con el pool ya abierto: un worker por página."""
+        await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+
+    async def run(self, urls_to_process: List[Dict]) -> RunStats:
+        """Procesa todas las URLs y retorna las estadísticas de la corrida."""
+        self.stats = RunStats(total=len(urls_to_process))
+        self._queue = DomainWorkQueue(self.limiter, breaker=DomainCircuitBreaker())
+        self._queue.add_all(urls_to_process)
+        self._in_flight = 0
+
+        async with async_playwright() as p:
+            logger.info(f"Iniciando navegador (concurrencia={self.concurrency})...")
+            browser = await p.chromium.launch(headless=self.headless)
+
+            try:
+                await self._open_pool(browser)
+                await self._process_all()
+            finally:
+                await self._close_pool()
+                await browser.close()
+
+        if self.blocker:
+            logger.info(self.blocker.stats.summary())
+        save_learned_state()
+
+        return finish_queue(self._queue, self.stats)
+
+def run_engine(db: PriceDatabase, urls_to_process: List[Dict], concurrency: int = 4,
+               limiter: Optional[DomainRateLimiter] = None,
+               checkpoint: Optional[RunCheckpoint] = None,
+               pipeline: Optional[bool] = None) -> RunStats:
+    """
+    Punto de entrada síncrono: ejecuta el motor en un event loop nuevo.
+
+    Con `pipeline` (por defecto SCRAPER_PIPELINE) usa el motor por etapas de
+    scraper/pipeline.py.
+    """
+    if pipeline is None:
+        pipeline = os.getenv('SCRAPER_PIPELINE', '0').lower() in ('1', 'true', 'yes')
+
+    if pipeline:
+        from scraper.pipeline import PipelineEngine
+        engine = PipelineEngine(db, concurrency=concurrency, limiter=limiter, checkpoint=checkpoint)
+    else:
+        engine = AsyncScrapeEngine(db, concurrency=concurrency, limiter=limiter, checkpoint=checkpoint)
+    return asyncio.run(engine.run(urls_to_process))
@@ -2,9 +2,11 @@ import time
 import logging
 import sys
 import os
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
-from playwright.sync_api import sync_playwright
+from apscheduler.executors.pool import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Añadir el directorio padre al path para importar módulos
@@ -12,7 +14,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Importar módulos del proyecto
 from shared.utils.database import PriceDatabase
-from scraper.track import load_config, process_product
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.resource_blocker import BlockingStats
+from scraper.track import (
+    CONFIG_PATH, read_config, read_rate_limits, run_queue, create_resource_blocker, save_learned_state,
+    sync_changed_catalog, report_timings
+)
+from scraper.config_watcher import ConfigDiff, ConfigWatcher, POLL_SECONDS
+from scraper.browser_pool import BrowserPool
+from scraper.adaptive_schedule import AdaptiveScheduler, default_daily_budget
+from shared.utils.coordination import FencedDatabase, ShardCoordinator, HEARTBEAT_SECONDS
+from shared.utils.metrics import METRICS_PORT, export_metrics, record_run, start_http_exporter
 
 # Cargar variables de entorno
 load_dotenv()
@@ -21,6 +33,146 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Programación adaptativa: cada pasada revisa sólo las URLs que les toca según
+# la volatilidad de su precio. Con 0 se revisa todo cada hora como antes.
+ADAPTIVE_SCHEDULE = os.getenv('SCRAPER_ADAPTIVE_SCHEDULE', '1') == '1'
+SCHEDULE_TICK_MINUTES = int(os.getenv('SCRAPER_SCHEDULE_TICK_MINUTES', '15'))
+
+# Varios contenedores contra la misma BD: cada uno scrapea sólo sus shards
+COORDINATION = os.getenv('SCRAPER_COORDINATION', '0') == '1'
+
+# Recargar products.yml en caliente: las URLs nuevas se scrapean en segundos
+CONFIG_WATCH = os.getenv('SCRAPER_CONFIG_WATCH', '1') == '1'
+
+# Headers extra como en el track.py original (el User-Agent lo fija el contexto)
+EXTRA_HEADERS = {
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+_browser_pool: Optional[BrowserPool] = None
+_coordinator: Optional[ShardCoordinator] = None
+_config_watcher: Optional[ConfigWatcher] = None
+_adaptive_scheduler: Optional[AdaptiveScheduler] = None
+_rate_limiter: Optional[DomainRateLimiter] = None
+_rate_limits: Optional[Dict] = None
+_scheduler: Optional[BackgroundScheduler] = None
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Retorna el navegador persistente del daemon, creándolo al primer ciclo.
+
+    Se crea de forma perezosa dentro del job para que quede en el hilo del
+    scheduler, que es el único que lo usa.
+    """
+    global _browser_pool
+    if _browser_pool is None:
+        # Bloquear imágenes, fuentes y trackers que no hacen falta para el precio
+        _browser_pool = BrowserPool(blocker=create_resource_blocker(), extra_headers=EXTRA_HEADERS)
+    return _browser_pool
+
+def get_coordinator() -> ShardCoordinator:
+    """Retorna el coordinador de shards del nodo, registrándolo la primera vez."""
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ShardCoordinator(PriceDatabase())
+    return _coordinator
+
+def get_adaptive_scheduler() -> AdaptiveScheduler:
+    """
+    Retorna el programador adaptativo del daemon, el mismo en todas las pasadas
+    (si falla la consulta del historial, recuerda la última pasada completa).
+    """
+    global _adaptive_scheduler
+    if _adaptive_scheduler is None:
+        _adaptive_scheduler = AdaptiveScheduler(PriceDatabase())
+    return _adaptive_scheduler
+
+def heartbeat():
+    """Latido del nodo; corre en su propio hilo para no esperar al ciclo de scraping."""
+    try:
+        get_coordinator().heartbeat()
+    except Exception as e:
+        logger.error(f"Error en el heartbeat del nodo: {e}")
+
+def current_config():
+    """Productos y URLs vigentes: los del watcher si está activo, si no se lee products.yml."""
+    if _config_watcher:
+        return _config_watcher.current()
+    # Lanza la excepción en vez de salir: el ciclo falla y el próximo vuelve a intentar
+    return read_config()
+
+def current_rate_limiter() -> DomainRateLimiter:
+    """
+    Limitador por dominio desde la sección `rate_limits` de products.yml.
+
+    Mientras la sección no cambie se reutiliza el mismo limitador (con sus
+    buckets). Si el archivo no se puede leer, p. ej. a medio guardar, se sigue
+    con el último limitador bueno en vez de abortar el ciclo.
+    """
+    global _rate_limiter, _rate_limits
+    try:
+        rate_limits = read_rate_limits()
+    except Exception as e:
+        if _rate_limiter is None:
+            logger.warning(f"No se pudo leer rate_limits de {CONFIG_PATH.name}, se usan los límites por defecto: {e}")
+            _rate_limiter = DomainRateLimiter.from_config(None)
+        else:
+            logger.warning(f"No se pudo leer rate_limits de {CONFIG_PATH.name}, se mantiene el limitador anterior: {e}")
+        return _rate_limiter
+
+    if _rate_limiter is None or rate_limits != _rate_limits:
+        _rate_limiter = DomainRateLimiter.from_config(rate_limits)
+        _rate_limits = rate_limits
+    return _rate_limiter
+
+def still_assigned(url: str) -> bool:
+    """True si la URL sigue en products.yml y (con varios nodos) en un shard de este nodo."""
+    if _config_watcher and not _config_watcher.has(url):
+        return False
+    if _coordinator and not _coordinator.owns(url):
+        return False
+    return True
+
+def scrape_urls(db: PriceDatabase, urls_to_process: List[Dict], adaptive: bool) -> None:
+    """Scrapea una lista de URLs con el navegador persistente del daemon."""
+    if COORDINATION:
+        # Sólo las URLs de los shards de este nodo; cada precio se guarda validando el lease
+        coordinator = get_coordinator()
+        coordinator.heartbeat()
+        urls_to_process = coordinator.filter_urls(urls_to_process)
+        db = FencedDatabase(db, coordinator)
+        if not urls_to_process:
+            return
+
+    if adaptive:
+        # Presupuesto por defecto: lo mismo que revisar todo cada hora
+        scheduler = get_adaptive_scheduler()
+        scheduler.daily_budget = default_daily_budget(len(urls_to_process), baseline_per_day=24)
+        urls_to_process = scheduler.due(urls_to_process)
+        if not urls_to_process:
+            return
+
+    # Navegador persistente: sólo se lanza en el primer ciclo o si se cayó
+    pool = get_browser_pool()
+    pool.health_check()
+    if pool.blocker:
+        # Contadores de bloqueo por ciclo
+        pool.blocker.stats = BlockingStats()
+
+    # Procesar cada producto: reintentos diferidos y circuit breaker por dominio
+    stats = run_queue(db, urls_to_process, pool, limiter=current_rate_limiter(), keep=still_assigned)
+
+    if pool.blocker:
+        logger.info(pool.blocker.stats.summary())
+    logger.info(pool.summary())
+    save_learned_state()
+    logger.info(stats.summary())
+    report_timings(db, stats)
+    record_run(stats)
+    export_metrics()
+
 def scrape_all_products():
     """
     Obtiene todos los productos del archivo de configuración y actualiza sus precios.
@@ -29,7 +181,7 @@ def scrape_all_products():
     
     try:
         # Cargar configuración de productos
-        products, urls_to_process = load_config()
+        products, urls_to_process = current_config()
         if not urls_to_process:
             logger.info("No se encontraron productos en la configuración para scrapear.")
             return
@@ -39,48 +191,84 @@ def scrape_all_products():
         # Inicializar base de datos
         db = PriceDatabase()
 
-        # Usar Playwright para crear una instancia de navegador
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Configurar user agent y headers como en el track.py original
-            page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            })
-
-            # Procesar cada producto
-            for url_info in urls_to_process:
-                try:
-                    logger.info(f"Procesando: {url_info.get('product_name', 'Producto sin nombre')} - {url_info.get('url', 'URL no encontrada')}")
-                    process_product(page, db, url_info)
-                except Exception as e:
-                    logger.error(f"Error al procesar producto {url_info.get('product_name', 'desconocido')}: {e}")
-                    continue  # Continuar con el siguiente producto
-
-            browser.close()
+        # Productos nuevos o modificados en products.yml (si el archivo no cambió, no hace nada)
+        sync_changed_catalog(db, products)
+
+        scrape_urls(db, urls_to_process, adaptive=ADAPTIVE_SCHEDULE)
 
         logger.info("Ciclo de scraping completado exitosamente.")
 
     except Exception as e:
         logger.error(f"Error en el ciclo de scraping: {e}")
 
+def scrape_new_urls(urls_to_process: List[Dict]):
+    """Primera pasada de las URLs recién agregadas a products.yml, sin esperar al próximo ciclo."""
+    logger.info(f"Primera pasada de {len(urls_to_process)} URLs nuevas.")
+    try:
+        # Pueden haberse quitado de nuevo mientras esperaban al navegador
+        urls_to_process = [u for u in urls_to_process if still_assigned(u['url'])]
+        scrape_urls(PriceDatabase(), urls_to_process, adaptive=False)
+    except Exception as e:
+        logger.error(f"Error en la primera pasada de URLs nuevas: {e}")
+
+def apply_config_change(diff: ConfigDiff):
+    """
+    Aplica una recarga de products.yml: da de alta sólo los productos que
+    cambiaron y programa ya la primera pasada de las URLs nuevas.
 
-if __name__ == '__main__':
-    # Para un inicio más rápido en el primer ciclo, ejecutar inmediatamente
-    scrape_all_products()
+    Las URLs quitadas no necesitan nada: los ciclos consultan al watcher
+    (still_assigned) antes de cada URL.
+    """
+    try:
+        sync_changed_catalog(PriceDatabase(), diff.products)
+    except Exception as e:
+        logger.error(f"Error sincronizando el catálogo recargado: {e}")
+        return
 
-    scheduler = BackgroundScheduler()
-    # Programar la ejecución cada hora. Para probar, puedes cambiar 'hours=1' a 'minutes=5' o 'seconds=30'
-    scheduler.add_job(scrape_all_products, 'interval', hours=1)
+    if diff.added and _scheduler:
+        # En el executor del navegador: se ejecuta apenas termine lo que esté en curso
+        # (sin misfire_grace_time, que la descartaría si el ciclo en curso tarda)
+        _scheduler.add_job(scrape_new_urls, args=[diff.added], next_run_time=datetime.now(),
+                           misfire_grace_time=None)
+
+def watch_config():
+    """Sondeo de products.yml; corre en su propio hilo para no esperar al ciclo de scraping."""
+    try:
+        _config_watcher.poll()
+    except Exception as e:
+        logger.error(f"Error recargando la configuración: {e}")
+
+
+if __name__ == '__main__':
+    # Un solo hilo ejecuta todos los ciclos: el navegador persistente de
+    # playwright.sync_api no puede usarse desde otro hilo
+    scheduler = _scheduler = BackgroundScheduler(executors={
+        'default': ThreadPoolExecutor(max_workers=1),
+        # Heartbeat y recarga de configuración: no esperan a que termine un ciclo
+        'background': ThreadPoolExecutor(max_workers=1),
+    })
+    # Programar la ejecución cada hora, empezando ya mismo. Para probar, puedes cambiar 'hours=1' a 'minutes=5' o 'seconds=30'.
+    # Con programación adaptativa las pasadas son más frecuentes pero cada una revisa sólo lo pendiente.
+    if ADAPTIVE_SCHEDULE:
+        scheduler.add_job(scrape_all_products, 'interval', minutes=SCHEDULE_TICK_MINUTES, next_run_time=datetime.now())
+        logger.info(f"Scheduler iniciado. Revisando URLs pendientes cada {SCHEDULE_TICK_MINUTES} minutos.")
+    else:
+        scheduler.add_job(scrape_all_products, 'interval', hours=1, next_run_time=datetime.now())
+        logger.info("Scheduler iniciado. El scraper se ejecutará cada hora.")
+    if CONFIG_WATCH:
+        _config_watcher = ConfigWatcher(CONFIG_PATH, read_config, on_change=apply_config_change)
+        _config_watcher.prime()
+        scheduler.add_job(watch_config, 'interval', seconds=POLL_SECONDS, executor='background')
+        logger.info(f"Recarga de {CONFIG_PATH.name} activa (cada {POLL_SECONDS:g}s).")
+    if COORDINATION:
+        # El heartbeat renueva los leases aunque un ciclo de scraping tarde más que el lease
+        scheduler.add_job(heartbeat, 'interval', seconds=HEARTBEAT_SECONDS, executor='background')
+        logger.info(f"Coordinación multi-nodo activa: {get_coordinator().summary()}")
+    if METRICS_PORT:
+        # Prometheus consulta al daemon directamente
+        start_http_exporter(METRICS_PORT)
     scheduler.start()
     
-    logger.info("Scheduler iniciado. El scraper se ejecutará cada hora.")
     logger.info("Presiona Ctrl+C para salir.")
 
     try:
@@ -88,5 +276,9 @@ if __name__ == '__main__':
         while True:
             time.sleep(2)
     except (KeyboardInterrupt, SystemExit):
+        # Espera al ciclo en curso; Chromium termina junto con el driver de Playwright al salir
         scheduler.shutdown()
+        if _coordinator:
+            # Otro nodo toma los shards sin esperar a que venzan los leases
+            _coordinator.leave()
         logger.info("Scheduler detenido.")
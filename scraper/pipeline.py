@@ -0,0 +1,398 @@
+"""
+Motor de scraping por etapas, unidas por colas acotadas.
+
+En AsyncScrapeEngine cada URL hace todo el recorrido (descarga, extracción,
+lecturas de BD, guardado y alerta) dentro de la misma tarea, y mientras se
+espera a PostgreSQL o a Telegram la página del pool queda ocupada sin usar
+la red. Acá cada etapa es un grupo de tareas con su propia concurrencia:
+
+    navegación -> extracción -> evaluación -> persistencia -> alertas
+
+- navegación: una tarea por página del pool. Toma URLs de la DomainWorkQueue
+  (rate limit y circuit breaker) y descarga el HTML por HTTP; si el
+  adaptador no soporta HTML estático usa la página, que ya extrae el precio
+  (y se salta la extracción).
+- extracción: parsea el HTML en un hilo. Si falla, la URL vuelve a la
+  navegación, por el navegador, dentro del mismo intento.
+- evaluación: lee el último precio y el histórico y decide la alerta
+  (evaluate_price de track.py).
+- persistencia: guarda el precio; ahí la URL queda terminada (checkpoint,
+  estadísticas, circuit breaker).
+- alertas: envía por Telegram.
+
+Las colas acotadas dan la contrapresión: si la BD o Telegram se ponen
+lentos sus colas se llenan, las etapas anteriores esperan al encolar y la
+navegación deja de tomar URLs, en vez de acumular páginas en memoria.
+
+La profundidad de cada cola y el tiempo ocupado de cada etapa se publican
+en shared/utils/metrics.py y se resumen en el log al final de la corrida.
+
+Uso:
+    python track.py --concurrency 8 --pipeline
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+from shared.utils.database import PriceDatabase
+from shared.utils.snapshots import get_snapshot_session
+from shared.utils.timing import STAGE_BROWSER, STAGE_DB_WRITE, STAGE_HTML_PARSE, STAGE_TOTAL, record_stage, span, timed_url
+from shared.utils.metrics import (
+    BROWSER_PAGES_IN_USE, PIPELINE_BLOCKED_SECONDS, PIPELINE_BUSY_SECONDS, PIPELINE_QUEUE_DEPTH,
+    PIPELINE_UTILIZATION, record_attempt
+)
+from scraper.stats import PATH_BROWSER, PATH_HTTP
+from scraper.work_queue import WorkItem
+from scraper.engine import AsyncScrapeEngine
+from scraper.track import (
+    PriceAlert, dispatch_alert, evaluate_price, fetch_page_html, get_adapter_for_url, http_path_available
+)
+
+logger = logging.getLogger(__name__)
+
+# Etapas del pipeline
+NAVIGATION = 'navigation'
+EXTRACTION = 'extraction'
+EVALUATION = 'evaluation'
+PERSISTENCE = 'persistence'
+ALERTS = 'alerts'
+
+# Tareas por etapa (la navegación usa una por página del pool). La extracción
+# es CPU en hilos: más de 2 sólo compiten por el GIL
+STAGE_WORKERS = {
+    EXTRACTION: int(os.getenv('SCRAPER_PIPELINE_EXTRACT_WORKERS', '2')),
+    EVALUATION: int(os.getenv('SCRAPER_PIPELINE_EVALUATE_WORKERS', '2')),
+    PERSISTENCE: int(os.getenv('SCRAPER_PIPELINE_PERSIST_WORKERS', '2')),
+    ALERTS: int(os.getenv('SCRAPER_PIPELINE_ALERT_WORKERS', '1')),
+}
+
+# URLs que puede acumular la cola de cada etapa (0 = tantas como páginas del pool)
+QUEUE_SIZE = int(os.getenv('SCRAPER_PIPELINE_QUEUE_SIZE', '0'))
+
+@dataclass
+class Job:
+    """Una URL en tránsito por el pipeline."""
+    item: WorkItem
+    started: float = field(default_factory=time.perf_counter)
+    adapter: Optional[object] = None
+    html: Optional[str] = None
+    extracted: Optional[Tuple[str, float, Optional[float]]] = None
+    path: str = PATH_HTTP
+    # El HTML estático no alcanzó: la navegación la repite con el navegador
+    needs_browser: bool = False
+    alert: Optional[PriceAlert] = None
+
+    @property
+    def url(self) -> str:
+        return self.item.url
+
+    @property
+    def label(self) -> str:
+        return f"{self.item.url_info['product_name']} en {self.item.url_info['store_name']}"
+
+class StageMonitor:
+    """
+    Profundidad de las colas y tiempo ocupado de cada etapa.
+
+    Sólo se usa desde el event loop, así que no necesita lock.
+    """
+
+    def __init__(self, workers: Dict[str, int]):
+        self.workers = dict(workers)
+        self.busy_seconds: Dict[str, float] = defaultdict(float)
+        self.blocked_seconds: Dict[str, float] = defaultdict(float)
+        self.processed: Dict[str, int] = defaultdict(int)
+        self.max_depth: Dict[str, int] = defaultdict(int)
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @contextmanager
+    def busy(self, stage: str) -> Iterator[None]:
+        """Mide el trabajo de una tarea de la etapa (sin contar la espera por la cola siguiente)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.busy_seconds[stage] += seconds
+            self.processed[stage] += 1
+            PIPELINE_BUSY_SECONDS.labels(stage=stage).inc(seconds)
+
+    def blocked(self, stage: str, seconds: float) -> None:
+        """Registra cuánto esperó la etapa a que hubiera lugar en la cola siguiente."""
+        self.blocked_seconds[stage] += seconds
+        PIPELINE_BLOCKED_SECONDS.labels(stage=stage).inc(seconds)
+
+    def depth(self, stage: str, depth: int) -> None:
+        """Registra la profundidad actual de la cola de entrada de la etapa."""
+        self.max_depth[stage] = max(self.max_depth[stage], depth)
+        PIPELINE_QUEUE_DEPTH.labels(stage=stage).set(depth)
+
+    def utilization(self, stage: str) -> float:
+        """Fracción del tiempo de la corrida en que las tareas de la etapa estuvieron trabajando."""
+        capacity = self.workers.get(stage, 1) * self.elapsed
+        return self.busy_seconds[stage] / capacity if capacity > 0 else 0.0
+
+    def finish(self) -> "StageMonitor":
+        """Marca el fin de la corrida y publica la utilización de cada etapa."""
+        self.finished_at = time.perf_counter()
+        for stage in self.workers:
+            PIPELINE_UTILIZATION.labels(stage=stage).set(self.utilization(stage))
+        return self
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Tareas, URLs procesadas, utilización, segundos bloqueada y cola máxima por etapa."""
+        return {
+            stage: {
+                'workers': workers,
+                'processed': self.processed[stage],
+                'utilization': self.utilization(stage),
+                'blocked_s': self.blocked_seconds[stage],
+                'max_queue': self.max_depth[stage],
+            }
+            for stage, workers in self.workers.items()
+        }
+
+    def summary(self) -> str:
+        """Tabla por etapa para el log."""
+        lines = [f"{'etapa':<13}{'tareas':>7}{'URLs':>7}{'uso %':>8}{'bloq. s':>9}{'cola máx':>10}"]
+        for stage, s in self.report().items():
+            lines.append(
+                f"{stage:<13}{s['workers']:>7}{s['processed']:>7}{s['utilization'] * 100:>8.1f}"
+                f"{s['blocked_s']:>9.1f}{s['max_queue']:>10}"
+            )
+        return "Pipeline por etapas:\n" + "\n".join(lines)
+
+class PipelineEngine(AsyncScrapeEngine):
+    """Motor asíncrono con una etapa por paso del procesamiento y colas acotadas entre ellas."""
+
+    def __init__(self, db: PriceDatabase, concurrency: int = 4,
+                 stage_workers: Optional[Dict[str, int]] = None,
+                 queue_size: Optional[int] = None, **kwargs):
+        super().__init__(db, concurrency=concurrency, **kwargs)
+        workers = {**STAGE_WORKERS, **(stage_workers or {})}
+        self.stage_workers = {stage: max(1, count) for stage, count in workers.items()}
+        self.queue_size = max(1, queue_size or QUEUE_SIZE or self.concurrency)
+        self.monitor = StageMonitor({NAVIGATION: self.concurrency, **self.stage_workers})
+        self._queues: Dict[str, "asyncio.Queue[Job]"] = {}
+        self._fallback: "asyncio.Queue[Job]" = asyncio.Queue()
+
+    async def _process_all(self) -> None:
+        """Arranca las etapas y navega con una tarea por página hasta terminar todas las URLs."""
+        self.monitor = StageMonitor({NAVIGATION: self.concurrency, **self.stage_workers})
+        self._queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in self.stage_workers}
+        self._fallback = asyncio.Queue()
+
+        handlers = {
+            EXTRACTION: self._extract,
+            EVALUATION: self._evaluate,
+            PERSISTENCE: self._persist,
+            ALERTS: self._send_alert,
+        }
+        consumers = [
+            asyncio.create_task(self._consume(stage, handlers[stage]))
+            for stage, count in self.stage_workers.items()
+            for _ in range(count)
+        ]
+
+        try:
+            await asyncio.gather(*(self._navigate() for _ in range(self.concurrency)))
+            # Todas las URLs quedaron terminadas, pero una tarea de persistencia puede
+            # estar todavía encolando su alerta: se vacían las colas en orden
+            for queue in self._queues.values():
+                await queue.join()
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            self.monitor.finish()
+            logger.info(self.monitor.summary())
+
+    async def _next_job(self) -> Optional[Job]:
+        """
+        Próxima URL para la navegación: primero las que vuelven de la extracción
+        para ir por el navegador (ya están en curso), después las de la cola.
+
+        Retorna None cuando no queda nada pendiente ni en curso.
+        """
+        while True:
+            if not self._fallback.empty():
+                return self._fallback.get_nowait()
+
+            item, wait = self._queue.next_ready()
+            if item:
+                self._in_flight += 1
+                return Job(item)
+            if not len(self._queue) and not self._in_flight:
+                return None
+
+            # Una URL que vuelve de la extracción no espera al rate limit de otro dominio
+            try:
+                return await asyncio.wait_for(self._fallback.get(), timeout=wait or 0.05)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _navigate(self) -> None:
+        """Etapa de navegación: toma una página del pool y descarga URLs hasta vaciar la cola."""
+        page = await self._pages.get()
+        try:
+            while (job := await self._next_job()) is not None:
+                if not job.needs_browser:
+                    logger.info(f"Procesando: {job.label} (intento {job.item.attempt}/{self.max_retries})")
+
+                with self.monitor.busy(NAVIGATION):
+                    BROWSER_PAGES_IN_USE.inc()
+                    try:
+                        next_stage = await self._fetch(page, job)
+                    finally:
+                        BROWSER_PAGES_IN_USE.dec()
+
+                if next_stage:
+                    await self._put(NAVIGATION, next_stage, job)
+                else:
+                    await self._finish(job, ok=False)
+        finally:
+            self._pages.put_nowait(page)
+
+    async def _fetch(self, page, job: Job) -> Optional[str]:
+        """
+        Descarga la URL por HTTP o extrae el precio con el navegador.
+
+        Returns:
+            La etapa que sigue (extracción o evaluación), o None si el intento falló
+        """
+        adapter = job.adapter or get_adapter_for_url(job.url)
+        if not adapter:
+            return None
+
+        if not hasattr(adapter, 'get_price_async'):
+            logger.error(f"El adaptador {adapter.__name__} no soporta el motor asíncrono")
+            return None
+        job.adapter = adapter
+
+        try:
+            with timed_url(self.stats.timings, job.url, total=False):
+                if not job.needs_browser and http_path_available(adapter):
+                    try:
+                        job.html = await asyncio.to_thread(fetch_page_html, job.url)
+                        return EXTRACTION
+                    except Exception as e:
+                        logger.info(f"Camino HTTP no disponible para {job.url}, se usará el navegador: {e}")
+
+                with span(STAGE_BROWSER):
+                    job.extracted = await adapter.get_price_async(page, job.url)
+                job.path = PATH_BROWSER
+
+                if get_snapshot_session():
+                    await get_snapshot_session().flush_async(page)
+            return EVALUATION
+
+        except Exception as e:
+            logger.warning(f"Intento falló para {job.label}: {e}")
+            return None
+
+    async def _extract(self, job: Job) -> None:
+        """Etapa de extracción: parsea el HTML descargado."""
+        with self.monitor.busy(EXTRACTION):
+            try:
+                with timed_url(self.stats.timings, job.url, total=False), span(STAGE_HTML_PARSE):
+                    job.extracted = await asyncio.to_thread(job.adapter.get_price_from_html, job.html, job.url)
+            except Exception as e:
+                logger.info(f"Camino HTTP no disponible para {job.url}, se usará el navegador: {e}")
+                job.needs_browser = True
+            # El HTML ya no hace falta: no retenerlo mientras la URL espera en otras colas
+            job.html = None
+
+        if job.needs_browser:
+            # Sin pasar por la DomainWorkQueue: es el mismo intento, ya despachado
+            self._fallback.put_nowait(job)
+        else:
+            await self._put(EXTRACTION, EVALUATION, job)
+
+    async def _evaluate(self, job: Job) -> None:
+        """Etapa de evaluación: compara con el histórico y decide la alerta."""
+        with self.monitor.busy(EVALUATION):
+            try:
+                with timed_url(self.stats.timings, job.url, total=False):
+                    job.alert = await asyncio.to_thread(
+                        evaluate_price, self.db, job.item.url_info, *job.extracted
+                    )
+                failed = False
+            except Exception as e:
+                logger.warning(f"Intento falló para {job.label}: {e}")
+                failed = True
+
+        if failed:
+            await self._finish(job, ok=False)
+        else:
+            await self._put(EVALUATION, PERSISTENCE, job)
+
+    async def _persist(self, job: Job) -> None:
+        """Etapa de persistencia: guarda el precio y cierra la URL."""
+        with self.monitor.busy(PERSISTENCE):
+            try:
+                extracted_name, official_price, discounted_price = job.extracted
+                with timed_url(self.stats.timings, job.url, total=False), span(STAGE_DB_WRITE):
+                    await asyncio.to_thread(
+                        self.db.save_price, job.url, extracted_name, official_price, discounted_price
+                    )
+                ok = True
+            except Exception as e:
+                logger.warning(f"Intento falló para {job.label}: {e}")
+                ok = False
+
+        # Guardado antes de alertar, como en handle_extracted_price
+        await self._finish(job, ok)
+        if ok:
+            logger.info(f"Producto procesado exitosamente: {job.label}")
+            if job.alert:
+                await self._put(PERSISTENCE, ALERTS, job)
+
+    async def _send_alert(self, job: Job) -> None:
+        """Etapa de alertas: envía la alerta por Telegram."""
+        with self.monitor.busy(ALERTS):
+            try:
+                with timed_url(self.stats.timings, job.url, total=False):
+                    await asyncio.to_thread(dispatch_alert, job.alert)
+            except Exception as e:
+                logger.error(f"Error enviando la alerta de {job.url}: {e}")
+
+    async def _consume(self, stage: str, handler) -> None:
+        """Tarea de una etapa: procesa lo que llega a su cola hasta ser cancelada."""
+        queue = self._queues[stage]
+        while True:
+            job = await queue.get()
+            self.monitor.depth(stage, queue.qsize())
+            try:
+                await handler(job)
+            except Exception as e:
+                logger.error(f"Error inesperado en la etapa {stage} para {job.url}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _put(self, source: str, stage: str, job: Job) -> None:
+        """Encola en la etapa siguiente; si está llena, la etapa `source` espera (contrapresión)."""
+        queue = self._queues[stage]
+        started = time.perf_counter()
+        await queue.put(job)
+        self.monitor.blocked(source, time.perf_counter() - started)
+        self.monitor.depth(stage, queue.qsize())
+
+    async def _finish(self, job: Job, ok: bool) -> None:
+        """Cierra el intento de la URL: tiempo total, métricas, estadísticas y reintento o checkpoint."""
+        record_stage(self.stats.timings, job.url, STAGE_TOTAL, time.perf_counter() - job.started)
+        record_attempt(job.url, ok=ok)
+        if ok:
+            self.stats.record_path(job.url, job.path)
+        await self._complete(job.item, ok)
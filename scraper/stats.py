@@ -0,0 +1,68 @@
+"""
+Estadísticas de corridas de scraping, comunes a todos los modos de ejecución.
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from shared.utils.timing import RunTimings
+
+# Caminos por los que se puede obtener un precio
+PATH_HTTP = 'http'
+PATH_BROWSER = 'browser'
+
+@dataclass
+class RunStats:
+    """Estadísticas de una corrida de scraping."""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    # URLs que dejaron de corresponder a mitad de la corrida (otro nodo o quitadas de products.yml)
+    handed_off: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    paths: Counter = field(default_factory=Counter)
+    url_paths: Dict[str, str] = field(default_factory=dict)
+    # Cambios de estado de los circuit breakers ("dominio: closed -> open (t+12s)")
+    breaker_transitions: List[str] = field(default_factory=list)
+    # Tiempos por etapa de cada URL (ver shared/utils/timing.py)
+    timings: RunTimings = field(default_factory=RunTimings)
+
+    @property
+    def elapsed(self) -> float:
+        """Segundos transcurridos desde el inicio de la corrida."""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def urls_per_minute(self) -> float:
+        """Throughput de la corrida en URLs procesadas por minuto."""
+        if self.elapsed <= 0:
+            return 0.0
+        return (self.succeeded + self.failed) / self.elapsed * 60
+
+    def record_path(self, url: str, path: str) -> None:
+        """Registra por qué camino (HTTP o navegador) se obtuvo el precio de una URL."""
+        self.paths[path] += 1
+        self.url_paths[url] = path
+
+    def finish(self) -> "RunStats":
+        """Marca el fin de la corrida."""
+        self.finished_at = time.monotonic()
+        return self
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        text = (
+            f"Throughput: {self.urls_per_minute:.1f} URLs/min "
+            f"({self.succeeded} OK, {self.failed} fallidas de {self.total} en {self.elapsed:.1f}s)"
+        )
+        if self.handed_off:
+            text += f" - {self.handed_off} omitidas por cambios de asignación o configuración"
+        if self.paths:
+            text += " - caminos: " + ", ".join(f"{path}={count}" for path, count in self.paths.most_common())
+        if self.breaker_transitions:
+            text += " - circuit breakers: " + "; ".join(self.breaker_transitions)
+        return text
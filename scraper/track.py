@@ -11,17 +11,25 @@ Este script:
 
 Uso:
     python track.py
+    python track.py --concurrency 8   # Motor asíncrono con 8 URLs en paralelo
+    python track.py --concurrency 8 --pipeline  # Ídem, por etapas con colas acotadas
+    python track.py --workers 4       # 4 procesos, cada uno con su navegador
+    python track.py --resume          # Retomar la última corrida interrumpida
+    python track.py --record          # Grabar snapshots de las páginas scrapeadas
+    python track.py --replay          # Scrapear offline desde los snapshots
 
-Variables de entorno requeridas:
+Variables de entorno requeridas (salvo con --replay, que no envía alertas):
     TG_TOKEN: Token del bot de Telegram
     TG_CHAT_ID: ID del chat donde enviar alertas
 """
 
 import os
 import sys
+import time
 import logging
+import argparse
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import yaml
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright, Browser, Page
@@ -32,9 +40,26 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from shared.utils.database import PriceDatabase
+from shared.utils.database import InMemoryPriceDatabase, PriceDatabase
 from shared.utils.alert import send_price_alert_sync
-from shared.adapters import alkosto
+from shared.adapters.registry import get_adapter
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.resource_blocker import BlockingProfile, ResourceBlocker
+from shared.utils.http_client import fetch_html
+from shared.utils.selector_cache import get_selector_cache
+from shared.utils.readiness import get_readiness_tracker
+from shared.utils.config_cache import ConfigEntry, changed_products, content_hash, get_config_cache, product_hash
+from scraper.stats import RunStats, PATH_HTTP, PATH_BROWSER
+from scraper.work_queue import DomainWorkQueue
+from shared.utils.circuit_breaker import DomainCircuitBreaker
+from shared.utils.checkpoint import RunCheckpoint
+from shared.utils.coordination import LeaseLostError
+from shared.utils.snapshots import MODE_RECORD, MODE_REPLAY, configure_snapshots, get_snapshot_session
+from shared.utils.metrics import export_metrics, record_attempt, record_run
+from shared.utils.timing import (
+    PERSIST_TIMINGS, STAGE_ALERT, STAGE_BROWSER, STAGE_DB_READ, STAGE_DB_WRITE, STAGE_HTML_PARSE,
+    STAGE_HTTP_FETCH, persist_timings, span, timed_url
+)
 
 # Configurar logging
 def setup_logging():
@@ -65,39 +90,63 @@ def setup_logging():
 
 logger = logging.getLogger(__name__)
 
-def load_config() -> List[Dict]:
-    """Carga la configuración de productos desde el archivo YAML."""
-    config_path = Path(__file__).parent.parent / "shared" / "config" / "products.yml"
+# Configuración común del navegador
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+VIEWPORT = {"width": 1280, "height": 720}
+
+CONFIG_PATH = Path(__file__).parent.parent / "shared" / "config" / "products.yml"
+
+# Reintentos por URL (intentos totales, incluyendo el primero)
+MAX_RETRIES = int(os.getenv('SCRAPER_RETRIES', '3'))
+
+# Intentar primero el HTML del servidor y usar el navegador sólo si falla
+HTTP_FIRST = os.getenv('SCRAPER_HTTP_FIRST', '1').lower() not in ('0', 'false', 'no')
+
+def _read_config_file() -> Dict:
+    """Lee products.yml y retorna su contenido. Sale del proceso si no puede leerlo."""
+    return _load_config_entry().config
+
+def _flatten_config(config: Dict) -> List[Dict]:
+    """Aplana la estructura jerárquica de productos en una lista de URLs para el procesamiento."""
+    urls_to_process = []
+    for product in config.get('products') or []:
+        for presentation in product['presentations']:
+            for store in presentation['stores']:
+                urls_to_process.append({
+                    'url': store['url'],
+                    'product_name': product['name'],
+                    'alias': product['alias'],
+                    'store_name': store['name'],
+                    'presentation_size': presentation['size'],
+                    'unit_count': presentation['unit_count']
+                })
+    return urls_to_process
+
+def _parse_config_entry() -> ConfigEntry:
+    """
+    Lee products.yml ya parseado y aplanado.
+    
+    Si el contenido del archivo no cambió (mismo hash) se usa el caché en vez
+    de volver a parsear el YAML.
+    """
+    raw = CONFIG_PATH.read_bytes()
+    digest = content_hash(raw)
+    cache = get_config_cache()
     
-    if not config_path.exists():
-        logger.error(f"Archivo de configuración no encontrado: {config_path}")
+    entry = cache.get(digest)
+    if entry is None:
+        config = yaml.safe_load(raw) or {}
+        entry = cache.put(digest, config, _flatten_config(config))
+    return entry
+
+def _load_config_entry() -> ConfigEntry:
+    """Como _parse_config_entry, pero sale del proceso si no puede leer la configuración."""
+    if not CONFIG_PATH.exists():
+        logger.error(f"Archivo de configuración no encontrado: {CONFIG_PATH}")
         sys.exit(1)
     
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        
-        if not config or 'products' not in config:
-            logger.warning("No hay productos configurados")
-            return []
-        
-        # Aplanar la estructura jerárquica para el procesamiento
-        urls_to_process = []
-        for product in config['products']:
-            for presentation in product['presentations']:
-                for store in presentation['stores']:
-                    urls_to_process.append({
-                        'url': store['url'],
-                        'product_name': product['name'],
-                        'alias': product['alias'],
-                        'store_name': store['name'],
-                        'presentation_size': presentation['size'],
-                        'unit_count': presentation['unit_count']
-                    })
-        
-        logger.info(f"Cargadas {len(urls_to_process)} URLs para monitorear de {len(config['products'])} productos")
-        return config['products'], urls_to_process
-        
+        return _parse_config_entry()
     except yaml.YAMLError as e:
         logger.error(f"Error leyendo configuración YAML: {e}")
         sys.exit(1)
@@ -105,24 +154,208 @@ def load_config() -> List[Dict]:
         logger.error(f"Error cargando configuración: {e}")
         sys.exit(1)
 
+def load_config() -> Tuple[List[Dict], List[Dict]]:
+    """Carga la configuración de productos desde el archivo YAML (o del caché si no cambió)."""
+    entry = _load_config_entry()
+    
+    if 'products' not in entry.config:
+        logger.warning("No hay productos configurados")
+        return [], []
+    
+    # Copia: los llamadores pueden filtrar o modificar la lista
+    urls_to_process = list(entry.urls)
+    logger.info(f"Cargadas {len(urls_to_process)} URLs para monitorear de {len(entry.config['products'])} productos")
+    return entry.config['products'], urls_to_process
+
+def read_config() -> Tuple[List[Dict], List[Dict]]:
+    """
+    Como load_config, pero lanza la excepción en vez de salir del proceso.
+    
+    Lo usa el daemon al recargar products.yml: un archivo a medio editar no
+    debe tumbar el proceso.
+    """
+    entry = _parse_config_entry()
+    return entry.config.get('products') or [], list(entry.urls)
+
+def replaying() -> bool:
+    """True si el proceso reproduce snapshots (--replay o SCRAPER_SNAPSHOTS=replay)."""
+    snapshots = get_snapshot_session()
+    return bool(snapshots and snapshots.replaying)
+
+def open_database():
+    """
+    BD de la corrida: PostgreSQL o, al reproducir snapshots, una en memoria
+    que se descarta al terminar (los precios reproducidos no son observaciones reales).
+    """
+    if replaying():
+        return InMemoryPriceDatabase()
+    return PriceDatabase()
+
+def sync_changed_catalog(db: PriceDatabase, product_configs: List[Dict]) -> None:
+    """
+    Reconcilia en la BD sólo los productos cuya configuración cambió.
+    
+    Compara el hash de cada producto con el registrado en la última
+    sincronización; si ninguno cambió no se toca la jerarquía.
+    """
+    changed = changed_products(product_configs, db.get_catalog_hashes())
+    if not changed:
+        logger.info(f"Catálogo sin cambios ({len(product_configs)} productos), se omite la sincronización")
+        return
+    
+    logger.info(f"Sincronizando {len(changed)} de {len(product_configs)} productos con cambios")
+    db.sync_catalog(changed, hashes={p['alias']: product_hash(p) for p in changed})
+
+def load_rate_limiter(scale: float = 1.0) -> DomainRateLimiter:
+    """
+    Construye el limitador por dominio desde la sección `rate_limits` de products.yml.
+    
+    Args:
+        scale: Factor sobre las tasas configuradas (1/N si N procesos comparten dominios)
+    """
+    return DomainRateLimiter.from_config(_read_config_file().get('rate_limits'), scale=scale)
+
+def read_rate_limits() -> Optional[Dict]:
+    """
+    Sección `rate_limits` de products.yml. Como read_config, lanza la
+    excepción en vez de salir del proceso.
+    """
+    return _parse_config_entry().config.get('rate_limits')
+
+def create_resource_blocker() -> Optional[ResourceBlocker]:
+    """
+    Crea el bloqueador de recursos según el BLOCKING_PROFILE de cada adaptador.
+    
+    Se desactiva con SCRAPER_BLOCK_RESOURCES=0 (útil para comparar ancho de banda y latencia).
+    """
+    if os.getenv('SCRAPER_BLOCK_RESOURCES', '1').lower() in ('0', 'false', 'no'):
+        return None
+    return ResourceBlocker(lambda url: BlockingProfile.from_adapter(get_adapter_for_url(url)))
+
+def save_learned_state() -> None:
+    """Persiste el caché de selectores y los tiempos hasta el precio, y los resume en el log."""
+    cache = get_selector_cache()
+    cache.save()
+    logger.info(cache.summary())
+    tracker = get_readiness_tracker()
+    tracker.save()
+    logger.info(tracker.summary())
+
+def report_timings(db: PriceDatabase, stats: RunStats, run_id: Optional[int] = None,
+                   log_summary: bool = True) -> None:
+    """Registra en el log los tiempos por etapa de la corrida y los guarda en la BD."""
+    if not len(stats.timings):
+        return
+    
+    if log_summary:
+        logger.info(stats.timings.summary())
+    if not PERSIST_TIMINGS or replaying():
+        return
+    try:
+        rows = persist_timings(db, stats.timings, run_id)
+        logger.debug(f"{rows} tiempos por etapa guardados")
+    except Exception as e:
+        # Los tiempos son diagnóstico: no deben hacer fallar la corrida
+        logger.warning(f"No se pudieron guardar los tiempos por etapa: {e}")
+
+def retry_delay(attempt: int) -> float:
+    """Segundos de espera antes del reintento que sigue al intento `attempt` (backoff exponencial)."""
+    return float(2 ** attempt)
+
 def get_adapter_for_url(url: str):
-    """Determina qué adaptador usar según la URL."""
-    domain = urlparse(url).netloc.lower()
+    """Determina qué adaptador usar según el dominio de la URL (ver shared/adapters/registry.py)."""
+    adapter = get_adapter(url)
+    if adapter is None:
+        logger.error(f"No hay adaptador disponible para: {urlparse(url).netloc.lower()}")
+    return adapter
+
+def http_path_available(adapter) -> bool:
+    """True si el precio se puede intentar sacar del HTML estático, sin navegador."""
+    return HTTP_FIRST and hasattr(adapter, 'get_price_from_html')
+
+def fetch_page_html(url: str) -> str:
+    """Descarga el HTML de la URL (o lo toma del store de snapshots)."""
+    with span(STAGE_HTTP_FETCH):
+        snapshots = get_snapshot_session()
+        return snapshots.fetch_html(url, fetch_html) if snapshots else fetch_html(url)
+
+def fetch_price_http(adapter, url: str) -> Optional[Tuple[str, float, Optional[float]]]:
+    """
+    Intenta extraer el precio con una petición HTTP simple, sin navegador.
     
-    if 'alkosto.com' in domain:
-        return alkosto
-    else:
-        logger.error(f"No hay adaptador disponible para: {domain}")
+    Returns:
+        La tupla del adaptador, o None si el adaptador no soporta HTML estático,
+        el camino está desactivado o la extracción falló
+    """
+    if not http_path_available(adapter):
+        return None
+    
+    try:
+        html = fetch_page_html(url)
+        with span(STAGE_HTML_PARSE):
+            return adapter.get_price_from_html(html, url)
+    except Exception as e:
+        logger.info(f"Camino HTTP no disponible para {url}, se usará el navegador: {e}")
         return None
 
-def process_product(page: Page, db: PriceDatabase, url_info: Dict) -> None:
+class LazyPage:
+    """Abre el navegador y la página sólo cuando alguna URL los necesita."""
+    
+    def __init__(self, playwright, blocker: Optional[ResourceBlocker] = None):
+        self._playwright = playwright
+        self._blocker = blocker
+        self._browser: Optional[Browser] = None
+        self._page: Optional[Page] = None
+    
+    def get(self) -> Page:
+        """Retorna la página, lanzando el navegador la primera vez."""
+        if self._page is None:
+            logger.info("Iniciando navegador...")
+            self._browser = self._playwright.chromium.launch(headless=True)
+            self._page = self._browser.new_page()
+            
+            # Configurar página
+            self._page.set_viewport_size(VIEWPORT)
+            self._page.set_extra_http_headers({
+                "User-Agent": USER_AGENT
+            })
+            
+            if self._blocker:
+                self._blocker.install(self._page)
+            
+            snapshots = get_snapshot_session()
+            if snapshots:
+                snapshots.install(self._page)
+        return self._page
+    
+    def close(self) -> None:
+        """Cierra el navegador si llegó a abrirse."""
+        if self._browser:
+            self._browser.close()
+
+def process_product(page: Page, db: PriceDatabase, url_info: Dict, max_retries: int = MAX_RETRIES,
+                    stats: Optional[RunStats] = None) -> bool:
     """
     Procesa un producto individual: extrae precio, compara y alerta.
     
+    Primero intenta el camino HTTP (sin navegador) y sólo usa la página de
+    Playwright si ese camino no está disponible o falla.
+    
     Args:
-        page: Página de Playwright para scraping
+        page: Página de Playwright para scraping (o un LazyPage / BrowserPool)
         db: Instancia de base de datos
         url_info: Diccionario con información de la URL a procesar
+        max_retries: Intentos en el lugar; con 1 los reintentos quedan a cargo
+                     del llamador (ver run_sequential)
+        stats: Si se pasa, registra por qué camino se obtuvo el precio y el
+               tiempo de cada etapa
+    
+    Returns:
+        True si el precio se extrajo y guardó, False en caso contrario
+    
+    Raises:
+        LeaseLostError: el shard de la URL pasó a otro nodo al guardar (ver
+                        FencedDatabase); no es una falla de la tienda
     """
     url = url_info['url']
     product_name = url_info['product_name']
@@ -133,88 +366,314 @@ def process_product(page: Page, db: PriceDatabase, url_info: Dict) -> None:
     # Obtener adaptador apropiado
     adapter = get_adapter_for_url(url)
     if not adapter:
-        return
+        return False
     
     retry_count = 0
-    max_retries = 3
     
     while retry_count < max_retries:
         try:
-            # Extraer información del producto
-            extracted_name, official_price, discounted_price = adapter.get_price(page, url)
-            
-            # Obtener último precio oficial de la BD
-            last_official_price = db.get_last_price(url)
-            
-            # Obtener histórico completo para comparar con el precio más bajo
-            historical_prices = db.get_price_history(url, limit=50)  # Últimas 50 mediciones
-            
-            # Determinar si hay que alertar
-            should_alert = False
-            alert_reason = ""
-            
-            # Condición 1A: Precio oficial bajó ≥ 10% respecto al último precio registrado
-            if last_official_price and official_price < last_official_price:
-                discount_percent = (last_official_price - official_price) / last_official_price
-                if discount_percent >= 0.10:
-                    should_alert = True
-                    alert_reason = f"Precio oficial bajó {discount_percent*100:.1f}% desde ${last_official_price:,.0f}"
-            
-            # Condición 1B: Precio actual es el más bajo histórico registrado
-            if historical_prices and not should_alert:  # Solo si no alertamos ya
-                min_historical_price = min(official_price for _, official_price, _, _, _ in historical_prices if official_price)
-                if official_price < min_historical_price:
-                    improvement_percent = ((min_historical_price - official_price) / min_historical_price) * 100
-                    should_alert = True
-                    alert_reason = f"¡PRECIO HISTÓRICO MÁS BAJO! Mejoró {improvement_percent:.1f}% desde el mínimo anterior ${min_historical_price:,.0f}"
-                    logger.info(f"Precio histórico más bajo detectado: {extracted_name} - ${min_historical_price:,.0f} → ${official_price:,.0f}")
-            
-            # Condición 2: Hay precio con descuento REAL (oferta promocional)
-            if discounted_price and discounted_price < official_price:
-                if not should_alert:  # Solo si no alertamos ya por la otra condición
-                    should_alert = True
-                    discount_percent = ((official_price - discounted_price) / official_price) * 100
-                    alert_reason = f"Oferta promocional detectada: {discount_percent:.1f}% descuento (${official_price:,.0f} → ${discounted_price:,.0f})"
-            elif discounted_price and discounted_price >= official_price:
-                logger.info(f"Precio 'tachado' encontrado pero no es descuento real: ${discounted_price:,.0f} >= ${official_price:,.0f}")
-            
-            # Enviar alerta si corresponde
-            if should_alert:
-                logger.info(f"Enviando alerta: {product_name} en {store_name} - {alert_reason}")
-                # Usar el precio efectivo (con descuento si existe, sino el oficial)
-                effective_price = discounted_price if discounted_price else official_price
-                reference_price = last_official_price if last_official_price else official_price
-                send_price_alert_sync(f"{product_name} ({store_name})", reference_price, effective_price, url)
-            
-            # Guardar precio en BD
-            db.save_price(url, extracted_name, official_price, discounted_price)
+            with timed_url(stats.timings if stats else None, url):
+                # Extraer información del producto: primero sin navegador
+                extracted = fetch_price_http(adapter, url)
+                path = PATH_HTTP
+                
+                if extracted is None:
+                    with span(STAGE_BROWSER):
+                        # LazyPage / BrowserPool entregan la página bajo demanda
+                        browser_page = page.get() if hasattr(page, 'get') else page
+                        extracted = adapter.get_price(browser_page, url)
+                    path = PATH_BROWSER
+                    
+                    snapshots = get_snapshot_session()
+                    if snapshots:
+                        snapshots.flush(browser_page)
+                
+                extracted_name, official_price, discounted_price = extracted
+                handle_extracted_price(db, url_info, extracted_name, official_price, discounted_price)
             
-            logger.info(f"Producto procesado exitosamente: {product_name} en {store_name}")
-            break
+            record_attempt(url, ok=True)
+            if stats:
+                stats.record_path(url, path)
+            return True
             
+        except LeaseLostError:
+            # Lo scrapea el nodo dueño del shard: no se reintenta ni cuenta como falla
+            raise
         except Exception as e:
+            record_attempt(url, ok=False)
             retry_count += 1
             logger.warning(f"Intento {retry_count}/{max_retries} falló para {product_name} en {store_name}: {e}")
             
             if retry_count >= max_retries:
-                logger.error(f"Error procesando {product_name} en {store_name} después de {max_retries} intentos: {e}")
+                if max_retries > 1:
+                    logger.error(f"Error procesando {product_name} en {store_name} después de {max_retries} intentos: {e}")
             else:
                 # Esperar antes del siguiente intento
-                import time
-                time.sleep(2 ** retry_count)  # Backoff exponencial
+                time.sleep(retry_delay(retry_count))  # Backoff exponencial
+    
+    return False
+
+class PriceAlert(NamedTuple):
+    """Alerta decidida por evaluate_price, pendiente de envío."""
+    product: str
+    reference_price: float
+    effective_price: float
+    url: str
+    reason: str
+
+def handle_extracted_price(db: PriceDatabase, url_info: Dict, extracted_name: str,
+                           official_price: float, discounted_price: Optional[float]) -> None:
+    """
+    Compara el precio extraído con el histórico, lo guarda y alerta si corresponde.
+    
+    Es la parte del procesamiento que no depende del navegador, compartida por
+    el modo secuencial y por el motor asíncrono. El pipeline (scraper/pipeline.py)
+    ejecuta cada paso en su propia etapa.
+    """
+    alert = evaluate_price(db, url_info, extracted_name, official_price, discounted_price)
+    
+    # Guardar precio en BD (antes de alertar: con varios nodos, un nodo que
+    # perdió el lease del shard no llega a enviar la alerta)
+    with span(STAGE_DB_WRITE):
+        db.save_price(url_info['url'], extracted_name, official_price, discounted_price)
+    
+    if alert:
+        dispatch_alert(alert)
+    
+    logger.info(f"Producto procesado exitosamente: {url_info['product_name']} en {url_info['store_name']}")
+
+def evaluate_price(db: PriceDatabase, url_info: Dict, extracted_name: str,
+                   official_price: float, discounted_price: Optional[float]) -> Optional[PriceAlert]:
+    """
+    Decide si el precio extraído amerita una alerta, comparándolo con el histórico.
+    
+    Returns:
+        La alerta a enviar, o None
+    """
+    url = url_info['url']
+    product_name = url_info['product_name']
+    store_name = url_info['store_name']
+    
+    with span(STAGE_DB_READ):
+        # Obtener último precio oficial de la BD
+        last_official_price = db.get_last_price(url)
+        
+        # Obtener histórico completo para comparar con el precio más bajo
+        historical_prices = db.get_price_history(url, limit=50)  # Últimas 50 mediciones
+    
+    # Determinar si hay que alertar
+    should_alert = False
+    alert_reason = ""
+    
+    # Condición 1A: Precio oficial bajó ≥ 10% respecto al último precio registrado
+    if last_official_price and official_price < last_official_price:
+        discount_percent = (last_official_price - official_price) / last_official_price
+        if discount_percent >= 0.10:
+            should_alert = True
+            alert_reason = f"Precio oficial bajó {discount_percent*100:.1f}% desde ${last_official_price:,.0f}"
+    
+    # Condición 1B: Precio actual es el más bajo histórico registrado
+    if historical_prices and not should_alert:  # Solo si no alertamos ya
+        min_historical_price = min(official_price for _, official_price, _, _, _ in historical_prices if official_price)
+        if official_price < min_historical_price:
+            improvement_percent = ((min_historical_price - official_price) / min_historical_price) * 100
+            should_alert = True
+            alert_reason = f"¡PRECIO HISTÓRICO MÁS BAJO! Mejoró {improvement_percent:.1f}% desde el mínimo anterior ${min_historical_price:,.0f}"
+            logger.info(f"Precio histórico más bajo detectado: {extracted_name} - ${min_historical_price:,.0f} → ${official_price:,.0f}")
+    
+    # Condición 2: Hay precio con descuento REAL (oferta promocional)
+    if discounted_price and discounted_price < official_price:
+        if not should_alert:  # Solo si no alertamos ya por la otra condición
+            should_alert = True
+            discount_percent = ((official_price - discounted_price) / official_price) * 100
+            alert_reason = f"Oferta promocional detectada: {discount_percent:.1f}% descuento (${official_price:,.0f} → ${discounted_price:,.0f})"
+    elif discounted_price and discounted_price >= official_price:
+        logger.info(f"Precio 'tachado' encontrado pero no es descuento real: ${discounted_price:,.0f} >= ${official_price:,.0f}")
+    
+    if not should_alert:
+        return None
+    
+    # Usar el precio efectivo (con descuento si existe, sino el oficial)
+    effective_price = discounted_price if discounted_price else official_price
+    reference_price = last_official_price if last_official_price else official_price
+    return PriceAlert(f"{product_name} ({store_name})", reference_price, effective_price, url, alert_reason)
+
+def dispatch_alert(alert: PriceAlert) -> None:
+    """Envía la alerta por Telegram (al reproducir snapshots sólo la registra)."""
+    if replaying():
+        logger.info(f"Alerta no enviada (replay): {alert.product} - {alert.reason}")
+        return
+    logger.info(f"Enviando alerta: {alert.product} - {alert.reason}")
+    with span(STAGE_ALERT):
+        send_price_alert_sync(alert.product, alert.reference_price, alert.effective_price, alert.url)
+
+def finish_queue(queue: DomainWorkQueue, stats: RunStats) -> RunStats:
+    """Cuenta como fallidas las URLs descartadas por el circuit breaker y cierra las estadísticas."""
+    for item in queue.skipped:
+        logger.error(f"URL descartada (dominio caído): {item.url}")
+    stats.failed += len(queue.skipped)
+    if queue.breaker:
+        stats.breaker_transitions = [str(t) for t in queue.breaker.transitions]
+    return stats.finish()
+
+def run_queue(db: PriceDatabase, urls_to_process: List[Dict], page,
+              limiter: Optional[DomainRateLimiter] = None,
+              keep: Optional[Callable[[str], bool]] = None,
+              checkpoint: Optional[RunCheckpoint] = None) -> RunStats:
+    """
+    Procesa las URLs una a la vez sobre una única página (Page, LazyPage o BrowserPool).
+    
+    El orden lo decide una DomainWorkQueue: cada URL espera sólo al rate limit
+    de su dominio, los reintentos se difieren en vez de dormir en el lugar y
+    un circuit breaker por dominio aparta a las tiendas que fallan seguido.
+    
+    Con `keep` se saltan las URLs que dejaron de corresponder durante la
+    corrida: su shard pasó a otro nodo (ver shared/utils/coordination.py) o
+    se quitaron de products.yml (ver scraper/config_watcher.py).
+    
+    Con `checkpoint` se registra el resultado final de cada URL para poder
+    reanudar la corrida si el proceso muere (ver --resume).
+    """
+    stats = RunStats(total=len(urls_to_process))
+    queue = DomainWorkQueue(limiter or load_rate_limiter(), breaker=DomainCircuitBreaker())
+    queue.add_all(urls_to_process)
+    done = 0
+    
+    # Procesar cada URL (el rate limit reemplaza la pausa fija entre productos)
+    while (item := queue.next()) is not None:
+        if keep and not keep(item.url):
+            logger.info(f"URL omitida, ya no le corresponde a este nodo: {item.url}")
+            queue.release(item)
+            stats.handed_off += 1
+            done += 1
+            continue
+        
+        logger.info(f"Procesando URL {done + 1}/{len(urls_to_process)} (intento {item.attempt}/{MAX_RETRIES})")
+        
+        try:
+            ok = process_product(page, db, item.url_info, max_retries=1, stats=stats)
+        except LeaseLostError as e:
+            # Perdió el lease a mitad de la corrida: sin falla para el breaker ni reintento
+            logger.info(f"URL entregada a otro nodo: {e}")
+            queue.release(item)
+            stats.handed_off += 1
+            done += 1
+            continue
+        queue.record_result(item, ok)
+        
+        if ok:
+            stats.succeeded += 1
+            done += 1
+        elif item.attempt < MAX_RETRIES:
+            queue.add(item.url_info, attempt=item.attempt + 1, delay=retry_delay(item.attempt))
+            continue
+        else:
+            logger.error(f"Se agotaron los {MAX_RETRIES} intentos para {item.url}")
+            stats.failed += 1
+            done += 1
+        
+        if checkpoint:
+            checkpoint.mark(item.url, ok)
+    
+    return finish_queue(queue, stats)
 
-def main():
+def run_sequential(db: PriceDatabase, urls_to_process: List[Dict],
+                   limiter: Optional[DomainRateLimiter] = None,
+                   checkpoint: Optional[RunCheckpoint] = None) -> RunStats:
+    """Procesa las URLs una a la vez con un único navegador (lanzado a demanda) y una única página."""
+    blocker = create_resource_blocker()
+    
+    # Inicializar Playwright (el navegador se lanza sólo si alguna URL lo necesita)
+    with sync_playwright() as p:
+        page = LazyPage(p, blocker)
+        
+        try:
+            stats = run_queue(db, urls_to_process, page, limiter, checkpoint=checkpoint)
+        finally:
+            page.close()
+    
+    if blocker:
+        logger.info(blocker.stats.summary())
+    save_learned_state()
+    
+    return stats
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Monitoreo de precios")
+    parser.add_argument(
+        "--concurrency", type=int,
+        default=int(os.getenv('SCRAPER_CONCURRENCY', '1')),
+        help="URLs a procesar en paralelo (1 = modo secuencial clásico)"
+    )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        default=os.getenv('SCRAPER_PIPELINE', '0').lower() in ('1', 'true', 'yes'),
+        help="Con --concurrency > 1, procesar por etapas unidas por colas acotadas (ver scraper/pipeline.py)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Retomar la última corrida interrumpida (sólo sus URLs pendientes); si no hay, corrida normal"
+    )
+    snapshots = parser.add_mutually_exclusive_group()
+    snapshots.add_argument(
+        "--record", action="store_true",
+        help="Grabar el HTML y las respuestas XHR de cada URL en el store de snapshots"
+    )
+    snapshots.add_argument(
+        "--replay", action="store_true",
+        help="Scrapear sin red, desde los snapshots grabados (para benchmarks reproducibles)"
+    )
+    parser.add_argument(
+        "--snapshot-dir", type=Path, default=None,
+        help="Directorio del store de snapshots (por defecto SCRAPER_SNAPSHOT_DIR o db/snapshots)"
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        default=int(os.getenv('SCRAPER_WORKERS', '1')),
+        help="Procesos en paralelo, cada uno con su propio navegador (1 = un solo proceso)"
+    )
+    parser.add_argument(
+        "--due-only", action="store_true",
+        help="Procesar sólo las URLs que toca revisar según la volatilidad de su precio"
+    )
+    parser.add_argument(
+        "--enqueue", action="store_true",
+        help="Encolar las URLs en la cola durable en lugar de procesarlas (ver scraper/worker.py)"
+    )
+    args = parser.parse_args(argv)
+    if args.replay and (args.resume or args.enqueue):
+        # La BD de una corrida reproducida es descartable: no hay corrida ni cola que usar
+        parser.error("--replay no se puede combinar con --resume ni --enqueue")
+    return args
+
+def main(argv: Optional[List[str]] = None):
     """Función principal del script."""
+    args = parse_args(argv)
+    
     # Cargar variables de entorno
     load_dotenv()
     
     # Configurar logging
     setup_logging()
     
+    if args.record or args.replay:
+        mode = MODE_RECORD if args.record else MODE_REPLAY
+        # Por entorno también, para que lo hereden los procesos de --workers
+        os.environ['SCRAPER_SNAPSHOTS'] = mode
+        if args.snapshot_dir:
+            os.environ['SCRAPER_SNAPSHOT_DIR'] = str(args.snapshot_dir)
+        configure_snapshots(mode, args.snapshot_dir)
+        logger.info(f"Snapshots: modo {mode}")
+    
+    if args.pipeline:
+        # Por entorno, para que lo hereden los procesos de --workers
+        os.environ['SCRAPER_PIPELINE'] = '1'
+    
     logger.info("=== Iniciando monitoreo de precios ===")
     
-    # Verificar variables de entorno
-    if not os.getenv('TG_TOKEN') or not os.getenv('TG_CHAT_ID'):
+    # Verificar variables de entorno (con --replay no se envían alertas)
+    if not replaying() and (not os.getenv('TG_TOKEN') or not os.getenv('TG_CHAT_ID')):
         logger.error("Variables TG_TOKEN y TG_CHAT_ID son requeridas")
         sys.exit(1)
     
@@ -227,40 +686,74 @@ def main():
     # Crear directorio de BD si no existe
     Path("db").mkdir(exist_ok=True)
     
-    # Inicializar base de datos
-    db = PriceDatabase()
+    # Inicializar base de datos (en memoria con --replay)
+    db = open_database()
     
-    # Configurar jerarquía de productos en la BD
-    for product_config in product_configs:
-        db.setup_product_hierarchy(product_config)
+    # Configurar jerarquía de productos en la BD (sólo los productos que cambiaron)
+    sync_changed_catalog(db, product_configs)
     
-    # Inicializar Playwright
-    with sync_playwright() as p:
-        logger.info("Iniciando navegador...")
-        browser: Browser = p.chromium.launch(headless=True)
+    checkpoint = None
+    if args.resume and not args.enqueue:
+        # La lista de la corrida interrumpida ya estaba decidida: no se vuelve a filtrar
+        checkpoint, pending = RunCheckpoint.resume(db, urls_to_process)
+        if checkpoint:
+            urls_to_process = pending
+            if not urls_to_process:
+                checkpoint.finish()
+                logger.info("La corrida interrumpida no tenía URLs pendientes")
+                return
+        else:
+            logger.info("No hay corrida interrumpida para retomar: corrida normal")
+    
+    if args.due_only and not checkpoint:
+        from scraper.adaptive_schedule import AdaptiveScheduler, default_daily_budget
         
-        try:
-            page: Page = browser.new_page()
-            
-            # Configurar página
-            page.set_viewport_size({"width": 1280, "height": 720})
-            page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            })
-            
-            # Procesar cada URL
-            for i, url_info in enumerate(urls_to_process, 1):
-                logger.info(f"Procesando URL {i}/{len(urls_to_process)}")
-                process_product(page, db, url_info)
-                
-                # Pequeña pausa entre productos para no sobrecargar
-                if i < len(urls_to_process):
-                    import time
-                    time.sleep(2)
-            
-        finally:
-            browser.close()
+        # Presupuesto por defecto: lo mismo que revisar todo dos veces al día
+        scheduler = AdaptiveScheduler(db, default_daily_budget(len(urls_to_process), baseline_per_day=2))
+        urls_to_process = scheduler.due(urls_to_process)
+        if not urls_to_process:
+            logger.info("Ninguna URL pendiente según la programación adaptativa")
+            return
+    
+    if args.enqueue:
+        from shared.utils.task_queue import open_task_queue
+        
+        # Los workers de scraper/worker.py las procesan
+        queue = open_task_queue(db)
+        inserted = queue.enqueue(urls_to_process)
+        logger.info(f"{inserted} URLs encoladas ({len(urls_to_process) - inserted} ya estaban en cola). {queue.summary()}")
+        return
+    
+    # Checkpoint por URL: si el proceso muere, --resume sigue desde acá.
+    # Una corrida reproducida no se registra: no hay nada que retomar
+    if not replaying():
+        checkpoint = checkpoint or RunCheckpoint.start(db, urls_to_process)
+    run_id = checkpoint.run_id if checkpoint else None
+    
+    if args.workers > 1:
+        # Varios procesos, cada uno con su propio navegador y su parte de las URLs
+        from scraper.workers import run_sharded
+        
+        stats = run_sharded(urls_to_process, workers=args.workers, concurrency=args.concurrency,
+                            run_id=run_id)
+    elif args.concurrency > 1:
+        # Motor asíncrono: varias URLs en paralelo sobre un pool de páginas
+        from scraper.engine import run_engine
+        
+        stats = run_engine(db, urls_to_process, concurrency=args.concurrency, checkpoint=checkpoint,
+                           pipeline=args.pipeline)
+    else:
+        stats = run_sequential(db, urls_to_process, checkpoint=checkpoint)
     
+    if checkpoint:
+        checkpoint.finish()
+        logger.info(checkpoint.summary())
+    report_timings(db, stats, run_id)
+    record_run(stats)
+    export_metrics()
+    if get_snapshot_session():
+        logger.info(get_snapshot_session().summary())
+    logger.info(stats.summary())
     logger.info("=== Monitoreo completado ===")
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+"""
+Cola de trabajo por dominio con reintentos diferidos.
+
+Reemplaza las pausas fijas: cada URL espera sólo al token bucket de su
+propio dominio, y un reintento se programa para más adelante en lugar de
+dormir en el lugar, así que mientras tanto se sigue trabajando en las URLs
+de otros dominios.
+
+Con un DomainCircuitBreaker, las URLs de un dominio con el breaker abierto
+también se difieren, y si el dominio se da por caído se descartan (quedan
+en `skipped` para que el llamador las cuente como fallidas).
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from shared.utils.domains import normalize_domain
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.circuit_breaker import DomainCircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WorkItem:
+    """Una URL pendiente y el número de intento que le toca."""
+    url_info: Dict
+    attempt: int = 1
+
+    @property
+    def url(self) -> str:
+        return self.url_info['url']
+
+@dataclass(order=True)
+class _Delayed:
+    ready_at: float
+    seq: int
+    item: WorkItem = field(compare=False)
+
+class DomainWorkQueue:
+    """Cola con una fila por dominio, respetando el rate limit de cada uno."""
+
+    def __init__(self, limiter: DomainRateLimiter, clock: Callable[[], float] = time.monotonic,
+                 breaker: Optional[DomainCircuitBreaker] = None):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.skipped: List[WorkItem] = []
+        self._clock = clock
+        self._ready: "OrderedDict[str, Deque[WorkItem]]" = OrderedDict()
+        self._delayed: List[_Delayed] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._ready.values()) + len(self._delayed)
+
+    def add(self, url_info: Dict, attempt: int = 1, delay: float = 0.0) -> None:
+        """Agrega una URL; con `delay` > 0 queda diferida ese número de segundos."""
+        item = WorkItem(url_info, attempt)
+        if delay > 0:
+            heapq.heappush(self._delayed, _Delayed(self._clock() + delay, next(self._seq), item))
+        else:
+            self._ready.setdefault(normalize_domain(item.url), deque()).append(item)
+
+    def add_all(self, urls_to_process: List[Dict]) -> None:
+        """Agrega una lista de URLs como primeros intentos."""
+        for url_info in urls_to_process:
+            self.add(url_info)
+
+    def _promote_delayed(self) -> None:
+        now = self._clock()
+        while self._delayed and self._delayed[0].ready_at <= now:
+            item = heapq.heappop(self._delayed).item
+            self._ready.setdefault(normalize_domain(item.url), deque()).append(item)
+
+    def next_ready(self) -> Tuple[Optional[WorkItem], float]:
+        """
+        Retorna la próxima URL lista sin bloquear.
+
+        Recorre los dominios en round-robin y toma la primera URL cuyo dominio
+        tenga el breaker cerrado (o en prueba) y token disponible.
+
+        Returns:
+            (item, 0.0) si hay una URL lista; (None, espera) si no, donde
+            `espera` es el mínimo de segundos hasta que algo pueda estar listo
+        """
+        self._promote_delayed()
+        wait = float('inf')
+
+        for domain in list(self._ready):
+            items = self._ready[domain]
+            if not items:
+                del self._ready[domain]
+                continue
+
+            if self.breaker:
+                if self.breaker.is_dead(items[0].url):
+                    logger.error(f"Dominio {domain} caído: se descartan {len(items)} URLs pendientes")
+                    self.skipped.extend(items)
+                    del self._ready[domain]
+                    continue
+                breaker_wait = self.breaker.retry_after(items[0].url)
+                if breaker_wait > 0:
+                    wait = min(wait, breaker_wait)
+                    continue
+
+            domain_wait = self.limiter.try_acquire(items[0].url)
+            if domain_wait == 0:
+                item = items.popleft()
+                if self.breaker:
+                    self.breaker.on_dispatch(item.url)
+                # Rotar: el dominio atendido pasa al final
+                self._ready.move_to_end(domain)
+                if not items:
+                    del self._ready[domain]
+                return item, 0.0
+            wait = min(wait, domain_wait)
+
+        if self._delayed:
+            wait = min(wait, max(0.0, self._delayed[0].ready_at - self._clock()))
+
+        return None, (0.0 if wait == float('inf') else wait)
+
+    def record_result(self, item: WorkItem, ok: bool) -> None:
+        """Informa al circuit breaker el resultado de un intento."""
+        if not self.breaker:
+            return
+        if ok:
+            self.breaker.record_success(item.url)
+        else:
+            self.breaker.record_failure(item.url)
+
+    def release(self, item: WorkItem) -> None:
+        """Cierra un intento que no dice nada del dominio (la URL pasó a otro nodo o se quitó)."""
+        if self.breaker:
+            self.breaker.release(item.url)
+
+    def next(self) -> Optional[WorkItem]:
+        """Retorna la próxima URL, durmiendo lo necesario. None cuando la cola queda vacía."""
+        while len(self):
+            item, wait = self.next_ready()
+            if item:
+                return item
+            time.sleep(wait)
+        return None
+
+    async def next_async(self) -> Optional[WorkItem]:
+        """Como next(), pero esperando sin bloquear el event loop."""
+        while len(self):
+            item, wait = self.next_ready()
+            if item:
+                return item
+            await asyncio.sleep(wait)
+        return None
@@ -0,0 +1,135 @@
+"""
+Worker de la cola durable de tareas de scraping.
+
+Toma URLs de `scrape_tasks` (ver shared/utils/task_queue.py), las procesa
+con el navegador lanzado a demanda y marca cada tarea como terminada o
+fallida. Se pueden correr tantos workers como se quiera, en la misma máquina
+o en varias: la cola reparte las tareas y los leases vencidos se retoman.
+
+Uso:
+    python scraper/track.py --enqueue        # encolar las URLs de products.yml
+    python scraper/worker.py                 # procesar la cola (queda esperando más tareas)
+    python scraper/worker.py --exit-when-empty
+"""
+
+import os
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from playwright.sync_api import sync_playwright
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shared.utils.database import PriceDatabase
+from shared.utils.task_queue import TaskQueue, open_task_queue, LEASE_SECONDS
+from scraper.stats import RunStats
+from scraper.track import (
+    LazyPage, create_resource_blocker, load_rate_limiter, process_product,
+    report_timings, retry_delay, save_learned_state, setup_logging
+)
+from shared.utils.metrics import export_metrics
+from shared.utils.timing import RunTimings
+
+logger = logging.getLogger(__name__)
+
+# Segundos de espera cuando la cola está vacía
+POLL_SECONDS = float(os.getenv('SCRAPER_WORKER_POLL_SECONDS', '10'))
+
+class _StopFlag:
+    """Se activa con SIGTERM/SIGINT: el worker termina la tarea en curso y sale."""
+
+    def __init__(self):
+        self.stopping = False
+
+    def __call__(self, signum, frame):
+        logger.info(f"Señal {signum} recibida, terminando tras la tarea en curso...")
+        self.stopping = True
+
+def run_worker(queue: TaskQueue, db: PriceDatabase, worker_id: str, batch: int = 1,
+               exit_when_empty: bool = False, stop: Optional[_StopFlag] = None) -> RunStats:
+    """
+    Procesa tareas de la cola hasta que se vacíe (con `exit_when_empty`) o hasta recibir una señal.
+    """
+    stop = stop or _StopFlag()
+    stats = RunStats()
+    limiter = load_rate_limiter()
+    blocker = create_resource_blocker()
+
+    with sync_playwright() as p:
+        page = LazyPage(p, blocker)
+
+        try:
+            while not stop.stopping:
+                # El lease cubre todo el lote
+                tasks = queue.claim(worker_id, limit=batch, lease_seconds=LEASE_SECONDS * batch)
+                if not tasks:
+                    if exit_when_empty:
+                        break
+                    time.sleep(POLL_SECONDS)
+                    continue
+
+                for task in tasks:
+                    stats.total += 1
+                    limiter.acquire(task.url)
+                    logger.info(f"Tarea {task.id}: {task.url} (intento {task.attempts}/{task.max_attempts})")
+
+                    if process_product(page, db, task.url_info, max_retries=1, stats=stats):
+                        queue.complete(task, worker_id)
+                        stats.succeeded += 1
+                    else:
+                        queue.fail(task, worker_id, "no se pudo extraer el precio",
+                                   retry_delay=retry_delay(task.attempts))
+                        if task.is_last_attempt:
+                            logger.error(f"Tarea {task.id} agotó sus {task.max_attempts} intentos: {task.url}")
+                            stats.failed += 1
+
+                # Tiempos por lote: el worker puede correr indefinidamente
+                report_timings(db, stats, log_summary=False)
+                stats.timings = RunTimings()
+                export_metrics()
+        finally:
+            page.close()
+
+    if blocker:
+        logger.info(blocker.stats.summary())
+    save_learned_state()
+    return stats.finish()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Worker de la cola de scraping")
+    parser.add_argument("--batch", type=int, default=1, help="Tareas a tomar por vez")
+    parser.add_argument("--exit-when-empty", action="store_true", help="Salir cuando no queden tareas")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    """Función principal del worker."""
+    args = parse_args(argv)
+    load_dotenv()
+    setup_logging()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = _StopFlag()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    db = PriceDatabase()
+    queue = open_task_queue(db)
+    logger.info(f"=== Worker {worker_id} iniciado === {queue.summary()}")
+
+    stats = run_worker(queue, db, worker_id, batch=max(1, args.batch),
+                       exit_when_empty=args.exit_when_empty, stop=stop)
+
+    logger.info(stats.summary())
+    logger.info(f"=== Worker {worker_id} detenido === {queue.summary()}")
+
+if __name__ == "__main__":
+    main()
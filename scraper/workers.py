@@ -0,0 +1,149 @@
+"""
+Ejecución en varios procesos: reparte las URLs entre workers.
+
+Cada worker es un proceso independiente con su propio navegador y su
+propia conexión a la BD, de modo que el renderizado de Chromium y el
+parseo en Python aprovechan todos los núcleos. El proceso padre reparte
+las URLs, espera a los workers y consolida un resumen por worker.
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from scraper.stats import RunStats
+from shared.utils.metrics import merge as merge_metrics, snapshot as snapshot_metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WorkerSummary:
+    """Resultado de un worker, serializable para volver al proceso padre."""
+    worker_id: int
+    pid: int
+    total: int
+    succeeded: int
+    failed: int
+    elapsed: float
+    error: Optional[str] = None
+    paths: Dict[str, int] = field(default_factory=dict)
+    breaker_transitions: List[str] = field(default_factory=list)
+    # Muestras de shared/utils/timing.py: el proceso padre las resume y las guarda
+    timings: List[tuple] = field(default_factory=list)
+    # Contadores e histogramas de shared/utils/metrics.py del proceso worker
+    metrics: Dict[str, Dict] = field(default_factory=dict)
+
+    @property
+    def urls_per_minute(self) -> float:
+        """Throughput del worker en URLs por minuto."""
+        if self.elapsed <= 0:
+            return 0.0
+        return (self.succeeded + self.failed) / self.elapsed * 60
+
+def split_shards(urls_to_process: List[Dict], workers: int) -> List[List[Dict]]:
+    """
+    Reparte las URLs en `workers` partes de tamaño similar.
+
+    Se reparte de forma intercalada para que las URLs de una misma tienda
+    (que suelen estar juntas en products.yml) no caigan todas en el mismo worker.
+    """
+    workers = max(1, min(workers, len(urls_to_process)))
+    return [urls_to_process[i::workers] for i in range(workers)]
+
+def _run_shard(worker_id: int, shard: List[Dict], concurrency: int, rate_scale: float,
+               run_id: Optional[int] = None) -> WorkerSummary:
+    """Punto de entrada de cada proceso worker."""
+    from dotenv import load_dotenv
+    from shared.utils.checkpoint import RunCheckpoint
+    from scraper.track import setup_logging, run_sequential, load_rate_limiter, open_database
+
+    load_dotenv()
+    setup_logging()
+    logger.info(f"Worker {worker_id} (pid {os.getpid()}) iniciado con {len(shard)} URLs")
+
+    try:
+        # Hereda SCRAPER_SNAPSHOTS: con --replay, una BD en memoria propia del worker
+        db = open_database()
+        # Cada worker tiene sus propios buckets: se reparte la tasa de cada dominio
+        limiter = load_rate_limiter(scale=rate_scale)
+        # Los workers marcan sus URLs en la corrida que registró el proceso principal
+        checkpoint = RunCheckpoint(db, run_id) if run_id is not None else None
+
+        if concurrency > 1:
+            from scraper.engine import run_engine
+            stats = run_engine(db, shard, concurrency=concurrency, limiter=limiter, checkpoint=checkpoint)
+        else:
+            stats = run_sequential(db, shard, limiter=limiter, checkpoint=checkpoint)
+
+        return WorkerSummary(
+            worker_id=worker_id, pid=os.getpid(), total=stats.total,
+            succeeded=stats.succeeded, failed=stats.failed, elapsed=stats.elapsed,
+            paths=dict(stats.paths), breaker_transitions=stats.breaker_transitions,
+            timings=stats.timings.samples, metrics=snapshot_metrics()
+        )
+    except Exception as e:
+        logger.error(f"Worker {worker_id} falló: {e}")
+        return WorkerSummary(
+            worker_id=worker_id, pid=os.getpid(), total=len(shard),
+            succeeded=0, failed=len(shard), elapsed=0.0, error=str(e)
+        )
+
+def run_sharded(urls_to_process: List[Dict], workers: int, concurrency: int = 1,
+                run_id: Optional[int] = None) -> RunStats:
+    """
+    Procesa las URLs repartidas entre `workers` procesos.
+
+    Args:
+        urls_to_process: Lista aplanada de URLs de load_config()
+        workers: Número de procesos
+        concurrency: URLs en paralelo dentro de cada proceso (motor asíncrono si > 1)
+        run_id: Corrida de shared/utils/checkpoint.py donde registrar cada URL
+
+    Returns:
+        Estadísticas consolidadas de todos los workers
+    """
+    stats = RunStats(total=len(urls_to_process))
+    shards = split_shards(urls_to_process, workers)
+    logger.info(f"Repartiendo {len(urls_to_process)} URLs entre {len(shards)} workers")
+
+    # spawn: Playwright no tolera bien heredar hilos/estado vía fork
+    mp_context = multiprocessing.get_context("spawn")
+    summaries: List[WorkerSummary] = []
+
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=mp_context) as executor:
+        futures = {
+            executor.submit(_run_shard, worker_id, shard, concurrency, 1 / len(shards), run_id): worker_id
+            for worker_id, shard in enumerate(shards, 1)
+        }
+
+        for future in as_completed(futures):
+            worker_id = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                # El proceso murió sin poder reportar (p. ej. crash del intérprete)
+                shard_size = len(shards[worker_id - 1])
+                summary = WorkerSummary(
+                    worker_id=worker_id, pid=0, total=shard_size,
+                    succeeded=0, failed=shard_size, elapsed=0.0, error=str(e)
+                )
+            summaries.append(summary)
+
+    for summary in sorted(summaries, key=lambda s: s.worker_id):
+        status = f"ERROR: {summary.error}" if summary.error else "OK"
+        logger.info(
+            f"Worker {summary.worker_id} (pid {summary.pid}): {summary.succeeded}/{summary.total} OK, "
+            f"{summary.failed} fallidas, {summary.elapsed:.1f}s, {summary.urls_per_minute:.1f} URLs/min - {status}"
+        )
+        stats.succeeded += summary.succeeded
+        stats.failed += summary.failed
+        stats.paths.update(summary.paths)
+        stats.breaker_transitions.extend(f"worker {summary.worker_id}: {t}" for t in summary.breaker_transitions)
+        stats.timings.extend(summary.timings)
+        # Las métricas se exportan desde el proceso padre, con las de todos los workers
+        merge_metrics(summary.metrics)
+
+    return stats.finish()
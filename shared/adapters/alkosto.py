@@ -24,13 +24,131 @@ Adaptador para extraer preci        # Extraer nombre del producto
         return product_name, official_price, discounted_pricecom.
 """
 
-import re
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Page as AsyncPage
+
+from shared.adapters.html_extract import make_soup
+from shared.adapters.page_texts import PageTexts, collect_page_texts, collect_page_texts_async
+from shared.adapters.price_parser import parse_price, first_price
+from shared.utils.selector_cache import get_selector_cache
+from shared.utils.readiness import navigate, navigate_async
+from shared.adapters.structured_data import extract_product
+from shared.utils.timing import STAGE_EXTRACT, STAGE_NAVIGATE, STAGE_SELECTOR_WAIT, span
 
 logger = logging.getLogger(__name__)
 
+# Nombre del adaptador (clave en el caché de selectores)
+ADAPTER_NAME = 'alkosto'
+
+# Recursos que no hacen falta para leer el precio (ver shared/utils/resource_blocker.py).
+# Las hojas de estilo se dejan pasar: wait_for_selector espera elementos visibles.
+BLOCKING_PROFILE = {
+    'resource_types': ['image', 'media', 'font'],
+    'blocked_hosts': [
+        'google-analytics.com',
+        'googletagmanager.com',
+        'doubleclick.net',
+        'googleadservices.com',
+        'googlesyndication.com',
+        'facebook.net',
+        'facebook.com',
+        'hotjar.com',
+        'clarity.ms',
+        'tiktok.com',
+        'criteo.com',
+        'criteo.net',
+        'bing.com',
+    ],
+}
+
+# Cascadas de selectores CSS, de la más específica a la más genérica
+NAME_SELECTORS = [
+    # Selector específico basado en estructura actual de Alkosto
+    'main > section:first-child > div:first-child > div:first-child > div:first-child > h1',
+    'main section:first-child h1',  # Versión más flexible
+    'main h1',  # Aún más flexible
+    # Selectores genéricos como respaldo
+    'h1[data-testid="product-title"]',
+    'h1.product-title',
+    'h1[class*="title"]',
+    '.product-name h1',
+    'h1'
+]
+
+CURRENT_PRICE_SELECTORS = [
+    # Selector específico encontrado en la página actual de Alkosto
+    '#js-original_price',
+    # Selectores específicos basados en estructura actual de Alkosto (respaldo)
+    '.session-price',
+    '.session-price-padding', 
+    '.price-block',
+    '.new-container__main-product__pdp-features__pdp_price',
+    '.product__details-section__price',
+    # Selectores genéricos como respaldo
+    '[data-testid="price-current"]',
+    '.price-current',
+    '.current-price',
+    '[class*="price"][class*="current"]',
+    '.price .current',
+    '.product-price .current',
+    # Selectores más amplios para capturar precios
+    '[class*="price"]',
+    '.price'
+]
+
+OLD_PRICE_SELECTORS = [
+    # Selector específico encontrado en la página actual de Alkosto
+    '#js-original_price_old span',  # Precio anterior
+    '#js-original_price_old',       # Contenedor del precio anterior
+    # Nota: El % de descuento está en '#js-original_price_old div'
+    # Selectores genéricos como respaldo
+    '[data-testid="price-old"]',
+    '.price-old',
+    '.old-price',
+    '[class*="price"][class*="old"]',
+    '[class*="price"][class*="previous"]',
+    '.price .strikethrough',
+    '.price .line-through',
+    'del',
+    's'
+]
+
+# Cascadas por campo: se leen todas en un solo viaje al navegador (ver page_texts.py)
+SELECTOR_CASCADES = {
+    'name': NAME_SELECTORS,
+    'current_price': CURRENT_PRICE_SELECTORS,
+    'old_price': OLD_PRICE_SELECTORS,
+}
+
+# Página lista: DOMContentLoaded + el primer selector de precio propio de Alkosto
+# (ver shared/utils/readiness.py). Los genéricos como '[class*="price"]'
+# coinciden con esqueletos de carga, así que no sirven de señal.
+READINESS = {
+    'selectors': CURRENT_PRICE_SELECTORS[:6],
+}
+
+# Campos cuyo selector ganador aprende el caché (el precio tachado suele no existir)
+CACHED_FIELDS = ('name', 'current_price')
+
+# Selectores propios de Alkosto al principio de cada cascada: sólo éstos se
+# reordenan con lo aprendido. Los genéricos también coinciden con otros
+# elementos (precios de productos relacionados), así que van siempre detrás.
+SPECIFIC_SELECTORS = {
+    'name': 3,
+    'current_price': 6,
+    'old_price': 2,
+}
+
+# Cascadas para el HTML del servidor: sólo los selectores propios de Alkosto.
+# Si el precio se renderiza con JS su elemento llega vacío y un genérico
+# tomaría el precio de otro producto; sin coincidencia se usa el navegador.
+STATIC_CASCADES = {
+    name: selectors[:SPECIFIC_SELECTORS[name]] for name, selectors in SELECTOR_CASCADES.items()
+}
+
+
 def get_price(page: Page, url: str) -> Tuple[str, float, Optional[float]]:
     """
     Extrae información de precio de una página de Alkosto.
@@ -49,32 +167,169 @@ def get_price(page: Page, url: str) -> Tuple[str, float, Optional[float]]:
     logger.info(f"Extrayendo precio de: {url}")
     
     try:
-        # Navegar a la página
-        page.goto(url, wait_until="networkidle", timeout=30000)
+        # Navegar hasta que el precio esté en la página
+        with span(STAGE_NAVIGATE):
+            navigate(page, url, READINESS)
         
-        # Extraer nombre del producto
-        product_name = _extract_product_name(page)
+        # Datos estructurados y todas las cascadas en un solo viaje al navegador
+        with span(STAGE_EXTRACT):
+            texts = collect_page_texts(page, _cascades())
         
-        # Extraer precio actual mostrado
-        current_displayed_price = _extract_current_price(page)
+        try:
+            result = _prices_from_texts(texts)
+        except ValueError as e:
+            # El DOM aún no tiene el dato: cascada clásica, que espera a los selectores
+            logger.debug(f"Extracción en lote incompleta ({e}), usando la cascada con esperas")
+            with span(STAGE_SELECTOR_WAIT):
+                product_name = _extract_product_name(page)
+                current_displayed_price = _extract_current_price(page)
+                old_tachado_price = _extract_old_price(page)
+            return _resolve_prices(product_name, current_displayed_price, old_tachado_price)
         
-        # Extraer precio tachado (si existe)
-        old_tachado_price = _extract_old_price(page)
+        _record_selector_hits(texts)
+        return result
         
-        # Aplicar la nueva lógica:
-        # Si hay precio tachado, ese es el oficial y el actual es el descuento
-        # Si no hay precio tachado, el actual es el oficial
-        if old_tachado_price:
-            official_price = old_tachado_price
-            discounted_price = current_displayed_price
-            logger.info(f"Producto con descuento: {product_name}")
-            logger.info(f"Precio oficial: ${official_price:,.0f}, Con descuento: ${discounted_price:,.0f}")
-        else:
-            official_price = current_displayed_price
-            discounted_price = None
-            logger.info(f"Producto sin descuento: {product_name} - ${official_price:,.0f}")
+    except PlaywrightTimeoutError:
+        logger.error(f"Timeout al cargar la página: {url}")
+        raise
+    except Exception as e:
+        logger.error(f"Error extrayendo precio de {url}: {e}")
+        raise ValueError(f"No se pudo extraer el precio: {e}")
+
+def get_price_from_html(html: str, url: str) -> Tuple[str, float, Optional[float]]:
+    """
+    Extrae el precio del HTML que entrega el servidor, sin navegador.
+    
+    Usa los datos estructurados si existen y si no, sólo los selectores
+    propios de Alkosto (STATIC_CASCADES) sobre el HTML estático.
+    
+    Raises:
+        ValueError: Si el HTML no trae nombre o precio (p. ej. se renderizan con JS)
+    """
+    texts = PageTexts.from_soup(STATIC_CASCADES, make_soup(html))
+    result = _prices_from_texts(texts)
+    
+    logger.info(f"Precio extraído del HTML (sin navegador): {url}")
+    return result
+
+def _cascades() -> Dict[str, List[str]]:
+    """Cascadas del adaptador, con los campos cacheados en el orden aprendido."""
+    cascades = dict(SELECTOR_CASCADES)
+    for name in CACHED_FIELDS:
+        cascades[name] = _ordered(name)
+    return cascades
+
+def _ordered(name: str) -> List[str]:
+    """Cascada de un campo cacheado en el orden aprendido (sólo entre los selectores específicos)."""
+    return get_selector_cache().order(
+        ADAPTER_NAME, name, SELECTOR_CASCADES[name], reorderable=SPECIFIC_SELECTORS[name]
+    )
+
+def _prices_from_texts(texts: PageTexts) -> Tuple[str, float, Optional[float]]:
+    """
+    Aplica la lógica del adaptador sobre el lote de textos de la página.
+    
+    Primero los datos estructurados (JSON-LD); si no hay, las cascadas.
+    
+    Raises:
+        ValueError: Si el lote no trae nombre o precio
+    """
+    structured = _structured_prices(texts.scripts)
+    if structured:
+        product_name, current_displayed_price, old_tachado_price = structured
+        if old_tachado_price is None:
+            # El JSON-LD casi nunca trae el precio tachado: se busca en el DOM
+            old_tachado_price = texts.first_value('old_price', _parse_price)
+    else:
+        product_name = texts.first_text('name')
+        if not product_name:
+            raise ValueError("Página sin nombre del producto")
+        
+        current_displayed_price = texts.first_value('current_price', _first_price_in_text)
+        if not current_displayed_price:
+            raise ValueError("Página sin precio actual")
+        
+        old_tachado_price = texts.first_value('old_price', _parse_price)
+    
+    return _resolve_prices(product_name, current_displayed_price, old_tachado_price)
+
+def _record_selector_hits(texts: PageTexts) -> None:
+    """Informa al caché qué selector resolvió cada campo y cuáles fallaron antes."""
+    cache = get_selector_cache()
+    for name in CACHED_FIELDS:
+        matched = texts.matched_selector(name)
+        if not matched:
+            continue
+        position, selector = matched
+        for failed in texts.cascades[name][:position]:
+            cache.record_failure(ADAPTER_NAME, name, failed)
+        cache.record_hit(ADAPTER_NAME, name, selector, position)
+
+def _structured_prices(script_texts) -> Optional[Tuple[str, float, Optional[float]]]:
+    """
+    Lee (nombre, precio_mostrado, precio_tachado) del JSON-LD / estado embebido.
+    
+    Returns:
+        La tupla, o None si la página no trae un Product con nombre y precio
+    """
+    product = extract_product(script_texts or [])
+    if not product:
+        return None
+    
+    logger.debug(f"Producto leído de datos estructurados: {product.name}")
+    return product.name, product.price, product.list_price
+
+def _first_price_in_text(price_text: str) -> float:
+    """Retorna el primer precio válido dentro de un texto (0.0 si no hay)."""
+    return first_price(price_text)
+
+def _resolve_prices(product_name: str, current_displayed_price: float,
+                    old_tachado_price: Optional[float]) -> Tuple[str, float, Optional[float]]:
+    """
+    Aplica la lógica de precios de Alkosto.
+    
+    Si hay precio tachado, ese es el oficial y el actual es el descuento.
+    Si no hay precio tachado, el actual es el oficial.
+    """
+    if old_tachado_price:
+        official_price = old_tachado_price
+        discounted_price = current_displayed_price
+        logger.info(f"Producto con descuento: {product_name}")
+        logger.info(f"Precio oficial: ${official_price:,.0f}, Con descuento: ${discounted_price:,.0f}")
+    else:
+        official_price = current_displayed_price
+        discounted_price = None
+        logger.info(f"Producto sin descuento: {product_name} - ${official_price:,.0f}")
+    
+    return product_name, official_price, discounted_price
+
+async def get_price_async(page: AsyncPage, url: str) -> Tuple[str, float, Optional[float]]:
+    """
+    Versión asíncrona de get_price para el motor concurrente.
+    
+    Mismo contrato que get_price pero sobre una página de playwright.async_api.
+    """
+    logger.info(f"Extrayendo precio de: {url}")
+    
+    try:
+        with span(STAGE_NAVIGATE):
+            await navigate_async(page, url, READINESS)
         
-        return product_name, official_price, discounted_price
+        with span(STAGE_EXTRACT):
+            texts = await collect_page_texts_async(page, _cascades())
+        
+        try:
+            result = _prices_from_texts(texts)
+        except ValueError as e:
+            logger.debug(f"Extracción en lote incompleta ({e}), usando la cascada con esperas")
+            with span(STAGE_SELECTOR_WAIT):
+                product_name = await _extract_product_name_async(page)
+                current_displayed_price = await _extract_current_price_async(page)
+                old_tachado_price = await _extract_old_price_async(page)
+            return _resolve_prices(product_name, current_displayed_price, old_tachado_price)
+        
+        _record_selector_hits(texts)
+        return result
         
     except PlaywrightTimeoutError:
         logger.error(f"Timeout al cargar la página: {url}")
@@ -83,97 +338,102 @@ def get_price(page: Page, url: str) -> Tuple[str, float, Optional[float]]:
         logger.error(f"Error extrayendo precio de {url}: {e}")
         raise ValueError(f"No se pudo extraer el precio: {e}")
 
+async def _extract_product_name_async(page: AsyncPage) -> str:
+    """Extrae el nombre del producto (versión asíncrona)."""
+    cache = get_selector_cache()
+    selectors = _ordered('name')
+    
+    for position, selector in enumerate(selectors):
+        try:
+            element = await page.wait_for_selector(selector, timeout=5000)
+            if element:
+                name = (await element.text_content()).strip()
+                if name:
+                    cache.record_hit(ADAPTER_NAME, 'name', selector, position)
+                    return name
+        except PlaywrightTimeoutError:
+            pass
+        cache.record_failure(ADAPTER_NAME, 'name', selector)
+    
+    raise ValueError("No se pudo encontrar el nombre del producto")
+
+async def _extract_current_price_async(page: AsyncPage) -> float:
+    """Extrae el precio actual del producto (versión asíncrona)."""
+    cache = get_selector_cache()
+    selectors = _ordered('current_price')
+    
+    for position, selector in enumerate(selectors):
+        try:
+            for element in await page.query_selector_all(selector):
+                price = first_price(await element.text_content())
+                if price > 0:
+                    cache.record_hit(ADAPTER_NAME, 'current_price', selector, position)
+                    return price
+        except Exception:
+            pass
+        cache.record_failure(ADAPTER_NAME, 'current_price', selector)
+    
+    raise ValueError("No se pudo encontrar el precio actual")
+
+async def _extract_old_price_async(page: AsyncPage) -> Optional[float]:
+    """Extrae el precio anterior tachado si existe (versión asíncrona)."""
+    for selector in OLD_PRICE_SELECTORS:
+        try:
+            for element in await page.query_selector_all(selector):
+                price_text = await element.text_content()
+                if price_text:
+                    price = _parse_price(price_text)
+                    if price > 0:
+                        return price
+        except Exception:
+            continue
+    
+    return None
+
 def _extract_product_name(page: Page) -> str:
     """Extrae el nombre del producto."""
-    selectors = [
-        # Selector específico basado en estructura actual de Alkosto
-        'main > section:first-child > div:first-child > div:first-child > div:first-child > h1',
-        'main section:first-child h1',  # Versión más flexible
-        'main h1',  # Aún más flexible
-        # Selectores genéricos como respaldo
-        'h1[data-testid="product-title"]',
-        'h1.product-title',
-        'h1[class*="title"]',
-        '.product-name h1',
-        'h1'
-    ]
-    
-    for selector in selectors:
+    cache = get_selector_cache()
+    selectors = _ordered('name')
+    
+    for position, selector in enumerate(selectors):
         try:
             element = page.wait_for_selector(selector, timeout=5000)
             if element:
                 name = element.text_content().strip()
                 if name:
+                    cache.record_hit(ADAPTER_NAME, 'name', selector, position)
                     return name
         except PlaywrightTimeoutError:
-            continue
+            pass
+        cache.record_failure(ADAPTER_NAME, 'name', selector)
     
     # TODO: Verificar selector CSS correcto para el nombre del producto
     raise ValueError("No se pudo encontrar el nombre del producto")
 
 def _extract_current_price(page: Page) -> float:
     """Extrae el precio actual del producto."""
-    price_selectors = [
-        # Selector específico encontrado en la página actual de Alkosto
-        '#js-original_price',
-        # Selectores específicos basados en estructura actual de Alkosto (respaldo)
-        '.session-price',
-        '.session-price-padding', 
-        '.price-block',
-        '.new-container__main-product__pdp-features__pdp_price',
-        '.product__details-section__price',
-        # Selectores genéricos como respaldo
-        '[data-testid="price-current"]',
-        '.price-current',
-        '.current-price',
-        '[class*="price"][class*="current"]',
-        '.price .current',
-        '.product-price .current',
-        # Selectores más amplios para capturar precios
-        '[class*="price"]',
-        '.price'
-    ]
-    
-    for selector in price_selectors:
+    cache = get_selector_cache()
+    selectors = _ordered('current_price')
+    
+    for position, selector in enumerate(selectors):
         try:
             elements = page.query_selector_all(selector)
             for element in elements:
-                price_text = element.text_content()
-                if price_text:
-                    # Buscar todos los precios en el texto usando regex
-                    import re
-                    price_matches = re.findall(r'\$?\s*[\d,\.]+', price_text)
-                    
-                    for match in price_matches:
-                        price = _parse_price(match)
-                        if price > 0:
-                            return price
+                # Primer precio válido del texto del elemento
+                price = first_price(element.text_content())
+                if price > 0:
+                    cache.record_hit(ADAPTER_NAME, 'current_price', selector, position)
+                    return price
         except Exception:
-            continue
+            pass
+        cache.record_failure(ADAPTER_NAME, 'current_price', selector)
     
     # TODO: Verificar selector CSS correcto para el precio actual
     raise ValueError("No se pudo encontrar el precio actual")
 
 def _extract_old_price(page: Page) -> Optional[float]:
     """Extrae el precio anterior (tachado) si existe."""
-    old_price_selectors = [
-        # Selector específico encontrado en la página actual de Alkosto
-        '#js-original_price_old span',  # Precio anterior
-        '#js-original_price_old',       # Contenedor del precio anterior
-        # Nota: El % de descuento está en '#js-original_price_old div'
-        # Selectores genéricos como respaldo
-        '[data-testid="price-old"]',
-        '.price-old',
-        '.old-price',
-        '[class*="price"][class*="old"]',
-        '[class*="price"][class*="previous"]',
-        '.price .strikethrough',
-        '.price .line-through',
-        'del',
-        's'
-    ]
-    
-    for selector in old_price_selectors:
+    for selector in OLD_PRICE_SELECTORS:
         try:
             elements = page.query_selector_all(selector)
             for element in elements:
@@ -203,52 +463,11 @@ def _extract_discount_percentage(page: Page) -> Optional[str]:
 
 def _parse_price(price_text: str) -> float:
     """
-    Convierte texto de precio a número flotante.
+    Convierte texto de precio a número flotante (ver shared/adapters/price_parser.py).
     
     Ejemplos:
         "$1.234.567" -> 1234567.0
         "$ 1,234,567" -> 1234567.0
         "1.234.567 COP" -> 1234567.0
     """
-    if not price_text:
-        return 0.0
-    
-    # Limpiar el texto: quitar símbolos de moneda, espacios, etc.
-    cleaned = re.sub(r'[^\d.,]', '', price_text.strip())
-    
-    if not cleaned:
-        return 0.0
-    
-    # Manejar diferentes formatos de separadores
-    # Si hay punto y coma, asumimos formato colombiano: 1.234.567,89
-    if ',' in cleaned and '.' in cleaned:
-        if cleaned.rfind(',') > cleaned.rfind('.'):
-            # Formato: 1.234.567,89
-            cleaned = cleaned.replace('.', '').replace(',', '.')
-        else:
-            # Formato: 1,234,567.89
-            cleaned = cleaned.replace(',', '')
-    elif '.' in cleaned:
-        # Determinar si es separador decimal o de miles
-        parts = cleaned.split('.')
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            # Probablemente decimal: 1234.56
-            pass
-        else:
-            # Probablemente separador de miles: 1.234.567
-            cleaned = cleaned.replace('.', '')
-    elif ',' in cleaned:
-        # Similar lógica para comas
-        parts = cleaned.split(',')
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            # Probablemente decimal: 1234,56
-            cleaned = cleaned.replace(',', '.')
-        else:
-            # Probablemente separador de miles: 1,234,567
-            cleaned = cleaned.replace(',', '')
-    
-    try:
-        return float(cleaned)
-    except ValueError:
-        logger.warning(f"No se pudo convertir precio: {price_text}")
-        return 0.0
+    return parse_price(price_text)
@@ -0,0 +1,31 @@
+"""
+Utilidades para extraer datos de HTML estático (sin navegador).
+
+Permiten que un adaptador aplique sus mismas cascadas de selectores CSS
+sobre el HTML renderizado en el servidor, usando BeautifulSoup.
+"""
+
+import logging
+from typing import List
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = 'lxml'
+except ImportError:
+    _PARSER = 'html.parser'
+
+def make_soup(html: str) -> BeautifulSoup:
+    """Parsea el HTML con lxml si está disponible (más rápido), o con html.parser."""
+    return BeautifulSoup(html, _PARSER)
+
+def select_texts(soup: BeautifulSoup, selector: str) -> List[str]:
+    """Retorna el texto de cada elemento que coincide con el selector."""
+    try:
+        return [element.get_text() for element in soup.select(selector)]
+    except Exception as e:
+        # Selectores que soupsieve no soporta: se ignoran como en el navegador
+        logger.debug(f"Selector no soportado en HTML estático '{selector}': {e}")
+        return []
@@ -0,0 +1,108 @@
+"""
+Extracción en un solo viaje al navegador.
+
+Recorrer una cascada con `query_selector_all` + `text_content()` cuesta un
+viaje a Chromium por selector y por elemento. En su lugar, el adaptador
+declara sus cascadas (`SELECTOR_CASCADES = {campo: [selectores]}`) y un solo
+`page.evaluate` devuelve todos los textos candidatos junto con los scripts
+JSON de la página. El parseo de precios ocurre después, en Python, sobre
+ese lote; el mismo lote se puede armar desde el HTML estático con
+BeautifulSoup, así ambos caminos comparten la lógica del adaptador.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shared.adapters.html_extract import select_texts
+from shared.adapters.structured_data import JSON_SCRIPT_SELECTOR, script_texts_from_soup
+
+logger = logging.getLogger(__name__)
+
+# Máximo de elementos leídos por selector (los selectores genéricos como
+# '[class*="price"]' pueden coincidir con cientos de nodos)
+MAX_TEXTS_PER_SELECTOR = 50
+
+# Recibe {cascades: {campo: [selectores]}, scripts: selector, limit: n}
+COLLECT_TEXTS_JS = """
+({cascades, scripts, limit}) => {
+    const texts = {};
+    for (const [field, selectors] of Object.entries(cascades)) {
+        texts[field] = selectors.map(selector => {
+            try {
+                return Array.from(document.querySelectorAll(selector))
+                    .slice(0, limit)
+                    .map(el => el.textContent || '');
+            } catch (e) {
+                return [];  // Selector inválido: se ignora, como en la cascada
+            }
+        });
+    }
+    const scriptTexts = Array.from(document.querySelectorAll(scripts)).map(s => s.textContent);
+    return {texts, scripts: scriptTexts};
+}
+"""
+
+@dataclass
+class PageTexts:
+    """Textos candidatos por campo (una lista por selector, en orden de cascada)."""
+    cascades: Dict[str, List[str]]
+    texts: Dict[str, List[List[str]]]
+    scripts: List[str] = field(default_factory=list)
+    # Índice del selector que dio el valor de cada campo ya resuelto
+    matched: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_evaluate(cls, cascades: Dict[str, List[str]], result: Optional[Dict]) -> "PageTexts":
+        """Construye el lote a partir del resultado de COLLECT_TEXTS_JS."""
+        result = result or {}
+        return cls(cascades, result.get('texts') or {}, result.get('scripts') or [])
+
+    @classmethod
+    def from_soup(cls, cascades: Dict[str, List[str]], soup) -> "PageTexts":
+        """Construye el mismo lote desde un documento de BeautifulSoup."""
+        texts = {
+            name: [select_texts(soup, selector)[:MAX_TEXTS_PER_SELECTOR] for selector in selectors]
+            for name, selectors in cascades.items()
+        }
+        return cls(cascades, texts, script_texts_from_soup(soup))
+
+    def first_text(self, name: str) -> Optional[str]:
+        """Retorna el primer texto no vacío del campo siguiendo la cascada."""
+        for index, candidates in enumerate(self.texts.get(name, [])):
+            for text in candidates:
+                text = (text or '').strip()
+                if text:
+                    self.matched[name] = index
+                    return text
+        return None
+
+    def first_value(self, name: str, parse: Callable[[str], Optional[float]]) -> Optional[float]:
+        """Retorna el primer valor que `parse` acepta siguiendo la cascada del campo."""
+        for index, candidates in enumerate(self.texts.get(name, [])):
+            for text in candidates:
+                if text:
+                    value = parse(text)
+                    if value:
+                        self.matched[name] = index
+                        return value
+        return None
+
+    def matched_selector(self, name: str) -> Optional[Tuple[int, str]]:
+        """Retorna (posición, selector) que resolvió el campo, o None."""
+        index = self.matched.get(name)
+        if index is None:
+            return None
+        return index, self.cascades[name][index]
+
+def _evaluate_args(cascades: Dict[str, List[str]]) -> Dict:
+    return {'cascades': cascades, 'scripts': JSON_SCRIPT_SELECTOR, 'limit': MAX_TEXTS_PER_SELECTOR}
+
+def collect_page_texts(page, cascades: Dict[str, List[str]]) -> PageTexts:
+    """Recolecta los textos de todas las cascadas en un solo page.evaluate (sync)."""
+    return PageTexts.from_evaluate(cascades, page.evaluate(COLLECT_TEXTS_JS, _evaluate_args(cascades)))
+
+async def collect_page_texts_async(page, cascades: Dict[str, List[str]]) -> PageTexts:
+    """Versión para playwright.async_api de collect_page_texts."""
+    result = await page.evaluate(COLLECT_TEXTS_JS, _evaluate_args(cascades))
+    return PageTexts.from_evaluate(cascades, result)
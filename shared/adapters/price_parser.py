@@ -0,0 +1,159 @@
+"""
+Conversión de textos de precio a números, compartida por los adaptadores.
+
+Los patrones se compilan una sola vez y los resultados se memorizan por
+texto: en una corrida se repiten los mismos precios en muchas páginas y
+selectores. Sin formato explícito se aplica la heurística de separadores
+de siempre (sirve para COP, US y europeo); con `fmt` se usan los
+separadores de ese formato sin adivinar.
+
+Ejemplos:
+    parse_price("$1.234.567")             -> 1234567.0
+    parse_price("1,234,567.89")           -> 1234567.89
+    parse_price("1.234", fmt='US')        -> 1.234
+    first_price("Antes $ 99.900 Ahora")   -> 99900.0
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PriceFormat:
+    """Separadores de miles y decimales de un formato de precio."""
+    thousands: str
+    decimal: str
+
+FORMATS = {
+    'COP': PriceFormat(thousands='.', decimal=','),
+    'EU': PriceFormat(thousands='.', decimal=','),
+    'US': PriceFormat(thousands=',', decimal='.'),
+}
+
+# Candidatos a precio dentro de un texto libre ("Antes $ 99.900 Ahora $ 89.900")
+PRICE_CANDIDATE = re.compile(r'\$?\s*[\d,\.]+')
+
+# Todo lo que no es dígito ni separador: símbolo de moneda, espacios, "COP"...
+_NON_NUMERIC = re.compile(r'[^\d.,]')
+
+# Camino rápido: sólo dígitos, o miles agrupados con un único separador
+_DIGITS = re.compile(r'\d+')
+_GROUPED = re.compile(r'\d{1,3}([.,])\d{3}(?:\1\d{3})*')
+
+# Textos distintos que se recuerdan ya convertidos
+PRICE_CACHE_SIZE = 4096
+
+def _to_float(cleaned: str, price_text: str) -> float:
+    try:
+        return float(cleaned)
+    except ValueError:
+        logger.warning(f"No se pudo convertir precio: {price_text}")
+        return 0.0
+
+def _parse_guessing(cleaned: str, price_text: str) -> float:
+    """Heurística de separadores cuando no se conoce el formato."""
+    # Dos separadores distintos: el último es el decimal (1.234.567,89 o 1,234,567.89)
+    if ',' in cleaned and '.' in cleaned:
+        if cleaned.rfind(',') > cleaned.rfind('.'):
+            cleaned = cleaned.replace('.', '').replace(',', '.')
+        else:
+            cleaned = cleaned.replace(',', '')
+        return _to_float(cleaned, price_text)
+
+    separator = '.' if '.' in cleaned else ','
+    head, sep, tail = cleaned.partition(separator)
+    if sep and separator not in tail and len(tail) <= 2:
+        # Un solo separador con 1-2 dígitos detrás: decimal (1234.56 / 1234,56)
+        return _to_float(f"{head}.{tail}", price_text)
+    # Separador de miles (1.234.567 / 1,234,567)
+    return _to_float(cleaned.replace(separator, ''), price_text)
+
+@lru_cache(maxsize=PRICE_CACHE_SIZE)
+def _parse_cached(price_text: str, fmt: Optional[str]) -> float:
+    cleaned = _NON_NUMERIC.sub('', price_text.strip())
+    if not cleaned:
+        return 0.0
+
+    if _DIGITS.fullmatch(cleaned):
+        return float(cleaned)
+
+    if fmt is not None:
+        price_format = FORMATS[fmt]
+        cleaned = cleaned.replace(price_format.thousands, '').replace(price_format.decimal, '.')
+        return _to_float(cleaned, price_text)
+
+    match = _GROUPED.fullmatch(cleaned)
+    if match:
+        # COP (1.234.567) o US (1,234,567) sin decimales: el caso más común
+        return float(cleaned.replace(match.group(1), ''))
+
+    return _parse_guessing(cleaned, price_text)
+
+def parse_price(price_text: Optional[str], fmt: Optional[str] = None) -> float:
+    """
+    Convierte un texto de precio a número (0.0 si no trae un precio válido).
+
+    Args:
+        price_text: Texto como "$1.234.567", "1,234.56 USD" o "1.234,56 €"
+        fmt: 'COP', 'US' o 'EU' para fijar los separadores; None para deducirlos
+    """
+    if not price_text:
+        return 0.0
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"Formato de precio desconocido: {fmt}")
+    return _parse_cached(price_text, fmt)
+
+def parse_prices(price_texts: Iterable[Optional[str]], fmt: Optional[str] = None) -> List[float]:
+    """Convierte un lote de textos; los repetidos se convierten una sola vez."""
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"Formato de precio desconocido: {fmt}")
+    parse = _parse_cached
+    return [parse(text, fmt) if text else 0.0 for text in price_texts]
+
+def parse_prices_array(price_texts: Iterable[Optional[str]], fmt: Optional[str] = None):
+    """
+    Versión con NumPy de parse_prices para relotes grandes (p. ej. volver a
+    convertir textos guardados): deduplica con np.unique, convierte cada
+    texto distinto una vez y expande el resultado a un ndarray float64.
+
+    Raises:
+        RuntimeError: Si NumPy no está instalado
+    """
+    if np is None:
+        raise RuntimeError("parse_prices_array requiere numpy (pip install numpy)")
+
+    texts = np.asarray([text or '' for text in price_texts], dtype=str)
+    if texts.size == 0:
+        return np.zeros(0, dtype=np.float64)
+    unique, inverse = np.unique(texts, return_inverse=True)
+    values = np.fromiter(parse_prices(unique.tolist(), fmt), dtype=np.float64, count=unique.size)
+    return values[inverse]
+
+def find_prices(text: Optional[str], fmt: Optional[str] = None) -> List[float]:
+    """Todos los precios válidos (> 0) de un texto libre, en orden."""
+    if not text:
+        return []
+    return [price for price in parse_prices(PRICE_CANDIDATE.findall(text), fmt) if price > 0]
+
+def first_price(text: Optional[str], fmt: Optional[str] = None) -> float:
+    """El primer precio válido de un texto libre (0.0 si no hay)."""
+    if not text:
+        return 0.0
+    for candidate in PRICE_CANDIDATE.findall(text):
+        price = parse_price(candidate, fmt)
+        if price > 0:
+            return price
+    return 0.0
+
+def cache_info():
+    """Estadísticas del caché de conversiones (hits, misses, tamaño)."""
+    return _parse_cached.cache_info()
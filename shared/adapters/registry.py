@@ -0,0 +1,120 @@
+"""
+Registro de adaptadores por dominio.
+
+Cada tienda se asocia a su dominio normalizado ("alkosto.com") y el módulo
+del adaptador se importa recién la primera vez que aparece una URL de ese
+dominio. Además de los adaptadores incluidos aquí, otros paquetes pueden
+aportar adaptadores declarando entry points en el grupo
+`price_alarm.adapters`:
+
+    [tool.poetry.plugins."price_alarm.adapters"]
+    "tienda.com" = "mi_paquete.adaptadores.tienda"
+
+El nombre del entry point es el dominio y el valor, el módulo del adaptador.
+"""
+
+import logging
+import importlib
+import threading
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Dict, List, Optional, Union
+
+from shared.utils.domains import normalize_domain, domain_candidates
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'price_alarm.adapters'
+
+# Adaptadores incluidos en el repositorio: dominio -> módulo (sin importar aún)
+BUILTIN_ADAPTERS = {
+    'alkosto.com': 'shared.adapters.alkosto',
+}
+
+class AdapterRegistry:
+    """Búsqueda O(1) de adaptador por dominio, con importación perezosa."""
+
+    def __init__(self, adapters: Optional[Dict[str, str]] = None, discover: bool = True):
+        if adapters is None:
+            adapters = BUILTIN_ADAPTERS
+        self._specs: Dict[str, Union[str, object]] = {
+            normalize_domain(domain): module for domain, module in adapters.items()
+        }
+        self._loaded: Dict[str, ModuleType] = {}
+        # Host ya visto -> dominio registrado que le corresponde (o None)
+        self._hosts: Dict[str, Optional[str]] = {}
+        self._discover_pending = discover
+        self._lock = threading.Lock()
+
+    def register(self, domain: str, module: Union[str, ModuleType]) -> None:
+        """Registra un adaptador (ruta del módulo o módulo ya importado) para un dominio."""
+        domain = normalize_domain(domain)
+        with self._lock:
+            if isinstance(module, ModuleType):
+                self._loaded[domain] = module
+            self._specs[domain] = module
+            self._hosts.clear()
+
+    def _discover(self) -> None:
+        """Agrega los adaptadores declarados como entry points (sin importarlos)."""
+        self._discover_pending = False
+        try:
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            logger.warning(f"No se pudieron leer los entry points de adaptadores: {e}")
+            return
+
+        for entry_point in found:
+            domain = normalize_domain(entry_point.name)
+            # Los incluidos en el repositorio tienen prioridad
+            self._specs.setdefault(domain, entry_point)
+
+    def domains(self) -> List[str]:
+        """Dominios con adaptador registrado."""
+        with self._lock:
+            if self._discover_pending:
+                self._discover()
+            return sorted(self._specs)
+
+    def _resolve_domain(self, host: str) -> Optional[str]:
+        if host not in self._hosts:
+            # "m.tienda.com" usa el adaptador de "tienda.com" si no hay uno propio
+            self._hosts[host] = next((d for d in domain_candidates(host) if d in self._specs), None)
+        return self._hosts[host]
+
+    def _load(self, domain: str) -> ModuleType:
+        spec = self._specs[domain]
+        if isinstance(spec, str):
+            module = importlib.import_module(spec)
+        else:
+            module = spec.load()
+        logger.debug(f"Adaptador cargado para {domain}: {module.__name__}")
+        self._loaded[domain] = module
+        return module
+
+    def get(self, url: str) -> Optional[ModuleType]:
+        """Retorna el adaptador para la URL (importándolo si es la primera vez), o None."""
+        host = normalize_domain(url)
+        with self._lock:
+            if self._discover_pending:
+                self._discover()
+
+            domain = self._resolve_domain(host)
+            if domain is None:
+                return None
+            if domain in self._loaded:
+                return self._loaded[domain]
+            return self._load(domain)
+
+_default_registry: Optional[AdapterRegistry] = None
+
+def get_registry() -> AdapterRegistry:
+    """Retorna el registro compartido del proceso."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = AdapterRegistry()
+    return _default_registry
+
+def get_adapter(url: str) -> Optional[ModuleType]:
+    """Atajo: adaptador para la URL según el registro compartido."""
+    return get_registry().get(url)
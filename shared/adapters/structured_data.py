@@ -0,0 +1,117 @@
+"""
+Extracción de datos estructurados de producto (JSON-LD / estado embebido).
+
+Muchas páginas de producto incluyen un objeto schema.org `Product` con su
+`Offer` en `<script type="application/ld+json">`, o el mismo objeto dentro
+de un blob JSON de estado (`<script type="application/json">`, p. ej.
+`__NEXT_DATA__`). Leerlo cuesta un solo parseo por página, en lugar de
+recorrer cascadas de selectores CSS.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+from shared.adapters.price_parser import parse_price
+
+logger = logging.getLogger(__name__)
+
+# Scripts que pueden traer datos estructurados
+JSON_SCRIPT_SELECTOR = 'script[type="application/ld+json"], script[type="application/json"]'
+
+# Tipos de precio de schema.org que indican el precio "de lista" (tachado)
+_LIST_PRICE_TYPES = ('listprice', 'strikethroughprice', 'msrp')
+
+@dataclass
+class StructuredProduct:
+    """Datos de producto leídos de JSON-LD o de un blob de estado."""
+    name: str
+    price: float
+    list_price: Optional[float] = None
+
+def _to_float(value: Any) -> Optional[float]:
+    """
+    Convierte un precio de schema.org a float.
+
+    Los strings pasan por parse_price: además de "1299900.00" hay tiendas que
+    publican el precio con separador de miles ("899.900", "1.299.900").
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value > 0 else None
+    if isinstance(value, str):
+        return parse_price(value) or None
+    return None
+
+def _is_type(node: dict, type_name: str) -> bool:
+    node_type = node.get('@type')
+    types = node_type if isinstance(node_type, list) else [node_type]
+    return any(isinstance(t, str) and t.split('/')[-1].lower() == type_name for t in types)
+
+def _walk(data: Any) -> Iterator[dict]:
+    """Recorre en profundidad todos los dicts de una estructura JSON."""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def _offer_prices(offers: Any) -> tuple:
+    """Retorna (precio, precio_de_lista) de un Offer/AggregateOffer o de una lista de ellos."""
+    price = list_price = None
+
+    for offer in (offers if isinstance(offers, list) else [offers]):
+        if not isinstance(offer, dict):
+            continue
+
+        if price is None:
+            price = _to_float(offer.get('price')) or _to_float(offer.get('lowPrice'))
+
+        specs = offer.get('priceSpecification') or []
+        for spec in (specs if isinstance(specs, list) else [specs]):
+            if not isinstance(spec, dict):
+                continue
+            price_type = str(spec.get('priceType', '')).split('/')[-1].lower()
+            if price_type in _LIST_PRICE_TYPES:
+                list_price = list_price or _to_float(spec.get('price'))
+            elif price is None:
+                price = _to_float(spec.get('price'))
+
+    return price, list_price
+
+def parse_json_blobs(texts: Iterable[Optional[str]]) -> List[Any]:
+    """Parsea los textos de los scripts JSON, ignorando los que no son JSON válido."""
+    blobs = []
+    for text in texts:
+        if not text or not text.strip():
+            continue
+        try:
+            blobs.append(json.loads(text))
+        except ValueError:
+            logger.debug("Script JSON inválido ignorado")
+    return blobs
+
+def find_product(blobs: Iterable[Any]) -> Optional[StructuredProduct]:
+    """Retorna el primer `Product` con nombre y precio encontrado en los blobs."""
+    for blob in blobs:
+        for node in _walk(blob):
+            if not _is_type(node, 'product'):
+                continue
+
+            name = node.get('name')
+            price, list_price = _offer_prices(node.get('offers'))
+
+            if isinstance(name, str) and name.strip() and price:
+                return StructuredProduct(name=name.strip(), price=price, list_price=list_price)
+    return None
+
+def extract_product(script_texts: Iterable[Optional[str]]) -> Optional[StructuredProduct]:
+    """Atajo: parsea los textos de los scripts y busca el producto."""
+    return find_product(parse_json_blobs(script_texts))
+
+def script_texts_from_soup(soup) -> List[str]:
+    """Retorna el contenido de los scripts JSON de un documento de BeautifulSoup."""
+    return [script.string or script.get_text() for script in soup.select(JSON_SCRIPT_SELECTOR)]
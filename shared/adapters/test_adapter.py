@@ -43,3 +43,7 @@ def get_price(page: Page, url: str) -> Tuple[str, float, Optional[float]]:
         logger.info(f"[PRUEBA] Precio anterior: ${old_price:,.0f}")
     
     return product_name, current_price, old_price
+
+async def get_price_async(page, url: str) -> Tuple[str, float, Optional[float]]:
+    """Versión asíncrona del simulador (no usa la página)."""
+    return get_price(page, url)
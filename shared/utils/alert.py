@@ -8,6 +8,8 @@ from typing import Optional
 from telegram import Bot
 from telegram.error import TelegramError
 
+from shared.utils.metrics import ALERTS_SENT
+
 logger = logging.getLogger(__name__)
 
 class TelegramAlert:
@@ -53,7 +55,9 @@ class TelegramAlert:
 🛒 <a href="{url}">Ver producto</a>
         """
         
-        return await self.send_message(message.strip())
+        sent = await self.send_message(message.strip())
+        ALERTS_SENT.labels(result='ok' if sent else 'error').inc()
+        return sent
 
 def send_telegram_sync(message: str) -> bool:
     """Versión síncrona para compatibilidad."""
@@ -100,4 +104,5 @@ def send_price_alert_sync(product_name: str, old_price: float,
             
     except Exception as e:
         logger.error(f"Error en alerta de precio síncrona: {e}")
+        ALERTS_SENT.labels(result='error').inc()
         return False
@@ -0,0 +1,165 @@
+"""
+Checkpoints de corridas de scraping para poder reanudarlas.
+
+Cada corrida de track.py queda registrada en `scrape_runs`, con una fila por
+URL en `scrape_run_items` que pasa de 'pending' a 'done' o 'failed' apenas
+se procesa. Si el proceso muere a mitad (timeout del cron, reinicio del
+contenedor), `track.py --resume` retoma sólo las URLs que quedaron
+pendientes en vez de empezar de nuevo por la primera.
+
+Una corrida nueva da por abandonadas sólo las corridas 'running' sin
+actividad (ninguna URL registrada) en SCRAPER_RUN_STALE_SECONDS: las que
+otro proceso sigue avanzando no se tocan.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+RUN_RUNNING = 'running'
+RUN_FINISHED = 'finished'
+RUN_ABANDONED = 'abandoned'
+
+ITEM_PENDING = 'pending'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+
+# Sin registrar ninguna URL en este tiempo, una corrida 'running' se da por muerta.
+# Debe superar lo que puede tardar una URL con todos sus reintentos
+STALE_RUN_SECONDS = float(os.getenv('SCRAPER_RUN_STALE_SECONDS', '1800'))
+
+class RunCheckpoint:
+    """Estado por URL de una corrida de scraping."""
+
+    def __init__(self, db, run_id: int):
+        self.db = db
+        self.run_id = run_id
+
+    @staticmethod
+    def _create_tables(db) -> None:
+        with db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scrape_runs (
+                        id BIGSERIAL PRIMARY KEY,
+                        status TEXT NOT NULL DEFAULT 'running',
+                        total INTEGER NOT NULL,
+                        started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        finished_at TIMESTAMP
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scrape_run_items (
+                        run_id BIGINT NOT NULL REFERENCES scrape_runs(id) ON DELETE CASCADE,
+                        url TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        PRIMARY KEY (run_id, url)
+                    )
+                """)
+                conn.commit()
+
+    @classmethod
+    def start(cls, db, urls_to_process: List[Dict], stale_seconds: float = STALE_RUN_SECONDS) -> "RunCheckpoint":
+        """
+        Registra una corrida nueva con todas sus URLs pendientes.
+
+        Las corridas que seguían 'running' sin actividad en `stale_seconds`
+        (desde que empezaron o desde la última URL registrada) quedan como
+        'abandoned': ya no se pueden reanudar. Las que siguen avanzando en
+        otro proceso se dejan como están.
+        """
+        cls._create_tables(db)
+        with db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE scrape_runs r SET status = %s
+                    WHERE r.status = %s
+                      AND GREATEST(r.started_at, COALESCE(
+                          (SELECT MAX(i.updated_at) FROM scrape_run_items i WHERE i.run_id = r.id), r.started_at
+                      )) < NOW() - make_interval(secs => %s)
+                """, (RUN_ABANDONED, RUN_RUNNING, stale_seconds))
+                cursor.execute("INSERT INTO scrape_runs (total) VALUES (%s) RETURNING id", (len(urls_to_process),))
+                run_id = cursor.fetchone()[0]
+                execute_values(cursor, """
+                    INSERT INTO scrape_run_items (run_id, url) VALUES %s
+                    ON CONFLICT DO NOTHING
+                """, [(run_id, url_info['url']) for url_info in urls_to_process], page_size=1000)
+                conn.commit()
+
+        logger.info(f"Corrida {run_id} iniciada con {len(urls_to_process)} URLs")
+        return cls(db, run_id)
+
+    @classmethod
+    def resume(cls, db, urls_to_process: List[Dict]) -> Tuple[Optional["RunCheckpoint"], List[Dict]]:
+        """
+        Retoma la última corrida que no terminó.
+
+        Returns:
+            (checkpoint, URLs que le quedaban pendientes y siguen en la
+            configuración), o (None, []) si no hay corrida para reanudar
+        """
+        cls._create_tables(db)
+        with db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id FROM scrape_runs WHERE status = %s
+                    ORDER BY started_at DESC LIMIT 1
+                """, (RUN_RUNNING,))
+                row = cursor.fetchone()
+                if not row:
+                    return None, []
+                run_id = row[0]
+
+                cursor.execute("SELECT url, status FROM scrape_run_items WHERE run_id = %s", (run_id,))
+                statuses = dict(cursor.fetchall())
+
+        pending = [u for u in urls_to_process if statuses.get(u['url']) == ITEM_PENDING]
+        done = sum(1 for status in statuses.values() if status != ITEM_PENDING)
+        logger.info(f"Reanudando corrida {run_id}: {done} de {len(statuses)} URLs ya procesadas, "
+                    f"{len(pending)} pendientes")
+        return cls(db, run_id), pending
+
+    def mark(self, url: str, ok: bool) -> None:
+        """Registra el resultado final de una URL (tras agotar sus reintentos si falló)."""
+        try:
+            with self.db.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE scrape_run_items SET status = %s, updated_at = NOW()
+                        WHERE run_id = %s AND url = %s
+                    """, (ITEM_DONE if ok else ITEM_FAILED, self.run_id, url))
+                    conn.commit()
+        except Exception as e:
+            # Sin checkpoint la URL se repetiría al reanudar, pero el precio ya quedó guardado
+            logger.warning(f"No se pudo registrar el checkpoint de {url}: {e}")
+
+    def finish(self) -> None:
+        """Cierra la corrida: ya no se reanuda."""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE scrape_runs SET status = %s, finished_at = NOW()
+                    WHERE id = %s AND status = %s
+                """, (RUN_FINISHED, self.run_id, RUN_RUNNING))
+                conn.commit()
+
+    def progress(self) -> Dict[str, int]:
+        """Cantidad de URLs de la corrida por estado."""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT status, COUNT(*) FROM scrape_run_items WHERE run_id = %s GROUP BY status
+                """, (self.run_id,))
+                return dict(cursor.fetchall())
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        progress = self.progress()
+        return f"Corrida {self.run_id}: " + ", ".join(
+            f"{status}={progress.get(status, 0)}" for status in (ITEM_DONE, ITEM_FAILED, ITEM_PENDING)
+        )
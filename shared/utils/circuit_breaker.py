@@ -0,0 +1,145 @@
+"""
+Circuit breaker por dominio.
+
+Si una tienda está caída, cada URL suya consume sus intentos y sus esperas
+mientras las demás tiendas aguardan. El breaker de cada dominio se abre
+tras varios fallos seguidos: mientras está abierto, las URLs de ese dominio
+se difieren (la cola sigue con otras tiendas). Pasado el enfriamiento deja
+pasar una sola URL de prueba (half-open): si funciona se cierra, si falla se
+vuelve a abrir. Tras abrirse `max_trips` veces en una corrida el dominio se
+da por caído y sus URLs pendientes se descartan.
+
+Configuración por entorno:
+    SCRAPER_BREAKER_FAILURES: fallos consecutivos para abrir (3)
+    SCRAPER_BREAKER_COOLDOWN: segundos abierto antes de probar de nuevo (60)
+    SCRAPER_BREAKER_MAX_TRIPS: aperturas tras las cuales se descarta el dominio (2)
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shared.utils.domains import normalize_domain
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = int(os.getenv('SCRAPER_BREAKER_FAILURES', '3'))
+COOLDOWN_SECONDS = float(os.getenv('SCRAPER_BREAKER_COOLDOWN', '60'))
+MAX_TRIPS = int(os.getenv('SCRAPER_BREAKER_MAX_TRIPS', '2'))
+
+# Espera sugerida mientras hay una URL de prueba en curso
+PROBE_POLL_SECONDS = 1.0
+
+@dataclass
+class BreakerTransition:
+    """Cambio de estado del breaker de un dominio."""
+    domain: str
+    from_state: str
+    to_state: str
+    at: float
+
+    def __str__(self) -> str:
+        return f"{self.domain}: {self.from_state} -> {self.to_state} (t+{self.at:.0f}s)"
+
+@dataclass
+class _Breaker:
+    state: str = STATE_CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    trips: int = 0
+    probing: bool = False
+
+class DomainCircuitBreaker:
+    """Un breaker por dominio, con el historial de transiciones de la corrida."""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN_SECONDS,
+                 max_trips: int = MAX_TRIPS, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self._clock = clock
+        self._started_at = clock()
+        self._breakers: Dict[str, _Breaker] = {}
+        self.transitions: List[BreakerTransition] = []
+
+    def _get(self, url: str) -> Tuple[str, _Breaker]:
+        domain = normalize_domain(url)
+        return domain, self._breakers.setdefault(domain, _Breaker())
+
+    def _transition(self, domain: str, breaker: _Breaker, to_state: str) -> None:
+        transition = BreakerTransition(domain, breaker.state, to_state, self._clock() - self._started_at)
+        self.transitions.append(transition)
+        level = logging.WARNING if to_state == STATE_OPEN else logging.INFO
+        logger.log(level, f"Circuit breaker {transition}")
+        breaker.state = to_state
+
+    def state(self, url: str) -> str:
+        """Estado actual del breaker del dominio de la URL."""
+        return self._get(url)[1].state
+
+    def is_dead(self, url: str) -> bool:
+        """True si el dominio se abrió demasiadas veces y sus URLs deben descartarse."""
+        _, breaker = self._get(url)
+        return bool(self.max_trips) and breaker.state == STATE_OPEN and breaker.trips >= self.max_trips
+
+    def retry_after(self, url: str) -> float:
+        """
+        Segundos hasta que el dominio pueda recibir otra URL (0 si puede ya).
+
+        Un breaker abierto pasa a half-open al cumplirse el enfriamiento.
+        """
+        domain, breaker = self._get(url)
+
+        if breaker.state == STATE_OPEN:
+            remaining = breaker.opened_at + self.cooldown - self._clock()
+            if remaining > 0:
+                return remaining
+            self._transition(domain, breaker, STATE_HALF_OPEN)
+
+        if breaker.state == STATE_HALF_OPEN and breaker.probing:
+            return PROBE_POLL_SECONDS
+        return 0.0
+
+    def on_dispatch(self, url: str) -> None:
+        """Registra que una URL del dominio se entregó para procesar."""
+        _, breaker = self._get(url)
+        if breaker.state == STATE_HALF_OPEN:
+            breaker.probing = True
+
+    def record_success(self, url: str) -> None:
+        """Un intento del dominio funcionó: se cierra el breaker."""
+        domain, breaker = self._get(url)
+        breaker.failures = 0
+        breaker.probing = False
+        if breaker.state != STATE_CLOSED:
+            self._transition(domain, breaker, STATE_CLOSED)
+
+    def release(self, url: str) -> None:
+        """La URL entregada no llegó a probar al dominio: libera la prueba sin contar éxito ni falla."""
+        _, breaker = self._get(url)
+        breaker.probing = False
+
+    def record_failure(self, url: str) -> None:
+        """Un intento del dominio falló: abre el breaker al llegar al umbral (o si era la prueba)."""
+        domain, breaker = self._get(url)
+        breaker.failures += 1
+        breaker.probing = False
+
+        if breaker.state == STATE_HALF_OPEN or (
+            breaker.state == STATE_CLOSED and breaker.failures >= self.failure_threshold
+        ):
+            breaker.opened_at = self._clock()
+            breaker.trips += 1
+            self._transition(domain, breaker, STATE_OPEN)
+
+    def summary(self) -> Optional[str]:
+        """Transiciones de la corrida en una línea, o None si no hubo."""
+        if not self.transitions:
+            return None
+        return "Circuit breakers: " + "; ".join(str(t) for t in self.transitions)
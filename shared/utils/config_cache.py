@@ -0,0 +1,112 @@
+"""
+Caché de products.yml por hash de contenido.
+
+Parsear el YAML y aplanarlo en la lista de URLs se repite en cada corrida y
+en cada ciclo del daemon aunque el archivo no haya cambiado. Este módulo
+guarda la configuración ya parseada y la lista aplanada en un JSON local,
+indexados por el SHA-256 del archivo: si el hash coincide no se vuelve a
+parsear nada. Es JSON y no pickle porque db/ es un directorio compartido:
+leer un pickle ajeno permitiría ejecutar código.
+
+También calcula un hash por producto, que la BD guarda al sincronizar el
+catálogo (`catalog_state`), para reconciliar sólo los productos que cambiaron.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(os.getenv('SCRAPER_CONFIG_CACHE_PATH', 'db/config_cache.json'))
+
+# Subir si cambia el formato de lo que se guarda
+CACHE_VERSION = 2
+
+def content_hash(raw: bytes) -> str:
+    """SHA-256 del contenido del archivo de configuración."""
+    return hashlib.sha256(raw).hexdigest()
+
+def product_hash(product: Dict) -> str:
+    """Hash de la configuración efectiva de un producto (independiente del orden de las claves)."""
+    canonical = json.dumps(product, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def changed_products(product_configs: List[Dict], known_hashes: Dict[str, str]) -> List[Dict]:
+    """Los productos cuyo hash no coincide con el registrado para su alias (o que no están registrados)."""
+    return [p for p in product_configs if known_hashes.get(p['alias']) != product_hash(p)]
+
+@dataclass
+class ConfigEntry:
+    """products.yml parseado y aplanado, con el hash del contenido del que salió."""
+    hash: str
+    config: Dict
+    urls: List[Dict]
+
+class ConfigCache:
+    """Última configuración parseada, en memoria y en un JSON local."""
+
+    def __init__(self, path: Optional[Path] = DEFAULT_CACHE_PATH):
+        self.path = Path(path) if path else None
+        self._entry: Optional[ConfigEntry] = None
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[ConfigEntry]:
+        """La entrada para ese hash de contenido, o None si el archivo cambió."""
+        with self._lock:
+            if self._entry is None or self._entry.hash != digest:
+                self._entry = self._load()
+            if self._entry is not None and self._entry.hash == digest:
+                return self._entry
+        return None
+
+    def put(self, digest: str, config: Dict, urls: List[Dict]) -> ConfigEntry:
+        """Guarda la configuración recién parseada y la retorna como entrada."""
+        entry = ConfigEntry(hash=digest, config=config, urls=urls)
+        with self._lock:
+            self._entry = entry
+            self._save(entry)
+        return entry
+
+    def _load(self) -> Optional[ConfigEntry]:
+        if not self.path or not self.path.exists():
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return None
+            return ConfigEntry(hash=data['hash'], config=data['config'], urls=data['urls'])
+        except Exception as e:
+            # Archivo corrupto o ilegible: se trata como un fallo de caché y se vuelve a parsear el YAML
+            logger.warning(f"No se pudo leer el caché de configuración {self.path}: {e}")
+            return None
+
+    def _save(self, entry: ConfigEntry) -> None:
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Un temporal por proceso: varios workers pueden guardar a la vez
+            tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+            payload = json.dumps({'version': CACHE_VERSION, 'hash': entry.hash, 'config': entry.config,
+                                  'urls': entry.urls}, ensure_ascii=False)
+            tmp_path.write_text(payload, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            # TypeError/ValueError: el YAML trae valores que JSON no representa (p. ej. fechas)
+            logger.warning(f"No se pudo guardar el caché de configuración {self.path}: {e}")
+
+_config_cache: Optional[ConfigCache] = None
+
+def get_config_cache() -> ConfigCache:
+    """Retorna el caché de configuración compartido por el proceso."""
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = ConfigCache()
+    return _config_cache
@@ -0,0 +1,248 @@
+"""
+Coordinación de varios nodos de scraping sobre la BD compartida.
+
+Cada URL cae en un shard (crc32 de la URL módulo SCRAPER_SHARDS). Los nodos
+registran un heartbeat en `scrape_nodes` y arriendan shards en
+`scrape_shards` con un lease que vence: cada nodo sólo scrapea las URLs de
+sus shards, así que agregar contenedores reparte la lista en vez de repetirla.
+
+El reparto usa rendezvous hashing entre los nodos vivos: cuando un nodo
+entra o muere sólo se mueven los shards que le tocaban a él. Un shard
+huérfano (su dueño dejó de latir y el lease venció) lo toma el nodo al que
+ahora le corresponde.
+
+Para no perder ni duplicar observaciones, cada precio se guarda en la misma
+transacción que valida el lease del shard (`FencedDatabase`): la fila del
+shard queda bloqueada, y si el nodo perdió el lease (venció o cambió la
+época) el precio se descarta y la URL la scrapea el nuevo dueño. Todos los
+tiempos usan NOW() de Postgres, así que el reloj de cada host no importa.
+"""
+
+import os
+import zlib
+import socket
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Todos los nodos deben usar el mismo número de shards
+NUM_SHARDS = int(os.getenv('SCRAPER_SHARDS', '64'))
+HEARTBEAT_SECONDS = float(os.getenv('SCRAPER_HEARTBEAT_SECONDS', '30'))
+# Un nodo sin heartbeat por este tiempo se considera muerto
+NODE_TTL_SECONDS = float(os.getenv('SCRAPER_NODE_TTL_SECONDS', '90'))
+SHARD_LEASE_SECONDS = float(os.getenv('SCRAPER_SHARD_LEASE_SECONDS', '120'))
+
+class LeaseLostError(Exception):
+    """El nodo ya no tiene el lease del shard de la URL."""
+
+def shard_for(url: str, num_shards: int = NUM_SHARDS) -> int:
+    """Shard de una URL; estable entre procesos y hosts (a diferencia de hash())."""
+    return zlib.crc32(url.encode('utf-8')) % num_shards
+
+def assign_shards(nodes: List[str], num_shards: int = NUM_SHARDS) -> Dict[str, List[int]]:
+    """
+    Reparte los shards entre los nodos vivos con rendezvous hashing.
+
+    Cada shard va al nodo con mayor crc32("nodo:shard"); si un nodo desaparece,
+    sólo sus shards cambian de dueño.
+    """
+    assignment: Dict[str, List[int]] = {node: [] for node in nodes}
+    if not nodes:
+        return assignment
+    for shard in range(num_shards):
+        owner = max(nodes, key=lambda node: (zlib.crc32(f"{node}:{shard}".encode('utf-8')), node))
+        assignment[owner].append(shard)
+    return assignment
+
+def default_node_id() -> str:
+    """Identificador del nodo: SCRAPER_NODE_ID o host:pid."""
+    return os.getenv('SCRAPER_NODE_ID') or f"{socket.gethostname()}:{os.getpid()}"
+
+class ShardCoordinator:
+    """
+    Heartbeat y leases de shards de un nodo.
+
+    `heartbeat()` se llama cada HEARTBEAT_SECONDS (también desde otro hilo):
+    renueva el registro del nodo, recalcula el reparto y toma, renueva o
+    libera shards. `owned` guarda la época de cada shard arrendado, que
+    `FencedDatabase` verifica al guardar cada precio.
+    """
+
+    def __init__(self, db, node_id: Optional[str] = None, num_shards: int = NUM_SHARDS,
+                 lease_seconds: float = SHARD_LEASE_SECONDS, node_ttl: float = NODE_TTL_SECONDS):
+        self.db = db
+        self.node_id = node_id or default_node_id()
+        self.num_shards = num_shards
+        self.lease_seconds = lease_seconds
+        self.node_ttl = node_ttl
+        self._owned: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scrape_nodes (
+                        node_id TEXT PRIMARY KEY,
+                        hostname TEXT NOT NULL,
+                        started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        heartbeat_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                """)
+                # epoch sube cada vez que el shard cambia de dueño (fencing token)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scrape_shards (
+                        shard_id INTEGER PRIMARY KEY,
+                        owner TEXT,
+                        lease_until TIMESTAMP,
+                        epoch BIGINT NOT NULL DEFAULT 0
+                    )
+                """)
+                cursor.execute("""
+                    INSERT INTO scrape_shards (shard_id)
+                    SELECT generate_series(0, %s - 1)
+                    ON CONFLICT DO NOTHING
+                """, (self.num_shards,))
+                conn.commit()
+
+    @property
+    def owned(self) -> Dict[int, int]:
+        """Shards arrendados por este nodo y su época."""
+        with self._lock:
+            return dict(self._owned)
+
+    def owns(self, url: str) -> bool:
+        """True si la URL cae en un shard arrendado por este nodo."""
+        with self._lock:
+            return shard_for(url, self.num_shards) in self._owned
+
+    def epoch_for(self, shard: int) -> Optional[int]:
+        with self._lock:
+            return self._owned.get(shard)
+
+    def forget(self, shard: int) -> None:
+        """Olvida un shard cuyo lease se perdió (lo detectó una escritura)."""
+        with self._lock:
+            if self._owned.pop(shard, None) is not None:
+                logger.warning(f"Nodo {self.node_id}: lease del shard {shard} perdido")
+
+    def filter_urls(self, urls_to_process: List[Dict]) -> List[Dict]:
+        """Las URLs de la lista que le tocan a este nodo."""
+        mine = [url_info for url_info in urls_to_process if self.owns(url_info['url'])]
+        logger.info(f"Nodo {self.node_id}: {len(mine)} de {len(urls_to_process)} URLs "
+                    f"en sus {len(self.owned)} shards")
+        return mine
+
+    def heartbeat(self) -> Dict[int, int]:
+        """Registra el latido del nodo y rebalancea sus shards. Retorna los shards arrendados."""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO scrape_nodes (node_id, hostname) VALUES (%s, %s)
+                    ON CONFLICT (node_id) DO UPDATE SET heartbeat_at = NOW()
+                """, (self.node_id, socket.gethostname()))
+                cursor.execute("""
+                    SELECT node_id FROM scrape_nodes
+                    WHERE heartbeat_at >= NOW() - make_interval(secs => %s)
+                """, (self.node_ttl,))
+                live_nodes = sorted(row[0] for row in cursor.fetchall())
+                mine = assign_shards(live_nodes, self.num_shards).get(self.node_id, [])
+
+                # Soltar los shards que ahora le tocan a otro nodo
+                cursor.execute("""
+                    UPDATE scrape_shards SET owner = NULL, lease_until = NULL
+                    WHERE owner = %s AND NOT (shard_id = ANY(%s))
+                    RETURNING shard_id
+                """, (self.node_id, mine))
+                released = [row[0] for row in cursor.fetchall()]
+
+                # Tomar o renovar los propios: libres, ya arrendados por este
+                # nodo o con lease vencido (huérfanos de un nodo muerto)
+                cursor.execute("""
+                    UPDATE scrape_shards
+                    SET epoch = epoch + CASE WHEN owner IS DISTINCT FROM %s OR lease_until < NOW() THEN 1 ELSE 0 END,
+                        owner = %s,
+                        lease_until = NOW() + make_interval(secs => %s)
+                    WHERE shard_id = ANY(%s)
+                      AND (owner IS NULL OR owner = %s OR lease_until < NOW())
+                    RETURNING shard_id, epoch
+                """, (self.node_id, self.node_id, self.lease_seconds, mine, self.node_id))
+                leased = dict(cursor.fetchall())
+                conn.commit()
+
+        with self._lock:
+            previous = set(self._owned)
+            self._owned = leased
+        self._log_changes(previous, set(leased), released, len(live_nodes), len(mine))
+        return dict(leased)
+
+    def _log_changes(self, previous: Set[int], current: Set[int], released: List[int],
+                     live_nodes: int, assigned: int) -> None:
+        acquired = current - previous
+        if acquired or released:
+            logger.info(f"Nodo {self.node_id}: {live_nodes} nodos vivos, {len(current)}/{assigned} shards "
+                        f"(+{len(acquired)} tomados, -{len(released)} liberados)")
+        if len(current) < assigned:
+            logger.info(f"Nodo {self.node_id}: {assigned - len(current)} shards aún en manos de otro nodo")
+
+    def leave(self) -> None:
+        """Baja ordenada: libera los shards para que otro nodo los tome sin esperar al TTL."""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("UPDATE scrape_shards SET owner = NULL, lease_until = NULL WHERE owner = %s",
+                               (self.node_id,))
+                cursor.execute("DELETE FROM scrape_nodes WHERE node_id = %s", (self.node_id,))
+                conn.commit()
+        with self._lock:
+            self._owned = {}
+        logger.info(f"Nodo {self.node_id}: shards liberados")
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        return f"Nodo {self.node_id}: {len(self.owned)}/{self.num_shards} shards arrendados"
+
+class FencedDatabase:
+    """
+    PriceDatabase que sólo guarda precios mientras el nodo tenga el lease del shard.
+
+    El resto de los métodos se delega tal cual a la BD envuelta.
+    """
+
+    def __init__(self, db, coordinator: ShardCoordinator):
+        self._db = db
+        self._coordinator = coordinator
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def save_price(self, url: str, name: str, official_price: float, discounted_price: Optional[float] = None) -> None:
+        """
+        Guarda el precio en la misma transacción que valida (y renueva) el lease.
+
+        Raises:
+            LeaseLostError: si el shard de la URL ya no es de este nodo
+        """
+        coordinator = self._coordinator
+        shard = shard_for(url, coordinator.num_shards)
+        epoch = coordinator.epoch_for(shard)
+        if epoch is None:
+            raise LeaseLostError(f"Shard {shard} no arrendado por {coordinator.node_id}: {url}")
+
+        with self._db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                # Bloquea la fila del shard hasta el commit: nadie lo toma a mitad de la escritura
+                cursor.execute("""
+                    UPDATE scrape_shards SET lease_until = NOW() + make_interval(secs => %s)
+                    WHERE shard_id = %s AND owner = %s AND epoch = %s AND lease_until > NOW()
+                    RETURNING shard_id
+                """, (coordinator.lease_seconds, shard, coordinator.node_id, epoch))
+                if cursor.fetchone() is None:
+                    conn.rollback()
+                    coordinator.forget(shard)
+                    raise LeaseLostError(f"Lease del shard {shard} perdido, precio descartado: {url}")
+
+                if self._db._insert_price(cursor, url, name, official_price, discounted_price):
+                    conn.commit()
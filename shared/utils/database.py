@@ -3,14 +3,89 @@ Utilidades para manejo de base de datos PostgreSQL.
 """
 
 import os
+import time
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
+from functools import lru_cache
+from psycopg2.extras import RealDictCursor, execute_values
 from datetime import datetime
 from typing import Optional, List, Tuple, Dict
 import logging
 
+from shared.utils.metrics import DB_CONNECTIONS_OPENED, DB_QUERY_SECONDS
+
 logger = logging.getLogger(__name__)
 
+# Filas por sentencia en los INSERT masivos de sync_catalog
+CATALOG_PAGE_SIZE = 1000
+
+def flatten_catalog(product_configs: List[Dict]) -> Tuple[List[Tuple], List[Tuple], List[Tuple]]:
+    """
+    Aplana la jerarquía de products.yml en filas sin duplicados.
+    
+    Returns:
+        (productos (name, alias), presentaciones (alias, size, unit_count),
+        tiendas (alias, size, store_name, url)); ante repetidos gana el primero
+    """
+    products: Dict[str, Tuple] = {}
+    presentations: Dict[Tuple[str, str], Tuple] = {}
+    stores: Dict[str, Tuple] = {}
+    
+    for product in product_configs:
+        alias = product['alias']
+        products.setdefault(alias, (product['name'], alias))
+        for presentation in product['presentations']:
+            size = presentation['size']
+            presentations.setdefault((alias, size), (alias, size, presentation['unit_count']))
+            for store in presentation['stores']:
+                stores.setdefault(store['url'], (alias, size, store['name'], store['url']))
+    
+    return list(products.values()), list(presentations.values()), list(stores.values())
+
+# Sentencias que se distinguen en las métricas; el resto cuenta como 'other'
+SQL_OPERATIONS = ('select', 'insert', 'update', 'delete', 'create', 'with', 'savepoint', 'release', 'rollback')
+
+def sql_operation(query) -> str:
+    """Primera palabra de la sentencia (select, insert...), para etiquetar métricas."""
+    if isinstance(query, bytes):
+        query = query[:32].decode('utf-8', errors='ignore')
+    elif not isinstance(query, str):
+        # psycopg2.sql.Composed y similares
+        return 'other'
+    words = query.lstrip().split(None, 1)
+    operation = words[0].lower() if words else ''
+    return operation if operation in SQL_OPERATIONS else 'other'
+
+@lru_cache(maxsize=None)
+def _timed_cursor_class(base):
+    """Subclase del cursor `base` que mide cada execute en db_query_duration_seconds."""
+    class TimedCursor(base):
+        def execute(self, query, vars=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                DB_QUERY_SECONDS.labels(operation=sql_operation(query)).observe(time.perf_counter() - started)
+
+        def executemany(self, query, vars_list):
+            started = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                DB_QUERY_SECONDS.labels(operation=sql_operation(query)).observe(time.perf_counter() - started)
+
+    TimedCursor.__name__ = f"Timed{base.__name__}"
+    return TimedCursor
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Conexión cuyos cursores (también RealDictCursor) miden sus consultas."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
 class PriceDatabase:
     """Maneja las operaciones de base de datos para el sistema de precios."""
     
@@ -30,12 +105,14 @@ class PriceDatabase:
     
     def get_connection(self):
         """Obtiene una conexión a la base de datos."""
+        DB_CONNECTIONS_OPENED.inc()
         return psycopg2.connect(
             host=self.host,
             port=self.port,
             database=self.database,
             user=self.username,
-            password=self.password
+            password=self.password,
+            connection_factory=TimedConnection
         )
     
     def _create_tables(self) -> None:
@@ -99,6 +176,29 @@ class PriceDatabase:
                         ON prices(store_id, timestamp DESC)
                     """)
                     
+                    # Hash de la configuración de cada producto en la última sincronización
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS catalog_state (
+                            alias TEXT PRIMARY KEY,
+                            config_hash TEXT NOT NULL,
+                            synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    
+                    # Una presentación por (producto, tamaño): lo necesita el ON CONFLICT de sync_catalog
+                    cursor.execute("SAVEPOINT presentations_unique")
+                    try:
+                        cursor.execute("""
+                            CREATE UNIQUE INDEX IF NOT EXISTS idx_presentations_product_size
+                            ON presentations(product_id, size)
+                        """)
+                        self.presentations_unique = True
+                    except psycopg2.IntegrityError:
+                        cursor.execute("ROLLBACK TO SAVEPOINT presentations_unique")
+                        self.presentations_unique = False
+                        logger.warning("Hay presentaciones duplicadas (mismo producto y tamaño); "
+                                       "sync_catalog usará la sincronización fila por fila")
+                    
                     conn.commit()
                     logger.info("Tablas de base de datos creadas/verificadas exitosamente")
         except Exception as e:
@@ -107,49 +207,59 @@ class PriceDatabase:
     
     def save_price(self, url: str, name: str, official_price: float, discounted_price: Optional[float] = None) -> None:
         """Guarda un precio en la base de datos."""
-        timestamp = datetime.now()
-        
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Obtener store_id de la URL
-                    cursor.execute("SELECT id, presentation_id FROM stores WHERE url = %s", (url,))
-                    store_result = cursor.fetchone()
-                    
-                    if not store_result:
-                        logger.error(f"URL no encontrada en stores: {url}")
-                        return
-                    
-                    store_id, presentation_id = store_result
-                    
-                    # Obtener unit_count para calcular precio por unidad
-                    cursor.execute("SELECT unit_count FROM presentations WHERE id = %s", (presentation_id,))
-                    unit_count_result = cursor.fetchone()
-                    if not unit_count_result:
-                        logger.error(f"Presentación no encontrada: {presentation_id}")
-                        return
-                    
-                    unit_count = unit_count_result[0]
-                    
-                    # Calcular precio por unidad (usar precio con descuento si existe)
-                    effective_price = discounted_price if discounted_price else official_price
-                    price_per_unit = effective_price / unit_count
-                    
-                    # Insertar precio
-                    cursor.execute("""
-                        INSERT INTO prices (store_id, product_name, official_price, discounted_price, price_per_unit, timestamp)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (store_id, name, official_price, discounted_price, price_per_unit, timestamp))
-                    
-                    if discounted_price:
-                        logger.info(f"Precio guardado: {name} - Oficial: ${official_price:,.0f}, Con descuento: ${discounted_price:,.0f}, Por unidad: ${price_per_unit:,.0f}")
-                    else:
-                        logger.info(f"Precio guardado: {name} - ${official_price:,.0f}, Por unidad: ${price_per_unit:,.0f}")
-                        
-                    conn.commit()
+                    if self._insert_price(cursor, url, name, official_price, discounted_price):
+                        conn.commit()
         except Exception as e:
             logger.warning(f"Error guardando precio para {url}: {e}")
     
+    def _insert_price(self, cursor, url: str, name: str, official_price: float,
+                      discounted_price: Optional[float] = None) -> bool:
+        """
+        Inserta un precio usando el cursor recibido, sin hacer commit.
+        
+        Permite guardar el precio dentro de una transacción más amplia (ver
+        shared/utils/coordination.py). Retorna False si la URL no está registrada.
+        """
+        timestamp = datetime.now()
+        
+        # Obtener store_id de la URL
+        cursor.execute("SELECT id, presentation_id FROM stores WHERE url = %s", (url,))
+        store_result = cursor.fetchone()
+        
+        if not store_result:
+            logger.error(f"URL no encontrada en stores: {url}")
+            return False
+        
+        store_id, presentation_id = store_result
+        
+        # Obtener unit_count para calcular precio por unidad
+        cursor.execute("SELECT unit_count FROM presentations WHERE id = %s", (presentation_id,))
+        unit_count_result = cursor.fetchone()
+        if not unit_count_result:
+            logger.error(f"Presentación no encontrada: {presentation_id}")
+            return False
+        
+        unit_count = unit_count_result[0]
+        
+        # Calcular precio por unidad (usar precio con descuento si existe)
+        effective_price = discounted_price if discounted_price else official_price
+        price_per_unit = effective_price / unit_count
+        
+        # Insertar precio
+        cursor.execute("""
+            INSERT INTO prices (store_id, product_name, official_price, discounted_price, price_per_unit, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (store_id, name, official_price, discounted_price, price_per_unit, timestamp))
+        
+        if discounted_price:
+            logger.info(f"Precio guardado: {name} - Oficial: ${official_price:,.0f}, Con descuento: ${discounted_price:,.0f}, Por unidad: ${price_per_unit:,.0f}")
+        else:
+            logger.info(f"Precio guardado: {name} - ${official_price:,.0f}, Por unidad: ${price_per_unit:,.0f}")
+        return True
+    
     def get_or_create_product(self, name: str, alias: str) -> int:
         """Obtiene o crea un producto y retorna su ID."""
         try:
@@ -240,6 +350,109 @@ class PriceDatabase:
             logger.error(f"Error configurando jerarquía para {product_config.get('name', 'unknown')}: {e}")
             raise
     
+    def get_catalog_hashes(self) -> Dict[str, str]:
+        """Hash de configuración registrado por alias en la última sincronización del catálogo."""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT alias, config_hash FROM catalog_state")
+                    return dict(cursor.fetchall())
+        except Exception as e:
+            # Sin hashes se sincroniza todo el catálogo
+            logger.error(f"Error obteniendo hashes del catálogo: {e}")
+            return {}
+    
+    def sync_catalog(self, product_configs: List[Dict], hashes: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        """
+        Sincroniza todo products.yml con la BD en una sola transacción.
+        
+        En vez de un get_or_create (con su propia conexión) por fila, hace un
+        upsert masivo por nivel de la jerarquía y lee los IDs de vuelta, así
+        que el costo no crece con una conexión por URL. Las filas existentes
+        se actualizan si cambió algo editable en products.yml (nombre del
+        producto, unit_count, nombre de la tienda o la presentación de una
+        URL): el hash del producto se registra en la misma transacción, así
+        que una edición que no se aplicara no se volvería a intentar.
+        
+        Args:
+            product_configs: Productos de products.yml a sincronizar
+            hashes: Hash de configuración por alias, a registrar en la misma
+                    transacción (ver shared/utils/config_cache.py)
+        
+        Returns:
+            Cantidad de productos, presentaciones y tiendas nuevas y actualizadas
+            ('products', 'presentations', 'stores' y 'updated_products'...)
+        """
+        if not self.presentations_unique:
+            for product_config in product_configs:
+                self.setup_product_hierarchy(product_config)
+            return {}
+        
+        products, presentations, stores = flatten_catalog(product_configs)
+        
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    # RETURNING sólo trae las filas insertadas o modificadas;
+                    # xmax = 0 distingue las insertadas
+                    changed_products = execute_values(cursor, """
+                        INSERT INTO products (name, alias) VALUES %s
+                        ON CONFLICT (alias) DO UPDATE SET name = EXCLUDED.name
+                        WHERE products.name IS DISTINCT FROM EXCLUDED.name
+                        RETURNING (xmax = 0)
+                    """, products, page_size=CATALOG_PAGE_SIZE, fetch=True)
+                    
+                    cursor.execute("SELECT alias, id FROM products WHERE alias = ANY(%s)",
+                                   ([alias for _, alias in products],))
+                    product_ids = dict(cursor.fetchall())
+                    
+                    changed_presentations = execute_values(cursor, """
+                        INSERT INTO presentations (product_id, size, unit_count) VALUES %s
+                        ON CONFLICT (product_id, size) DO UPDATE SET unit_count = EXCLUDED.unit_count
+                        WHERE presentations.unit_count IS DISTINCT FROM EXCLUDED.unit_count
+                        RETURNING (xmax = 0)
+                    """, [(product_ids[alias], size, unit_count) for alias, size, unit_count in presentations],
+                        page_size=CATALOG_PAGE_SIZE, fetch=True)
+                    
+                    cursor.execute("SELECT product_id, size, id FROM presentations WHERE product_id = ANY(%s)",
+                                   (list(product_ids.values()),))
+                    presentation_ids = {(product_id, size): pid for product_id, size, pid in cursor.fetchall()}
+                    
+                    changed_stores = execute_values(cursor, """
+                        INSERT INTO stores (presentation_id, store_name, url) VALUES %s
+                        ON CONFLICT (url) DO UPDATE
+                        SET presentation_id = EXCLUDED.presentation_id, store_name = EXCLUDED.store_name
+                        WHERE (stores.presentation_id, stores.store_name)
+                              IS DISTINCT FROM (EXCLUDED.presentation_id, EXCLUDED.store_name)
+                        RETURNING (xmax = 0)
+                    """, [(presentation_ids[(product_ids[alias], size)], store_name, url)
+                          for alias, size, store_name, url in stores],
+                        page_size=CATALOG_PAGE_SIZE, fetch=True)
+                    
+                    if hashes:
+                        execute_values(cursor, """
+                            INSERT INTO catalog_state (alias, config_hash) VALUES %s
+                            ON CONFLICT (alias) DO UPDATE
+                            SET config_hash = EXCLUDED.config_hash, synced_at = CURRENT_TIMESTAMP
+                        """, list(hashes.items()), page_size=CATALOG_PAGE_SIZE)
+                    
+                    conn.commit()
+        except Exception as e:
+            logger.error(f"Error sincronizando el catálogo: {e}")
+            raise
+        
+        created = {}
+        for level, rows in (('products', changed_products), ('presentations', changed_presentations),
+                            ('stores', changed_stores)):
+            inserted = sum(1 for (is_new,) in rows if is_new)
+            created[level] = inserted
+            created[f'updated_{level}'] = len(rows) - inserted
+        logger.info(f"Catálogo sincronizado: {len(products)} productos, {len(presentations)} presentaciones, "
+                    f"{len(stores)} URLs ({created['products']}/{created['presentations']}/{created['stores']} nuevas, "
+                    f"{created['updated_products']}/{created['updated_presentations']}/{created['updated_stores']} "
+                    f"actualizadas)")
+        return created
+    
     def get_last_price(self, url: str) -> Optional[float]:
         """Obtiene el último precio oficial registrado para una URL."""
         try:
@@ -476,3 +689,93 @@ class PriceDatabase:
         except Exception as e:
             logger.error(f"Error obteniendo historial de precios para {product_alias}: {e}")
             return []
+
+    def get_price_change_stats(self, days: int = 30) -> Optional[List[Dict]]:
+        """
+        Estadísticas de cambio de precio por URL en los últimos `days` días.
+        
+        Usa LAG sobre el precio efectivo (con descuento si existe) para contar
+        cuántas mediciones cambiaron respecto a la anterior de la misma tienda.
+        
+        Returns:
+            Lista de dicts con url, samples, changes, first_seen, last_scraped,
+            last_price y min_price; None si la consulta falló (una lista vacía
+            significa que no hay historial)
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute("""
+                        WITH ordered AS (
+                            SELECT
+                                s.url,
+                                p.timestamp,
+                                COALESCE(p.discounted_price, p.official_price) AS effective_price,
+                                LAG(COALESCE(p.discounted_price, p.official_price))
+                                    OVER (PARTITION BY p.store_id ORDER BY p.timestamp) AS previous_price
+                            FROM prices p
+                            JOIN stores s ON p.store_id = s.id
+                            WHERE p.timestamp >= NOW() - make_interval(days => %s)
+                        )
+                        SELECT
+                            url,
+                            COUNT(*) AS samples,
+                            COUNT(*) FILTER (
+                                WHERE previous_price IS NOT NULL AND effective_price <> previous_price
+                            ) AS changes,
+                            MIN(timestamp) AS first_seen,
+                            MAX(timestamp) AS last_scraped,
+                            (ARRAY_AGG(effective_price ORDER BY timestamp DESC))[1] AS last_price,
+                            MIN(effective_price) AS min_price
+                        FROM ordered
+                        GROUP BY url
+                    """, (days,))
+                    
+                    return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error obteniendo estadísticas de cambio de precios: {e}")
+            return None
+
+class InMemoryPriceDatabase:
+    """
+    BD descartable para las corridas `--replay` (ver shared/utils/snapshots.py).
+    
+    Implementa sólo lo que usa el scraper (catálogo, último precio, historial
+    y guardado), en memoria y segura entre hilos: reproducir snapshots no debe
+    mezclar precios viejos con el historial real. Los precios se pierden al
+    terminar el proceso.
+    """
+    
+    def __init__(self):
+        self.catalog_hashes: Dict[str, str] = {}
+        self.prices: Dict[str, List[Tuple]] = {}
+        self._lock = threading.Lock()
+    
+    def get_catalog_hashes(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.catalog_hashes)
+    
+    def sync_catalog(self, product_configs: List[Dict], hashes: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        with self._lock:
+            self.catalog_hashes.update(hashes or {})
+        return {}
+    
+    def save_price(self, url: str, name: str, official_price: float, discounted_price: Optional[float] = None) -> None:
+        with self._lock:
+            # Mismas columnas que get_price_history de PriceDatabase, sin precio por unidad
+            self.prices.setdefault(url, []).insert(
+                0, (name, official_price, discounted_price, None, datetime.now())
+            )
+    
+    def get_last_price(self, url: str) -> Optional[float]:
+        with self._lock:
+            history = self.prices.get(url)
+            return float(history[0][1]) if history else None
+    
+    def get_price_history(self, url: str, limit: int = 10) -> List[Tuple]:
+        with self._lock:
+            return list(self.prices.get(url, [])[:limit])
+    
+    def get_price_change_stats(self, days: int = 30) -> Optional[List[Dict]]:
+        # Sin historial real: la programación adaptativa usa su cadencia de respaldo
+        return None
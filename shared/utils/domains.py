@@ -0,0 +1,32 @@
+"""
+Utilidades para normalizar dominios a partir de URLs.
+"""
+
+from typing import List
+from urllib.parse import urlparse
+
+def normalize_domain(url_or_host: str) -> str:
+    """
+    Normaliza el dominio de una URL (o de un host) para usarlo como clave.
+
+    Ejemplos:
+        "https://www.alkosto.com/p/123" -> "alkosto.com"
+        "WWW.Alkosto.com:443" -> "alkosto.com"
+    """
+    value = url_or_host.strip().lower()
+    host = urlparse(value).hostname if "://" in value else value.split("/")[0].split(":")[0]
+    host = (host or "").rstrip(".")
+
+    if host.startswith("www."):
+        host = host[4:]
+
+    return host
+
+def domain_candidates(domain: str) -> List[str]:
+    """
+    Retorna el dominio y sus sufijos, del más específico al más general.
+
+    "m.tienda.alkosto.com" -> ["m.tienda.alkosto.com", "tienda.alkosto.com", "alkosto.com"]
+    """
+    labels = domain.split(".")
+    return [".".join(labels[i:]) for i in range(max(1, len(labels) - 1))]
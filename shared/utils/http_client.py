@@ -0,0 +1,49 @@
+"""
+Cliente HTTP con pool de conexiones para el camino rápido (sin navegador).
+
+Cada hilo usa su propia `requests.Session` (las sesiones no son seguras
+entre hilos), y cada sesión reutiliza conexiones keep-alive por host.
+"""
+
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+}
+
+# Timeout de las peticiones HTTP en segundos
+HTTP_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', '10'))
+
+_local = threading.local()
+
+def get_session() -> requests.Session:
+    """Retorna la sesión HTTP del hilo actual (creándola la primera vez)."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        # Sin reintentos aquí: si falla, el llamador cae al navegador
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+def fetch_html(url: str, timeout: float = HTTP_TIMEOUT) -> str:
+    """
+    Descarga el HTML de una URL.
+
+    Raises:
+        requests.RequestException: Si la petición falla o el status no es 2xx
+    """
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.text
@@ -0,0 +1,216 @@
+"""
+Métricas de Prometheus (prometheus_client) para la app web y el scraper.
+
+La app web las expone en `/metrics`. Con gunicorn se usa el modo
+multiproceso de prometheus_client: app/gunicorn.conf.py define
+PROMETHEUS_MULTIPROC_DIR, cada worker escribe sus valores ahí y `/metrics`
+devuelve la suma de todos, responda el worker que responda.
+
+El scraper las exporta al terminar cada corrida (archivo para el textfile
+collector de node_exporter y/o Pushgateway) o, en el daemon, con un
+servidor HTTP propio. Los procesos de `--workers` mandan un snapshot de
+sus contadores e histogramas al padre, que los suma con `merge`.
+
+Variables de entorno del scraper:
+    SCRAPER_METRICS_TEXTFILE     archivo .prom donde escribir las métricas
+    SCRAPER_METRICS_PUSHGATEWAY  URL del Pushgateway (http://pushgateway:9091)
+    SCRAPER_METRICS_JOB          job con el que se empujan (price_alarm_scraper)
+    SCRAPER_METRICS_PORT         puerto del endpoint /metrics del daemon (0 = sin servidor)
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    disable_created_metrics, generate_latest, multiprocess, push_to_gateway,
+    start_http_server, write_to_textfile,
+)
+from prometheus_client.core import Metric
+
+from shared.utils.domains import normalize_domain
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Las series *_created no se pueden sumar entre procesos
+disable_created_metrics()
+
+# Etapas de scraping: de milisegundos (BD) a decenas de segundos (navegación)
+SCRAPE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+METRICS_TEXTFILE = os.getenv('SCRAPER_METRICS_TEXTFILE')
+PUSHGATEWAY_URL = os.getenv('SCRAPER_METRICS_PUSHGATEWAY')
+METRICS_JOB = os.getenv('SCRAPER_METRICS_JOB', 'price_alarm_scraper')
+METRICS_PORT = int(os.getenv('SCRAPER_METRICS_PORT', '0'))
+
+# App web
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones a la app web',
+    ('method', 'route', 'status')
+)
+
+# Base de datos (app y scraper)
+DB_QUERY_SECONDS = Histogram(
+    'db_query_duration_seconds', 'Duración de las consultas a PostgreSQL', ('operation',)
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total', 'Conexiones abiertas a PostgreSQL (una por operación de PriceDatabase)'
+)
+
+# Scraper
+SCRAPER_ATTEMPTS = Counter(
+    'scraper_attempts_total', 'Intentos de scraping por dominio y resultado (ok/error)', ('domain', 'result')
+)
+SCRAPER_STAGE_SECONDS = Histogram(
+    'scraper_stage_duration_seconds', 'Duración de cada etapa del scraping de una URL (ver shared/utils/timing.py)',
+    ('domain', 'stage'), buckets=SCRAPE_BUCKETS
+)
+SCRAPER_RUN_SECONDS = Gauge(
+    'scraper_last_run_duration_seconds', 'Duración de la última corrida', multiprocess_mode='mostrecent'
+)
+SCRAPER_RUN_URLS = Gauge(
+    'scraper_last_run_urls', 'URLs de la última corrida por resultado', ('result',), multiprocess_mode='mostrecent'
+)
+SCRAPER_RUN_FINISHED = Gauge(
+    'scraper_last_run_timestamp_seconds', 'Momento (epoch) en que terminó la última corrida',
+    multiprocess_mode='mostrecent'
+)
+ALERTS_SENT = Counter('alerts_sent_total', 'Alertas de precio enviadas por Telegram', ('result',))
+BROWSER_RESTARTS = Counter('browser_restarts_total', 'Reinicios del navegador persistente por caídas')
+BROWSER_RECYCLES = Counter('browser_recycles_total', 'Reciclados preventivos del navegador (memoria o navegaciones)')
+BROWSER_PAGES_IN_USE = Gauge(
+    'browser_pages_in_use', 'Páginas del pool del motor asíncrono ocupadas', multiprocess_mode='livesum'
+)
+
+# Pipeline por etapas (scraper/pipeline.py)
+PIPELINE_QUEUE_DEPTH = Gauge(
+    'scraper_pipeline_queue_depth', 'URLs esperando en la cola de entrada de cada etapa del pipeline', ('stage',),
+    multiprocess_mode='livesum'
+)
+PIPELINE_BUSY_SECONDS = Counter(
+    'scraper_pipeline_busy_seconds_total', 'Tiempo trabajando de las tareas de cada etapa del pipeline', ('stage',)
+)
+PIPELINE_BLOCKED_SECONDS = Counter(
+    'scraper_pipeline_blocked_seconds_total',
+    'Tiempo que cada etapa esperó lugar en la cola de la siguiente (contrapresión)', ('stage',)
+)
+PIPELINE_UTILIZATION = Gauge(
+    'scraper_pipeline_utilization', 'Fracción del tiempo ocupada de cada etapa en la última corrida', ('stage',),
+    multiprocess_mode='mostrecent'
+)
+
+# Muestras sumadas desde otros procesos: familia -> (muestra, etiquetas) -> valor
+Snapshot = Dict[str, Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]]
+
+_merged: Snapshot = {}
+_merged_lock = threading.Lock()
+
+def snapshot(registry: CollectorRegistry = REGISTRY) -> Snapshot:
+    """Contadores e histogramas del proceso, serializables para otro proceso."""
+    values: Snapshot = {}
+    for family in registry.collect():
+        if family.type not in ('counter', 'histogram'):
+            continue
+        samples = values.setdefault(family.name, {})
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return values
+
+def merge(values: Snapshot) -> None:
+    """Suma el snapshot de otro proceso (ver scraper/workers.py)."""
+    with _merged_lock:
+        for name, samples in values.items():
+            merged = _merged.setdefault(name, {})
+            for key, value in samples.items():
+                merged[key] = merged.get(key, 0.0) + value
+
+def reset_merged() -> None:
+    """Descarta lo sumado desde otros procesos."""
+    with _merged_lock:
+        _merged.clear()
+
+class _MergedCollector:
+    """Las métricas de `registry` más lo sumado con `merge`."""
+
+    def __init__(self, registry: CollectorRegistry):
+        self.registry = registry
+
+    def collect(self):
+        with _merged_lock:
+            merged = {name: dict(samples) for name, samples in _merged.items()}
+        for family in self.registry.collect():
+            extra = merged.get(family.name)
+            if not extra:
+                yield family
+                continue
+            values = {(s.name, tuple(sorted(s.labels.items()))): s.value for s in family.samples}
+            for key, value in extra.items():
+                values[key] = values.get(key, 0.0) + value
+            combined = Metric(family.name, family.documentation, family.type, family.unit)
+            for (sample_name, labels), value in values.items():
+                combined.add_sample(sample_name, dict(labels), value)
+            yield combined
+
+_LOCAL_REGISTRY = CollectorRegistry(auto_describe=False)
+_LOCAL_REGISTRY.register(_MergedCollector(REGISTRY))
+
+def exposition_registry() -> CollectorRegistry:
+    """
+    Registro a exponer. Con PROMETHEUS_MULTIPROC_DIR (gunicorn), el agregado de
+    todos los procesos; si no, el del proceso con lo sumado de sus workers.
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return _LOCAL_REGISTRY
+
+def render(registry: Optional[CollectorRegistry] = None) -> bytes:
+    """Métricas en el formato de exposición de texto de Prometheus."""
+    return generate_latest(registry or exposition_registry())
+
+def record_attempt(url: str, ok: bool) -> None:
+    """Cuenta un intento de scraping de la URL."""
+    SCRAPER_ATTEMPTS.labels(domain=normalize_domain(url), result='ok' if ok else 'error').inc()
+
+def record_run(stats) -> None:
+    """Publica los totales de una corrida terminada (RunStats)."""
+    SCRAPER_RUN_SECONDS.set(stats.elapsed)
+    SCRAPER_RUN_URLS.labels(result='succeeded').set(stats.succeeded)
+    SCRAPER_RUN_URLS.labels(result='failed').set(stats.failed)
+    SCRAPER_RUN_URLS.labels(result='handed_off').set(stats.handed_off)
+    SCRAPER_RUN_FINISHED.set(time.time())
+
+def export_metrics(registry: Optional[CollectorRegistry] = None) -> None:
+    """
+    Exporta las métricas del scraper según el entorno: archivo .prom y/o
+    Pushgateway. Los errores sólo se registran: no deben hacer fallar la corrida.
+    """
+    registry = registry or exposition_registry()
+    if METRICS_TEXTFILE:
+        try:
+            Path(METRICS_TEXTFILE).parent.mkdir(parents=True, exist_ok=True)
+            # Escribe en un temporal y lo renombra: node_exporter no ve archivos a medias
+            write_to_textfile(METRICS_TEXTFILE, registry)
+        except OSError as e:
+            logger.warning(f"No se pudieron escribir las métricas en {METRICS_TEXTFILE}: {e}")
+
+    if PUSHGATEWAY_URL:
+        try:
+            push_to_gateway(PUSHGATEWAY_URL, job=METRICS_JOB, registry=registry,
+                            grouping_key={'instance': socket.gethostname()}, timeout=10)
+        except Exception as e:
+            logger.warning(f"No se pudieron enviar las métricas al Pushgateway: {e}")
+
+def start_http_exporter(port: int, registry: Optional[CollectorRegistry] = None, host: str = '0.0.0.0'):
+    """Sirve `/metrics` en un hilo aparte (para el daemon, que no termina)."""
+    server, _ = start_http_server(port, addr=host, registry=registry or exposition_registry())
+    logger.info(f"Métricas disponibles en http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,128 @@
+"""
+Limitador de peticiones por dominio basado en token bucket.
+
+Cada dominio tiene su propio bucket con una tasa de recarga (peticiones por
+segundo) y una ráfaga máxima. Los límites se configuran por tienda en la
+sección `rate_limits` de products.yml; los dominios sin entrada propia usan
+el límite `default`.
+"""
+
+import time
+import asyncio
+import threading
+import logging
+from typing import Callable, Dict, Optional
+
+from shared.utils.domains import normalize_domain, domain_candidates
+
+logger = logging.getLogger(__name__)
+
+# Equivalente a la pausa fija de 2 segundos entre productos
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 1
+
+class TokenBucket:
+    """Token bucket con recarga continua. Seguro para uso desde varios hilos."""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        if burst < 1:
+            raise ValueError("burst debe ser al menos 1")
+
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self) -> float:
+        """
+        Intenta tomar un token sin bloquear.
+
+        Returns:
+            0.0 si se tomó el token; si no, los segundos que faltan para el próximo
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Toma un token, durmiendo el hilo si hace falta."""
+        while (wait := self.try_acquire()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Toma un token sin bloquear el event loop."""
+        while (wait := self.try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+class DomainRateLimiter:
+    """Mantiene un TokenBucket por dominio."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None,
+                 default: Optional[Dict] = None, scale: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            limits: {dominio: {'rate': float, 'burst': int}}
+            default: Límite para dominios sin entrada propia
+            scale: Factor aplicado a todas las tasas (p. ej. 1/N con N procesos
+                   compartiendo el mismo dominio)
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self._limits = {normalize_domain(domain): spec for domain, spec in (limits or {}).items()}
+        self._default = default or {'rate': DEFAULT_RATE, 'burst': DEFAULT_BURST}
+        self._scale = scale
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict], scale: float = 1.0) -> "DomainRateLimiter":
+        """Construye el limitador desde la sección `rate_limits` de products.yml."""
+        config = dict(config or {})
+        default = config.pop('default', None)
+        return cls(limits=config, default=default, scale=scale)
+
+    def _spec_for(self, domain: str) -> Dict:
+        for candidate in domain_candidates(domain):
+            if candidate in self._limits:
+                return self._limits[candidate]
+        return self._default
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """Retorna (creándolo si hace falta) el bucket del dominio de la URL."""
+        domain = normalize_domain(url)
+
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                spec = self._spec_for(domain)
+                rate = float(spec.get('rate', DEFAULT_RATE)) * self._scale
+                burst = int(spec.get('burst', DEFAULT_BURST))
+                bucket = TokenBucket(rate, burst, clock=self._clock)
+                self._buckets[domain] = bucket
+                logger.debug(f"Rate limit para {domain}: {rate:.2f} req/s, ráfaga {burst}")
+            return bucket
+
+    def try_acquire(self, url: str) -> float:
+        """Intenta tomar un token para la URL; retorna la espera restante (0 si pudo)."""
+        return self.bucket_for(url).try_acquire()
+
+    def acquire(self, url: str) -> None:
+        """Toma un token para la URL bloqueando el hilo si hace falta."""
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url: str) -> None:
+        """Toma un token para la URL sin bloquear el event loop."""
+        await self.bucket_for(url).acquire_async()
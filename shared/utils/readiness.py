@@ -0,0 +1,212 @@
+"""
+Condición de "página lista" adaptativa.
+
+`wait_until="networkidle"` espera a que no haya tráfico de red, y en tiendas
+llenas de trackers eso suele tardar casi todo el timeout aunque el precio se
+pintó mucho antes. En su lugar se navega hasta DOMContentLoaded y se espera
+al primer selector de precio que declare el adaptador (`READINESS`), con un
+timeout aprendido por dominio a partir de los tiempos observados. Los
+tiempos se guardan en un JSON local al terminar cada corrida, así que una
+corrida corta (el cron horario) sigue aprendiendo de las anteriores.
+
+Configuración por entorno:
+    SCRAPER_READINESS: 'adaptive' (por defecto) o 'networkidle' (comportamiento anterior)
+    SCRAPER_READY_TIMEOUT: timeout máximo de espera del precio, en segundos
+    SCRAPER_READY_MIN_TIMEOUT: piso del timeout aprendido, en segundos
+    SCRAPER_READINESS_PATH: archivo donde se guardan los tiempos (db/readiness.json)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from shared.utils.domains import normalize_domain
+
+logger = logging.getLogger(__name__)
+
+READINESS_MODE = os.getenv('SCRAPER_READINESS', 'adaptive').lower()
+MAX_READY_TIMEOUT = float(os.getenv('SCRAPER_READY_TIMEOUT', '15'))
+MIN_READY_TIMEOUT = float(os.getenv('SCRAPER_READY_MIN_TIMEOUT', '3'))
+DEFAULT_SAMPLES_PATH = Path(os.getenv('SCRAPER_READINESS_PATH', 'db/readiness.json'))
+
+# Timeout de la navegación misma (hasta DOMContentLoaded o networkidle), en ms
+NAVIGATION_TIMEOUT_MS = 30000
+
+# Muestras necesarias antes de confiar en el timeout aprendido
+MIN_SAMPLES = 5
+# Margen sobre el p95 observado
+TIMEOUT_MARGIN = 1.5
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class ReadinessTracker:
+    """
+    Tiempos hasta el precio por dominio y el timeout que se deriva de ellos.
+
+    Con `path`, las últimas `window` muestras de cada dominio se cargan al
+    crearlo y se guardan con `save`; sin él, sólo viven en memoria.
+    """
+
+    def __init__(self, max_timeout: float = MAX_READY_TIMEOUT, min_timeout: float = MIN_READY_TIMEOUT,
+                 window: int = 50, path: Optional[Path] = None):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.window = window
+        self.path = Path(path) if path else None
+        self._samples: Dict[str, Deque[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                samples = json.load(f).get('samples', {})
+            self._samples = {
+                domain: deque((float(s) for s in values), maxlen=self.window)
+                for domain, values in samples.items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"No se pudieron leer los tiempos hasta el precio {self.path}: {e}")
+
+    def save(self) -> None:
+        """Guarda las muestras en disco (reemplazo atómico del archivo)."""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Un temporal por proceso: varios workers pueden guardar a la vez
+            tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+            with self._lock:
+                samples = {domain: list(values) for domain, values in self._samples.items()}
+            tmp_path.write_text(json.dumps({'samples': samples}, indent=1), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar los tiempos hasta el precio {self.path}: {e}")
+
+    def timeout_for(self, url: str, max_timeout: Optional[float] = None) -> float:
+        """
+        Timeout (segundos) para esperar el precio en este dominio.
+
+        Con pocas muestras usa el máximo; después, el p95 observado con margen,
+        acotado entre el mínimo y el máximo.
+        """
+        ceiling = max_timeout or self.max_timeout
+        samples = self._samples.get(normalize_domain(url))
+        if not samples or len(samples) < MIN_SAMPLES:
+            return ceiling
+        learned = _percentile(samples, 0.95) * TIMEOUT_MARGIN
+        return max(self.min_timeout, min(ceiling, learned))
+
+    def record(self, url: str, seconds: float) -> None:
+        """Registra el tiempo hasta el precio de una URL."""
+        domain = normalize_domain(url)
+        with self._lock:
+            self._samples.setdefault(domain, deque(maxlen=self.window)).append(seconds)
+
+    def record_timeout(self, url: str) -> None:
+        """Registra que el precio no apareció dentro del timeout."""
+        domain = normalize_domain(url)
+        self._timeouts[domain] = self._timeouts.get(domain, 0) + 1
+        # Sin descartar lo aprendido: una muestra en el techo sube el p95 si se repite
+        self.record(url, self.max_timeout)
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        if not self._samples:
+            return "Tiempo hasta el precio: sin mediciones"
+        parts = []
+        for domain, samples in sorted(self._samples.items()):
+            parts.append(
+                f"{domain} p50 {_percentile(samples, 0.5):.1f}s, p95 {_percentile(samples, 0.95):.1f}s, "
+                f"timeout {self.timeout_for(domain):.1f}s, {self._timeouts.get(domain, 0)} timeouts"
+            )
+        return "Tiempo hasta el precio: " + "; ".join(parts)
+
+_default_tracker: Optional[ReadinessTracker] = None
+
+def get_readiness_tracker() -> ReadinessTracker:
+    """Retorna el tracker compartido del proceso (cargado desde disco la primera vez)."""
+    global _default_tracker
+    if _default_tracker is None:
+        _default_tracker = ReadinessTracker(path=DEFAULT_SAMPLES_PATH)
+    return _default_tracker
+
+def _ready_selector(readiness: Optional[Dict]) -> Optional[str]:
+    selectors = (readiness or {}).get('selectors') or []
+    return ', '.join(selectors) or None
+
+def _finish(url: str, started: float, ready: bool, tracker: ReadinessTracker) -> float:
+    elapsed = time.perf_counter() - started
+    if ready:
+        tracker.record(url, elapsed)
+        logger.info(f"Tiempo hasta el precio: {elapsed:.2f}s ({url})")
+    else:
+        tracker.record_timeout(url)
+        logger.warning(f"El precio no apareció en {elapsed:.2f}s, se extrae igual ({url})")
+    return elapsed
+
+def navigate(page, url: str, readiness: Optional[Dict] = None,
+             tracker: Optional[ReadinessTracker] = None) -> float:
+    """
+    Navega a `url` y espera a que la página esté lista según el adaptador.
+
+    Args:
+        page: Página de playwright.sync_api
+        readiness: Dict `READINESS` del adaptador ('selectors' y opcionalmente 'timeout')
+
+    Returns:
+        Segundos hasta que el precio estuvo disponible
+
+    Raises:
+        PlaywrightTimeoutError: Si la navegación misma no termina
+    """
+    tracker = tracker or get_readiness_tracker()
+    selector = _ready_selector(readiness)
+    started = time.perf_counter()
+
+    if READINESS_MODE == 'networkidle' or not selector:
+        page.goto(url, wait_until="networkidle", timeout=NAVIGATION_TIMEOUT_MS)
+        return _finish(url, started, True, tracker)
+
+    page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+    timeout = tracker.timeout_for(url, (readiness or {}).get('timeout'))
+    try:
+        page.wait_for_selector(selector, timeout=timeout * 1000)
+        ready = True
+    except PlaywrightTimeoutError:
+        # No es fatal: la extracción tiene sus propias esperas de respaldo
+        ready = False
+    return _finish(url, started, ready, tracker)
+
+async def navigate_async(page, url: str, readiness: Optional[Dict] = None,
+                         tracker: Optional[ReadinessTracker] = None) -> float:
+    """Versión para playwright.async_api de navigate."""
+    tracker = tracker or get_readiness_tracker()
+    selector = _ready_selector(readiness)
+    started = time.perf_counter()
+
+    if READINESS_MODE == 'networkidle' or not selector:
+        await page.goto(url, wait_until="networkidle", timeout=NAVIGATION_TIMEOUT_MS)
+        return _finish(url, started, True, tracker)
+
+    await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+    timeout = tracker.timeout_for(url, (readiness or {}).get('timeout'))
+    try:
+        await page.wait_for_selector(selector, timeout=timeout * 1000)
+        ready = True
+    except PlaywrightTimeoutError:
+        ready = False
+    return _finish(url, started, ready, tracker)
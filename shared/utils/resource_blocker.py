@@ -0,0 +1,165 @@
+"""
+Bloqueo de recursos pesados durante el scraping.
+
+Cada adaptador puede declarar un `BLOCKING_PROFILE` con los tipos de recurso
+(imágenes, fuentes, video...) y los hosts de terceros (analítica, anuncios)
+que no hacen falta para leer el precio. El ResourceBlocker instala un
+`page.route` que aborta esas peticiones y lleva la cuenta de lo ahorrado.
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from shared.utils.domains import normalize_domain, domain_candidates
+
+logger = logging.getLogger(__name__)
+
+# Tamaños típicos por tipo de recurso, para estimar los bytes que no se descargaron
+ESTIMATED_BYTES_BY_TYPE = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 30_000,
+    'script': 50_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'other': 10_000,
+}
+
+@dataclass(frozen=True)
+class BlockingProfile:
+    """Qué bloquear para un adaptador."""
+    resource_types: frozenset = frozenset()
+    blocked_hosts: Tuple[str, ...] = ()
+    block_third_party: bool = False
+    first_party_hosts: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> "BlockingProfile":
+        """Construye el perfil desde el dict `BLOCKING_PROFILE` de un adaptador."""
+        return cls(
+            resource_types=frozenset(spec.get('resource_types', ())),
+            blocked_hosts=tuple(normalize_domain(h) for h in spec.get('blocked_hosts', ())),
+            block_third_party=bool(spec.get('block_third_party', False)),
+            first_party_hosts=tuple(normalize_domain(h) for h in spec.get('first_party_hosts', ())),
+        )
+
+    @classmethod
+    def from_adapter(cls, adapter) -> Optional["BlockingProfile"]:
+        """Retorna el perfil declarado por el adaptador, o None si no declara ninguno."""
+        spec = getattr(adapter, 'BLOCKING_PROFILE', None) if adapter else None
+        return cls.from_dict(spec) if spec else None
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Retorna el motivo para bloquear la petición, o None si debe continuar."""
+        if resource_type == 'document':
+            # Nunca bloquear documentos: son la página misma (o sus iframes)
+            return None
+
+        if resource_type in self.resource_types:
+            return resource_type
+
+        candidates = domain_candidates(normalize_domain(url))
+        if any(host in candidates for host in self.blocked_hosts):
+            return 'host'
+
+        if self.block_third_party and not any(host in candidates for host in self.first_party_hosts):
+            return 'third_party'
+
+        return None
+
+@dataclass
+class BlockingStats:
+    """Contadores de peticiones bloqueadas y bytes descargados."""
+    blocked: Counter = field(default_factory=Counter)
+    allowed_requests: int = 0
+    bytes_loaded: int = 0
+    estimated_bytes_saved: int = 0
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked.values())
+
+    def merge(self, other: "BlockingStats") -> None:
+        """Suma los contadores de otro BlockingStats."""
+        self.blocked.update(other.blocked)
+        self.allowed_requests += other.allowed_requests
+        self.bytes_loaded += other.bytes_loaded
+        self.estimated_bytes_saved += other.estimated_bytes_saved
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        detail = ", ".join(f"{reason}: {count}" for reason, count in self.blocked.most_common())
+        return (
+            f"Recursos bloqueados: {self.blocked_requests} peticiones ({detail or 'ninguna'}), "
+            f"~{self.estimated_bytes_saved / 1_048_576:.1f} MB ahorrados (estimado); "
+            f"{self.allowed_requests} peticiones permitidas, {self.bytes_loaded / 1_048_576:.1f} MB descargados"
+        )
+
+class ResourceBlocker:
+    """
+    Intercepta las peticiones de una página y aborta las que el perfil descarta.
+
+    El perfil se elige según la URL del documento principal que se está
+    cargando, así una misma página puede navegar por tiendas distintas.
+    """
+
+    def __init__(self, profile_for_url: Callable[[str], Optional[BlockingProfile]],
+                 stats: Optional[BlockingStats] = None):
+        self.profile_for_url = profile_for_url
+        self.stats = stats or BlockingStats()
+        self._profiles: Dict[int, Optional[BlockingProfile]] = {}
+
+    def _decide(self, page_key: int, request) -> Optional[str]:
+        """Actualiza el perfil en navegaciones y retorna el motivo de bloqueo (si hay)."""
+        resource_type = request.resource_type
+
+        if resource_type == 'document' and request.frame.parent_frame is None:
+            self._profiles[page_key] = self.profile_for_url(request.url)
+            return None
+
+        profile = self._profiles.get(page_key)
+        reason = profile.block_reason(resource_type, request.url) if profile else None
+
+        if reason:
+            self.stats.blocked[reason] += 1
+            self.stats.estimated_bytes_saved += ESTIMATED_BYTES_BY_TYPE.get(
+                resource_type, ESTIMATED_BYTES_BY_TYPE['other']
+            )
+        else:
+            self.stats.allowed_requests += 1
+        return reason
+
+    def _on_response(self, response) -> None:
+        # Content-Length ya viene en los headers: no requiere otro viaje al navegador
+        length = response.headers.get('content-length')
+        if length and length.isdigit():
+            self.stats.bytes_loaded += int(length)
+
+    def install(self, page) -> None:
+        """Instala el bloqueo en una página de playwright.sync_api."""
+        page_key = id(page)
+
+        def handler(route):
+            if self._decide(page_key, route.request):
+                route.abort()
+            else:
+                route.continue_()
+
+        page.route("**/*", handler)
+        page.on("response", self._on_response)
+
+    async def install_async(self, page) -> None:
+        """Instala el bloqueo en una página de playwright.async_api."""
+        page_key = id(page)
+
+        async def handler(route):
+            if self._decide(page_key, route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", handler)
+        page.on("response", self._on_response)
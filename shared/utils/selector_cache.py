@@ -0,0 +1,165 @@
+"""
+Caché persistente de selectores CSS que funcionaron.
+
+Las cascadas de selectores de los adaptadores se prueban en orden, y con
+`wait_for_selector` cada selector que no existe cuesta su timeout completo.
+Este caché recuerda, por adaptador y campo (y opcionalmente por patrón de
+URL), qué selectores aciertan: prueba primero el último que funcionó y
+luego el resto ordenado por tasa de aciertos. Si el preferido empieza a
+fallar seguido, su entrada expira y se vuelve al orden original.
+
+Sólo se reordenan los selectores específicos de la tienda (`reorderable`):
+un genérico como '[class*="price"]' coincide en casi cualquier página, así
+que si pasara adelante ganaría siempre (con el precio de otro elemento) y
+nunca llegaría a expirar.
+"""
+
+import os
+import json
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(os.getenv('SELECTOR_CACHE_PATH', 'db/selector_cache.json'))
+
+# Fallos consecutivos tras los cuales un selector pierde lo aprendido
+MAX_CONSECUTIVE_FAILURES = 3
+
+class SelectorCache:
+    """Estadísticas de aciertos por selector, persistidas en un archivo JSON."""
+
+    def __init__(self, path: Optional[Path] = DEFAULT_CACHE_PATH,
+                 max_failures: int = MAX_CONSECUTIVE_FAILURES):
+        self.path = Path(path) if path else None
+        self.max_failures = max_failures
+        # {clave: {'last': selector, 'selectors': {selector: {'hits', 'misses', 'failures'}}}}
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def key(adapter: str, field: str, url_pattern: Optional[str] = None) -> str:
+        """Clave del caché: adaptador y campo, opcionalmente acotados a un patrón de URL."""
+        return f"{adapter}:{field}:{url_pattern}" if url_pattern else f"{adapter}:{field}"
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get('entries', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer el caché de selectores {self.path}: {e}")
+
+    def save(self) -> None:
+        """Guarda el caché en disco (reemplazo atómico del archivo)."""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Un temporal por proceso: varios workers pueden guardar a la vez
+            tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+            with self._lock:
+                data = json.dumps({'entries': self._entries}, ensure_ascii=False, indent=1)
+            tmp_path.write_text(data, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el caché de selectores {self.path}: {e}")
+
+    def order(self, adapter: str, field: str, selectors: List[str],
+              url_pattern: Optional[str] = None, reorderable: Optional[int] = None) -> List[str]:
+        """
+        Retorna la cascada reordenada: el último selector exitoso primero y
+        luego por tasa de aciertos, manteniendo el orden original en empates.
+
+        Args:
+            reorderable: Cuántos selectores del principio (los específicos) se
+                         pueden reordenar; el resto queda detrás, en su orden.
+                         None = todos
+        """
+        if reorderable is not None:
+            head, tail = selectors[:reorderable], list(selectors[reorderable:])
+        else:
+            head, tail = selectors, []
+
+        with self._lock:
+            entry = self._entries.get(self.key(adapter, field, url_pattern))
+            if not entry:
+                return list(selectors)
+
+            stats = entry.get('selectors', {})
+            last = entry.get('last')
+
+            def rank(indexed):
+                index, selector = indexed
+                s = stats.get(selector, {})
+                tries = s.get('hits', 0) + s.get('misses', 0)
+                hit_rate = s.get('hits', 0) / tries if tries else 0.0
+                return (selector != last, -hit_rate, index)
+
+            return [selector for _, selector in sorted(enumerate(head), key=rank)] + tail
+
+    def record_hit(self, adapter: str, field: str, selector: str, position: int,
+                   url_pattern: Optional[str] = None) -> None:
+        """
+        Registra que `selector` encontró el dato.
+
+        Args:
+            position: Posición del selector en el orden probado; 0 cuenta como
+                      acierto del caché, cualquier otra como fallo
+        """
+        with self._lock:
+            entry = self._entries.setdefault(self.key(adapter, field, url_pattern), {'selectors': {}})
+            s = entry['selectors'].setdefault(selector, {'hits': 0, 'misses': 0, 'failures': 0})
+            s['hits'] += 1
+            s['failures'] = 0
+            entry['last'] = selector
+
+            if position == 0:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_failure(self, adapter: str, field: str, selector: str,
+                       url_pattern: Optional[str] = None) -> None:
+        """Registra que `selector` no encontró el dato; expira lo aprendido si falla seguido."""
+        with self._lock:
+            entry = self._entries.setdefault(self.key(adapter, field, url_pattern), {'selectors': {}})
+            s = entry['selectors'].setdefault(selector, {'hits': 0, 'misses': 0, 'failures': 0})
+            s['misses'] += 1
+            s['failures'] += 1
+
+            if s['failures'] >= self.max_failures and (s['hits'] or entry.get('last') == selector):
+                logger.info(f"Selector expirado en caché ({adapter}.{field}): {selector}")
+                s['hits'] = 0
+                s['misses'] = 0
+                if entry.get('last') == selector:
+                    entry.pop('last')
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de aciertos y fallos del caché en este proceso."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        s = self.stats()
+        return f"Caché de selectores: {s['hits']} aciertos, {s['misses']} fallos ({s['hit_rate'] * 100:.0f}% aciertos)"
+
+_default_cache: Optional[SelectorCache] = None
+
+def get_selector_cache() -> SelectorCache:
+    """Retorna el caché compartido del proceso (cargado desde disco la primera vez)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SelectorCache()
+    return _default_cache
@@ -0,0 +1,233 @@
+"""
+Snapshots de páginas para scrapear sin conexión (grabar y reproducir).
+
+En modo grabación se guarda el HTML de cada URL scrapeada (el del camino
+HTTP o el documento que recibió el navegador) y las respuestas XHR/fetch
+de la página, que es donde algunas tiendas cargan el precio. En modo
+reproducción el camino HTTP lee esos snapshots y el navegador los recibe
+por `page.route`, sin salir a la red: una corrida completa se puede medir y
+repetir offline con el mismo contenido.
+
+Almacenamiento por contenido, seguro entre procesos:
+    objects/ab/abcdef....gz   cuerpo comprimido, nombrado por su SHA-256
+    index/<sha256(url)>.json  metadatos de la URL (status, content-type, objeto)
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+DEFAULT_SNAPSHOT_DIR = Path(os.getenv('SCRAPER_SNAPSHOT_DIR', 'db/snapshots'))
+
+# Respuestas del navegador que se graban: el documento y lo que pide la página por JS
+RECORDED_RESOURCE_TYPES = ('document', 'xhr', 'fetch')
+
+@dataclass
+class Snapshot:
+    """Metadatos de una respuesta grabada."""
+    url: str
+    digest: str
+    status: int
+    content_type: str
+    resource_type: str
+    recorded_at: float
+
+class SnapshotStore:
+    """Respuestas comprimidas, direccionadas por contenido, con un índice por URL."""
+
+    def __init__(self, root: Path = DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.index_dir = self.root / 'index'
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.gz"
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Un temporal por proceso: varios workers pueden grabar a la vez
+        tmp_path = path.with_suffix(f'{path.suffix}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def put(self, url: str, body: bytes, status: int = 200, content_type: str = 'text/html; charset=utf-8',
+            resource_type: str = 'document') -> Snapshot:
+        """Guarda una respuesta; el cuerpo sólo se escribe si ese contenido no estaba ya."""
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            # mtime=0: el mismo contenido produce siempre el mismo archivo
+            self._write_atomic(object_path, gzip.compress(body, mtime=0))
+
+        snapshot = Snapshot(url=url, digest=digest, status=status, content_type=content_type,
+                            resource_type=resource_type, recorded_at=time.time())
+        self._write_atomic(self.index_dir / f"{self._key(url)}.json",
+                           json.dumps(asdict(snapshot), ensure_ascii=False).encode('utf-8'))
+        return snapshot
+
+    def get(self, url: str) -> Optional[Snapshot]:
+        """Metadatos grabados para la URL, o None."""
+        try:
+            data = json.loads((self.index_dir / f"{self._key(url)}.json").read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return Snapshot(**data)
+
+    def body(self, snapshot: Snapshot) -> bytes:
+        """Cuerpo descomprimido de una respuesta grabada."""
+        return gzip.decompress(self._object_path(snapshot.digest).read_bytes())
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        urls = len(list(self.index_dir.glob('*.json'))) if self.index_dir.exists() else 0
+        objects = list(self.objects_dir.glob('*/*.gz')) if self.objects_dir.exists() else []
+        size_kb = sum(path.stat().st_size for path in objects) / 1024
+        return f"Snapshots en {self.root}: {urls} URLs, {len(objects)} objetos ({size_kb:,.0f} KB comprimidos)"
+
+class SnapshotSession:
+    """
+    Engancha el store al scraping: el camino HTTP (`fetch_html`) y las
+    páginas de Playwright (`install` / `install_async`).
+
+    Al grabar, las respuestas del navegador se acumulan por página y sus
+    cuerpos se leen en `flush` (tras extraer el precio): la API síncrona de
+    Playwright no permite leerlos dentro del callback del evento.
+    """
+
+    def __init__(self, store: SnapshotStore, mode: str):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Modo de snapshots desconocido: {mode}")
+        self.store = store
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+        self._pending: Dict[int, List] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def fetch_html(self, url: str, fetch: Callable[[str], str]) -> str:
+        """HTML de la URL para el camino HTTP: del snapshot al reproducir, grabándolo al grabar."""
+        if self.replaying:
+            snapshot = self.store.get(url)
+            if snapshot is None:
+                self.missing += 1
+                raise LookupError(f"Sin snapshot para {url}")
+            self.replayed += 1
+            return self.store.body(snapshot).decode('utf-8', errors='replace')
+
+        html = fetch(url)
+        self.store.put(url, html.encode('utf-8'))
+        self.recorded += 1
+        return html
+
+    def _serve(self, url: str) -> Optional[Dict]:
+        """Argumentos de `route.fulfill` para la URL, o None si no hay snapshot."""
+        snapshot = self.store.get(url)
+        if snapshot is None:
+            self.missing += 1
+            return None
+        self.replayed += 1
+        return {'status': snapshot.status, 'content_type': snapshot.content_type, 'body': self.store.body(snapshot)}
+
+    def _on_response(self, page_key: int, response) -> None:
+        if response.request.resource_type in RECORDED_RESOURCE_TYPES:
+            with self._lock:
+                self._pending.setdefault(page_key, []).append(response)
+
+    def _take_pending(self, page) -> List:
+        with self._lock:
+            return self._pending.pop(id(page), [])
+
+    def _record_response(self, response, body: bytes) -> None:
+        self.store.put(response.url, body, status=response.status,
+                       content_type=response.headers.get('content-type', 'application/octet-stream'),
+                       resource_type=response.request.resource_type)
+        self.recorded += 1
+
+    def install(self, page) -> None:
+        """Prepara una página (API síncrona) para grabar o reproducir."""
+        if self.replaying:
+            def handler(route):
+                # Sin red: lo que no se grabó no existe
+                kwargs = self._serve(route.request.url)
+                if kwargs:
+                    route.fulfill(**kwargs)
+                else:
+                    route.abort()
+            page.route("**/*", handler)
+        else:
+            page_key = id(page)
+            page.on("response", lambda response: self._on_response(page_key, response))
+
+    async def install_async(self, page) -> None:
+        """Prepara una página (API asíncrona) para grabar o reproducir."""
+        if self.replaying:
+            async def handler(route):
+                kwargs = self._serve(route.request.url)
+                if kwargs:
+                    await route.fulfill(**kwargs)
+                else:
+                    await route.abort()
+            await page.route("**/*", handler)
+        else:
+            page_key = id(page)
+            page.on("response", lambda response: self._on_response(page_key, response))
+
+    def flush(self, page) -> None:
+        """Graba las respuestas que recibió la página desde el último flush."""
+        for response in self._take_pending(page):
+            try:
+                self._record_response(response, response.body())
+            except Exception as e:
+                # Redirecciones y respuestas ya descartadas por el navegador no tienen cuerpo
+                logger.debug(f"Sin cuerpo para grabar {response.url}: {e}")
+
+    async def flush_async(self, page) -> None:
+        """Como flush, para páginas de la API asíncrona."""
+        for response in self._take_pending(page):
+            try:
+                self._record_response(response, await response.body())
+            except Exception as e:
+                logger.debug(f"Sin cuerpo para grabar {response.url}: {e}")
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        if self.replaying:
+            return f"Snapshots reproducidos: {self.replayed} respuestas, {self.missing} sin snapshot"
+        return f"Snapshots grabados: {self.recorded} respuestas. {self.store.summary()}"
+
+_session: Optional[SnapshotSession] = None
+
+def configure_snapshots(mode: Optional[str], root: Optional[Path] = None) -> Optional[SnapshotSession]:
+    """Activa (o con mode=None desactiva) la grabación/reproducción para el proceso."""
+    global _session
+    _session = SnapshotSession(SnapshotStore(root or DEFAULT_SNAPSHOT_DIR), mode) if mode else None
+    return _session
+
+def get_snapshot_session() -> Optional[SnapshotSession]:
+    """La sesión de snapshots del proceso, o None si no se graba ni se reproduce."""
+    return _session
+
+# También activable por entorno, para los procesos worker y el daemon
+if os.getenv('SCRAPER_SNAPSHOTS'):
+    configure_snapshots(os.getenv('SCRAPER_SNAPSHOTS'))
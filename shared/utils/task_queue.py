@@ -0,0 +1,318 @@
+"""
+Cola durable de tareas de scraping con leases.
+
+Cada URL a revisar es una fila en `scrape_tasks`. Los workers toman tareas
+con un lease (visibility timeout): si un worker muere a mitad de una URL, su
+lease vence y otra pasada la vuelve a tomar, así que una caída no pierde el
+resto de la lista. Cada tarea lleva su contador de intentos y pasa a 'dead'
+al agotarlos.
+
+Dos implementaciones con la misma interfaz:
+- PostgresTaskQueue: `FOR UPDATE SKIP LOCKED`, para cualquier número de
+  workers contra la BD compartida.
+- SQLiteTaskQueue: un archivo local, para correr sin Postgres.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from psycopg2.extras import Json
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_DEAD = 'dead'
+
+LEASE_SECONDS = float(os.getenv('SCRAPER_LEASE_SECONDS', '120'))
+MAX_ATTEMPTS = int(os.getenv('SCRAPER_RETRIES', '3'))
+SQLITE_PATH = Path(os.getenv('SCRAPER_TASK_QUEUE_PATH', 'db/tasks.sqlite'))
+
+@dataclass
+class Task:
+    """Una tarea tomada de la cola."""
+    id: int
+    url_info: Dict
+    attempts: int
+    max_attempts: int
+
+    @property
+    def url(self) -> str:
+        return self.url_info['url']
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+class TaskQueue(ABC):
+    """Interfaz común de las colas de tareas."""
+
+    @abstractmethod
+    def enqueue(self, urls_to_process: List[Dict], max_attempts: int = MAX_ATTEMPTS) -> int:
+        """Encola URLs (las que ya están pendientes o en curso se ignoran). Retorna cuántas entraron."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, limit: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Task]:
+        """Toma hasta `limit` tareas disponibles (o con lease vencido) y las arrienda a `worker_id`."""
+
+    @abstractmethod
+    def complete(self, task: Task, worker_id: str) -> None:
+        """Marca la tarea como terminada."""
+
+    @abstractmethod
+    def fail(self, task: Task, worker_id: str, error: str, retry_delay: float = 0.0) -> None:
+        """Devuelve la tarea a la cola tras `retry_delay` segundos, o la marca 'dead' si agotó sus intentos."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Cantidad de tareas por estado."""
+
+    def summary(self) -> str:
+        """Resumen legible para el log."""
+        counts = self.counts()
+        return "Cola de tareas: " + ", ".join(
+            f"{status}={counts.get(status, 0)}"
+            for status in (STATUS_PENDING, STATUS_LEASED, STATUS_DONE, STATUS_DEAD)
+        )
+
+class PostgresTaskQueue(TaskQueue):
+    """Cola sobre la BD compartida; varios workers toman tareas con SKIP LOCKED."""
+
+    def __init__(self, db):
+        self.db = db
+        self._create_table()
+
+    def _create_table(self) -> None:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scrape_tasks (
+                        id BIGSERIAL PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        payload JSONB NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        max_attempts INTEGER NOT NULL,
+                        available_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        lease_owner TEXT,
+                        lease_until TIMESTAMP,
+                        last_error TEXT,
+                        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                """)
+                # Una sola tarea activa por URL
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_tasks_active_url
+                    ON scrape_tasks(url) WHERE status IN ('pending', 'leased')
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_scrape_tasks_claim
+                    ON scrape_tasks(status, available_at)
+                """)
+                conn.commit()
+
+    def enqueue(self, urls_to_process: List[Dict], max_attempts: int = MAX_ATTEMPTS) -> int:
+        inserted = 0
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for url_info in urls_to_process:
+                    cursor.execute("""
+                        INSERT INTO scrape_tasks (url, payload, max_attempts)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT DO NOTHING
+                    """, (url_info['url'], Json(url_info), max_attempts))
+                    inserted += cursor.rowcount
+                conn.commit()
+        return inserted
+
+    def claim(self, worker_id: str, limit: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Task]:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                # Leases vencidos sin intentos restantes: no se vuelven a tomar
+                cursor.execute("""
+                    UPDATE scrape_tasks
+                    SET status = 'dead', last_error = 'lease vencido', lease_owner = NULL,
+                        lease_until = NULL, updated_at = NOW()
+                    WHERE status = 'leased' AND lease_until < NOW() AND attempts >= max_attempts
+                """)
+                cursor.execute("""
+                    UPDATE scrape_tasks
+                    SET status = 'leased', lease_owner = %s,
+                        lease_until = NOW() + make_interval(secs => %s),
+                        attempts = attempts + 1, updated_at = NOW()
+                    WHERE id IN (
+                        SELECT id FROM scrape_tasks
+                        WHERE (status = 'pending' AND available_at <= NOW())
+                           OR (status = 'leased' AND lease_until < NOW())
+                        ORDER BY available_at, id
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, payload, attempts, max_attempts
+                """, (worker_id, lease_seconds, limit))
+                rows = cursor.fetchall()
+                conn.commit()
+        return [Task(id=row[0], url_info=row[1], attempts=row[2], max_attempts=row[3]) for row in rows]
+
+    def complete(self, task: Task, worker_id: str) -> None:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE scrape_tasks
+                    SET status = 'done', lease_owner = NULL, lease_until = NULL, updated_at = NOW()
+                    WHERE id = %s AND lease_owner = %s
+                """, (task.id, worker_id))
+                conn.commit()
+
+    def fail(self, task: Task, worker_id: str, error: str, retry_delay: float = 0.0) -> None:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE scrape_tasks
+                    SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                        available_at = NOW() + make_interval(secs => %s),
+                        lease_owner = NULL, lease_until = NULL, last_error = %s, updated_at = NOW()
+                    WHERE id = %s AND lease_owner = %s
+                """, (retry_delay, error[:1000], task.id, worker_id))
+                conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT status, COUNT(*) FROM scrape_tasks GROUP BY status")
+                return dict(cursor.fetchall())
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    Cola en un archivo SQLite, para correr sin Postgres.
+
+    SQLite no tiene SKIP LOCKED: `BEGIN IMMEDIATE` toma el lock de escritura
+    durante el claim, así que dos procesos nunca arriendan la misma tarea.
+    """
+
+    def __init__(self, path: Path = SQLITE_PATH, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self._clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._create_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: las transacciones se abren a mano con BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _create_table(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_until REAL,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_tasks_active_url
+                ON scrape_tasks(url) WHERE status IN ('pending', 'leased')
+            """)
+        finally:
+            conn.close()
+
+    def enqueue(self, urls_to_process: List[Dict], max_attempts: int = MAX_ATTEMPTS) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO scrape_tasks (url, payload, max_attempts, available_at) VALUES (?, ?, ?, ?)",
+                [(u['url'], json.dumps(u, ensure_ascii=False), max_attempts, self._clock()) for u in urls_to_process]
+            )
+            inserted = conn.total_changes - before
+            conn.execute("COMMIT")
+            return inserted
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, limit: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Task]:
+        now = self._clock()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                UPDATE scrape_tasks
+                SET status = 'dead', last_error = 'lease vencido', lease_owner = NULL, lease_until = NULL
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts
+            """, (now,))
+            rows = conn.execute("""
+                SELECT id, payload, attempts, max_attempts FROM scrape_tasks
+                WHERE (status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_until < ?)
+                ORDER BY available_at, id
+                LIMIT ?
+            """, (now, now, limit)).fetchall()
+            conn.executemany("""
+                UPDATE scrape_tasks
+                SET status = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1
+                WHERE id = ?
+            """, [(worker_id, now + lease_seconds, row[0]) for row in rows])
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return [Task(id=row[0], url_info=json.loads(row[1]), attempts=row[2] + 1, max_attempts=row[3])
+                for row in rows]
+
+    def complete(self, task: Task, worker_id: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+                UPDATE scrape_tasks SET status = 'done', lease_owner = NULL, lease_until = NULL
+                WHERE id = ? AND lease_owner = ?
+            """, (task.id, worker_id))
+        finally:
+            conn.close()
+
+    def fail(self, task: Task, worker_id: str, error: str, retry_delay: float = 0.0) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+                UPDATE scrape_tasks
+                SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                    available_at = ?, lease_owner = NULL, lease_until = NULL, last_error = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (self._clock() + retry_delay, error[:1000], task.id, worker_id))
+        finally:
+            conn.close()
+
+    def counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM scrape_tasks GROUP BY status").fetchall())
+        finally:
+            conn.close()
+
+def open_task_queue(db=None) -> TaskQueue:
+    """
+    Abre la cola configurada en SCRAPER_TASK_QUEUE: 'postgres' (por defecto,
+    sobre la BD de `db`) o 'sqlite' (archivo SCRAPER_TASK_QUEUE_PATH).
+    """
+    backend = os.getenv('SCRAPER_TASK_QUEUE', 'postgres').lower()
+    if backend == 'sqlite':
+        return SQLiteTaskQueue()
+    if db is None:
+        from shared.utils.database import PriceDatabase
+        db = PriceDatabase()
+    return PostgresTaskQueue(db)
@@ -0,0 +1,221 @@
+"""
+Tiempos por etapa de cada URL scrapeada.
+
+`process_product` abre un contexto por URL (`timed_url`) y cada etapa
+(petición HTTP, navegación, esperas de selectores, lecturas y escrituras de
+BD, alerta) se mide con `span`. La URL en curso viaja en una ContextVar,
+así que los adaptadores y `handle_extracted_price` miden sus etapas sin
+recibir nada nuevo, también dentro de las tareas del motor asíncrono y de
+`asyncio.to_thread`.
+
+Al terminar la corrida se resume por etapa (min/media/p95) y se guarda en
+la tabla `scrape_timings`, con el dominio de cada URL, para ver qué etapa y
+qué tienda se volvieron lentas.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from shared.utils.domains import normalize_domain
+from shared.utils.metrics import SCRAPER_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Etapas medidas
+STAGE_TOTAL = 'total'
+STAGE_HTTP_FETCH = 'http_fetch'
+STAGE_HTML_PARSE = 'html_parse'
+STAGE_BROWSER = 'browser'
+STAGE_NAVIGATE = 'navigate'
+STAGE_EXTRACT = 'extract'
+STAGE_SELECTOR_WAIT = 'selector_wait'
+STAGE_DB_READ = 'db_read'
+STAGE_DB_WRITE = 'db_write'
+STAGE_ALERT = 'alert'
+
+# Orden de las filas del resumen; etapas nuevas van al final
+STAGE_ORDER = (
+    STAGE_TOTAL, STAGE_HTTP_FETCH, STAGE_HTML_PARSE, STAGE_BROWSER, STAGE_NAVIGATE,
+    STAGE_EXTRACT, STAGE_SELECTOR_WAIT, STAGE_DB_READ, STAGE_DB_WRITE, STAGE_ALERT,
+)
+
+# Guardar los tiempos en la BD al terminar cada corrida
+PERSIST_TIMINGS = os.getenv('SCRAPER_TIMINGS', '1').lower() not in ('0', 'false', 'no')
+
+# (url, etapa, segundos)
+Sample = Tuple[str, str, float]
+
+class RunTimings:
+    """Muestras de tiempo de una corrida. Seguro entre hilos."""
+
+    def __init__(self, samples: Optional[List[Sample]] = None):
+        self.samples: List[Sample] = list(samples or [])
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, url: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.append((url, stage, seconds))
+
+    def extend(self, samples: List[Sample]) -> None:
+        """Suma las muestras de otro proceso (ver scraper/workers.py)."""
+        with self._lock:
+            self.samples.extend(samples)
+
+    def by_stage(self) -> Dict[str, List[float]]:
+        """Duraciones en segundos agrupadas por etapa."""
+        stages: Dict[str, List[float]] = defaultdict(list)
+        with self._lock:
+            for _, stage, seconds in self.samples:
+                stages[stage].append(seconds)
+        return stages
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """n, min, media, p95 y total (ms) por etapa, en el orden de STAGE_ORDER."""
+        stages = self.by_stage()
+        ordered = [s for s in STAGE_ORDER if s in stages] + sorted(set(stages) - set(STAGE_ORDER))
+        result = {}
+        for stage in ordered:
+            values = sorted(stages[stage])
+            result[stage] = {
+                'count': len(values),
+                'min_ms': values[0] * 1000,
+                'mean_ms': sum(values) / len(values) * 1000,
+                'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+                'total_ms': sum(values) * 1000,
+            }
+        return result
+
+    def summary(self) -> str:
+        """Tabla por etapa para el log."""
+        stats = self.stage_stats()
+        if not stats:
+            return "Tiempos por etapa: sin muestras"
+        lines = [f"{'etapa':<14}{'n':>7}{'min ms':>10}{'media ms':>10}{'p95 ms':>10}{'total s':>10}"]
+        for stage, s in stats.items():
+            lines.append(
+                f"{stage:<14}{s['count']:>7}{s['min_ms']:>10.1f}{s['mean_ms']:>10.1f}"
+                f"{s['p95_ms']:>10.1f}{s['total_ms'] / 1000:>10.1f}"
+            )
+        return "Tiempos por etapa:\n" + "\n".join(lines)
+
+# Corrida, URL y dominio que se están midiendo en este contexto (hilo o tarea asyncio)
+_current: ContextVar[Optional[Tuple[RunTimings, str, str]]] = ContextVar('scrape_timing', default=None)
+
+@contextmanager
+def timed_url(timings: Optional[RunTimings], url: str, total: bool = True) -> Iterator[None]:
+    """
+    Mide el procesamiento de una URL (etapa 'total') y habilita `span` dentro.
+
+    Con `total=False` sólo habilita `span`: en el pipeline (scraper/pipeline.py)
+    cada etapa procesa la URL por separado y el total se registra al final con
+    `record_stage`.
+    """
+    if timings is None:
+        yield
+        return
+
+    token = _current.set((timings, url, normalize_domain(url)))
+    try:
+        if total:
+            with span(STAGE_TOTAL):
+                yield
+        else:
+            yield
+    finally:
+        _current.reset(token)
+
+def record_stage(timings: RunTimings, url: str, stage: str, seconds: float,
+                 domain: Optional[str] = None) -> None:
+    """Registra una duración ya medida, en la corrida y en las métricas."""
+    timings.add(url, stage, seconds)
+    SCRAPER_STAGE_SECONDS.labels(domain=domain or normalize_domain(url), stage=stage).observe(seconds)
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Mide una etapa de la URL en curso; fuera de `timed_url` no hace nada."""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        # También si la etapa falló: un timeout es justo lo que interesa ver
+        timings, url, domain = current
+        record_stage(timings, url, stage, time.perf_counter() - started, domain)
+
+def _create_table(db) -> None:
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_timings (
+                    id BIGSERIAL PRIMARY KEY,
+                    run_id BIGINT,
+                    url TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scrape_timings_domain_stage
+                ON scrape_timings (domain, stage, recorded_at)
+            """)
+            conn.commit()
+
+def persist_timings(db, timings: RunTimings, run_id: Optional[int] = None) -> int:
+    """
+    Guarda las muestras de la corrida en `scrape_timings`.
+
+    Returns:
+        Filas insertadas
+    """
+    if not timings.samples:
+        return 0
+
+    _create_table(db)
+    rows = [
+        (run_id, url, normalize_domain(url), stage, seconds * 1000)
+        for url, stage, seconds in list(timings.samples)
+    ]
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO scrape_timings (run_id, url, domain, stage, duration_ms) VALUES %s
+            """, rows, page_size=1000)
+            conn.commit()
+    return len(rows)
+
+def stage_report(db, hours: int = 24) -> List[Tuple[str, str, int, float, float]]:
+    """
+    Tiempos por dominio y etapa de las últimas `hours` horas, los más lentos primero.
+
+    Returns:
+        Lista de (dominio, etapa, n, media_ms, p95_ms)
+    """
+    _create_table(db)
+    with db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT domain, stage, COUNT(*), AVG(duration_ms),
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms)
+                FROM scrape_timings
+                WHERE recorded_at >= NOW() - make_interval(hours => %s)
+                GROUP BY domain, stage
+                ORDER BY 5 DESC
+            """, (hours,))
+            return cursor.fetchall()
@@ -16,7 +16,8 @@ from playwright.sync_api import sync_playwright
 # Agregar directorio padre al path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from adapters import alkosto, test_adapter
+from shared.adapters import test_adapter
+from shared.adapters.registry import get_adapter as lookup_adapter
 
 @dataclass
 class ProductResult:
@@ -35,9 +36,10 @@ class ProductResult:
             self.timestamp = datetime.now().isoformat()
 
 def get_adapter(url: str):
-    """Determina qué adaptador usar según la URL."""
-    if 'alkosto.com' in url.lower():
-        return alkosto, 'alkosto'
+    """Determina qué adaptador usar según la URL (el de prueba si no hay uno registrado)."""
+    adapter = lookup_adapter(url)
+    if adapter:
+        return adapter, adapter.__name__.rsplit('.', 1)[-1]
     else:
         return test_adapter, 'test'
 
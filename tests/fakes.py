@@ -0,0 +1,101 @@
+"""
+Dobles de prueba compartidos por los tests: reloj controlable, conexión
+psycopg2 falsa y PriceDatabase en memoria.
+"""
+
+import threading
+
+class FakeClock:
+    """Reloj controlable para tests."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+class FakeCursor:
+    """Cursor que registra las consultas y pide las respuestas a su FakeDB."""
+
+    def __init__(self, db):
+        self.db = db
+        self.sql = ''
+        self.params = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        self.sql, self.params = sql, params
+        self.db.executed.append(sql)
+
+    def fetchone(self):
+        return self.db.fetchone(self)
+
+    def fetchall(self):
+        return self.db.fetchall(self)
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+
+    def rollback(self):
+        self.db.rollbacks += 1
+
+class FakeDB:
+    """
+    Objeto con `get_connection()` como PriceDatabase, sin PostgreSQL.
+
+    Las subclases responden a las consultas sobrescribiendo fetchone/fetchall
+    (reciben el cursor, con la última `sql` y sus `params`).
+    """
+
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def get_connection(self):
+        return FakeConnection(self)
+
+    def fetchone(self, cursor):
+        return None
+
+    def fetchall(self, cursor):
+        return []
+
+class FakePriceDB:
+    """PriceDatabase en memoria para process_product y los motores: guarda las URLs en `saved`."""
+
+    def __init__(self, last_price=None):
+        self.last_price = last_price
+        self.saved = []
+        self._lock = threading.Lock()
+
+    def get_last_price(self, url):
+        return self.last_price
+
+    def get_price_history(self, url, limit=10):
+        return []
+
+    def save_price(self, url, name, official_price, discounted_price=None):
+        with self._lock:
+            self.saved.append(url)
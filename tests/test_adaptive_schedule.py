@@ -0,0 +1,111 @@
+"""
+Tests de la programación adaptativa por volatilidad de precio.
+"""
+
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper.adaptive_schedule import (
+    AdaptiveScheduler, compute_schedule, COLD_START_INTERVAL_HOURS,
+    MAX_INTERVAL_HOURS, MIN_INTERVAL_HOURS
+)
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+def url_info(name):
+    return {'url': f"https://tienda.com/{name}", 'product_name': name, 'store_name': 'Tienda'}
+
+def stats(changes, days=10, last_price=120, min_price=100, last_scraped_hours_ago=1):
+    return {
+        'samples': 20,
+        'changes': changes,
+        'first_seen': NOW - timedelta(days=days),
+        'last_scraped': NOW - timedelta(hours=last_scraped_hours_ago),
+        'last_price': last_price,
+        'min_price': min_price,
+    }
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_price_change_stats(self, days):
+        return self.rows
+
+class TestComputeSchedule(unittest.TestCase):
+
+    def test_volatil_se_revisa_mas_seguido(self):
+        urls = [url_info('volatil'), url_info('estable')]
+        entries = compute_schedule(urls, {
+            urls[0]['url']: stats(changes=20),
+            urls[1]['url']: stats(changes=0),
+        }, NOW)
+
+        volatile, stable = entries
+        self.assertLess(volatile.interval_hours, stable.interval_hours)
+        self.assertEqual(stable.interval_hours, MAX_INTERVAL_HOURS)
+        self.assertGreaterEqual(volatile.interval_hours, MIN_INTERVAL_HOURS)
+
+    def test_cerca_del_minimo_acorta_el_intervalo(self):
+        urls = [url_info('lejos'), url_info('cerca')]
+        entries = compute_schedule(urls, {
+            urls[0]['url']: stats(changes=5, last_price=150),
+            urls[1]['url']: stats(changes=5, last_price=101),
+        }, NOW)
+
+        self.assertAlmostEqual(entries[1].interval_hours, entries[0].interval_hours / 2)
+
+    def test_sin_historial(self):
+        entries = compute_schedule([url_info('nueva')], {}, NOW)
+
+        self.assertEqual(entries[0].interval_hours, COLD_START_INTERVAL_HOURS)
+        self.assertTrue(entries[0].is_due(NOW))
+
+    def test_presupuesto_estira_los_intervalos(self):
+        urls = [url_info(f'p{i}') for i in range(4)]
+        rows = {u['url']: stats(changes=40) for u in urls}
+
+        unbounded = compute_schedule(urls, rows, NOW)
+        bounded = compute_schedule(urls, rows, NOW, daily_budget=8)
+
+        self.assertLessEqual(sum(24 / e.interval_hours for e in bounded), 8 + 1e-9)
+        self.assertGreater(bounded[0].interval_hours, unbounded[0].interval_hours)
+
+class TestAdaptiveScheduler(unittest.TestCase):
+
+    def test_due_filtra_las_pendientes(self):
+        urls = [url_info('reciente'), url_info('vieja'), url_info('nueva')]
+        db = FakeDB([
+            dict(stats(changes=0, last_scraped_hours_ago=1), url=urls[0]['url']),
+            dict(stats(changes=0, last_scraped_hours_ago=30), url=urls[1]['url']),
+        ])
+
+        due = AdaptiveScheduler(db).due(urls, NOW)
+
+        self.assertEqual([u['product_name'] for u in due], ['vieja', 'nueva'])
+
+    def test_error_de_bd_vuelve_a_la_cadencia_horaria(self):
+        urls = [url_info('a'), url_info('b')]
+        # PriceDatabase.get_price_change_stats retorna None si la consulta falla
+        scheduler = AdaptiveScheduler(FakeDB(None))
+
+        self.assertEqual(scheduler.due(urls, NOW), urls)
+        # Las pasadas de cada 15 minutos no vuelven a recorrer todo el catálogo
+        for minutes in (15, 30, 45):
+            self.assertEqual(scheduler.due(urls, NOW + timedelta(minutes=minutes)), [])
+        self.assertEqual(scheduler.due(urls, NOW + timedelta(hours=1)), urls)
+
+    def test_sin_historial_no_es_un_error(self):
+        urls = [url_info('a')]
+        scheduler = AdaptiveScheduler(FakeDB([]))
+
+        self.assertEqual(scheduler.due(urls, NOW), urls)
+        self.assertEqual(scheduler.due(urls, NOW + timedelta(minutes=15)), urls)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests para la extracción de precios de Alkosto desde HTML estático (sin navegador).
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters import alkosto
+from shared.adapters.html_extract import make_soup
+from shared.adapters.page_texts import PageTexts
+from shared.utils.selector_cache import SelectorCache
+
+def product_html(name: str, price: str, old_price: str = None) -> str:
+    """HTML con la estructura de una página de producto de Alkosto."""
+    old_price_html = f'<p id="js-original_price_old"><span>{old_price}</span><div>-10%</div></p>' if old_price else ""
+    return f"""
+    <html><body><main>
+        <section><div><div><div><h1>{name}</h1></div></div></div></section>
+        <section>
+            <p id="js-original_price">{price}</p>
+            {old_price_html}
+        </section>
+    </main></body></html>
+    """
+
+class TestAlkostoHtml(unittest.TestCase):
+    """Tests para alkosto.get_price_from_html."""
+    
+    def test_without_discount(self):
+        result = alkosto.get_price_from_html(product_html("Celular X", "$1.299.900"), "https://www.alkosto.com/p/1")
+        self.assertEqual(result, ("Celular X", 1299900.0, None))
+    
+    def test_with_discount(self):
+        html = product_html("Pañales T5", "$89.900", "$99.900")
+        result = alkosto.get_price_from_html(html, "https://www.alkosto.com/p/2")
+        self.assertEqual(result, ("Pañales T5", 99900.0, 89900.0))
+    
+    def test_missing_price_raises(self):
+        """Si el precio se renderiza con JS, el HTML no lo trae y se debe caer al navegador."""
+        html = "<html><body><main><h1>Producto</h1><p id='js-original_price'></p></main></body></html>"
+        with self.assertRaises(ValueError):
+            alkosto.get_price_from_html(html, "https://www.alkosto.com/p/3")
+
+    def test_empty_price_element_ignores_generic_selectors(self):
+        """Con '#js-original_price' vacío no se toma el precio de otro elemento ('.product-price')."""
+        html = product_html("Celular X", "").replace(
+            "</main>", "<span class='product-price'>$9.900</span></main>"
+        )
+        with self.assertRaises(ValueError):
+            alkosto.get_price_from_html(html, "https://www.alkosto.com/p/5")
+    
+    def test_json_ld_preferred_over_selectors(self):
+        """Con JSON-LD se usa el Product estructurado; el tachado sale del DOM."""
+        json_ld = (
+            '<script type="application/ld+json">'
+            '{"@type": "Product", "name": "Celular JSON", "offers": {"price": "899900"}}'
+            '</script>'
+        )
+        html = product_html("Celular DOM", "$1", "$999.900").replace("<html>", "<html>" + json_ld)
+        
+        result = alkosto.get_price_from_html(html, "https://www.alkosto.com/p/4")
+        self.assertEqual(result, ("Celular JSON", 999900.0, 899900.0))
+
+class TestAlkostoLearnedOrder(unittest.TestCase):
+    """El orden aprendido por el caché de selectores (camino del navegador)."""
+
+    def scrape(self, html):
+        # Lo que hace get_price con el lote de textos, sobre HTML estático
+        texts = PageTexts.from_soup(alkosto._cascades(), make_soup(html))
+        result = alkosto._prices_from_texts(texts)
+        alkosto._record_selector_hits(texts)
+        return result
+
+    def test_generic_fallback_never_outranks_specific(self):
+        """Un genérico que ganó en una página sin '#js-original_price' no se adelanta en las siguientes."""
+        first = """
+        <html><body><main><h1>Celular X</h1><div class="pdp-price">$1.199.900</div></main></body></html>
+        """
+        second = """
+        <html><body><main><h1>Celular X</h1>
+            <span class="related-price">$9.900</span>
+            <p id="js-original_price">$1.299.900</p>
+        </main></body></html>
+        """
+        cache = SelectorCache(path=None)
+        with patch.object(alkosto, 'get_selector_cache', lambda: cache):
+            self.assertEqual(self.scrape(first)[1], 1199900.0)
+            self.assertEqual(self.scrape(second)[1], 1299900.0)
+
+if __name__ == "__main__":
+    unittest.main()
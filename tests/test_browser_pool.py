@@ -0,0 +1,139 @@
+"""
+Tests del navegador persistente del daemon (sin lanzar Chromium).
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper.browser_pool import BrowserPool, process_tree_rss_mb, MEMORY_CHECK_EVERY
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def evaluate(self, script):
+        return 1
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    def new_page(self):
+        return FakePage()
+
+    def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **kwargs):
+        return FakeContext()
+
+    def close(self):
+        self.connected = False
+
+class FakePool(BrowserPool):
+    """BrowserPool con un navegador falso en lugar de Playwright."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launches = 0
+
+    def _start(self):
+        self.launches += 1
+        self._browser = FakeBrowser()
+        self._new_context()
+
+class TestBrowserPool(unittest.TestCase):
+
+    def test_lanza_una_sola_vez(self):
+        pool = FakePool(max_memory_mb=0)
+        page = pool.get()
+
+        self.assertIs(pool.get(), page)
+        self.assertEqual(pool.launches, 1)
+
+    def test_recicla_tras_n_navegaciones(self):
+        pool = FakePool(max_navigations=2, max_memory_mb=0)
+        first = pool.get()
+        pool.get()
+
+        self.assertIsNot(pool.get(), first)
+        self.assertEqual(pool.recycles, 1)
+        self.assertEqual(pool.launches, 1)
+
+    def test_reinicia_si_se_cae(self):
+        pool = FakePool(max_memory_mb=0)
+        pool.get()
+        pool._browser.connected = False
+
+        pool.get()
+
+        self.assertEqual(pool.restarts, 1)
+        self.assertEqual(pool.launches, 2)
+
+    def test_chequeo_de_salud(self):
+        pool = FakePool(max_memory_mb=0)
+        self.assertTrue(pool.health_check())  # Aún sin navegador
+        pool.get()
+        pool._page.closed = True
+
+        self.assertFalse(pool.health_check())
+        self.assertTrue(pool.is_alive())
+
+    def test_recicla_por_memoria(self):
+        readings = iter([2000, 100])
+        pool = FakePool(max_memory_mb=1000, memory_probe=lambda: next(readings))
+        pool.get()
+        pool.navigations = MEMORY_CHECK_EVERY
+
+        pool.get()
+
+        self.assertEqual(pool.recycles, 1)
+        self.assertEqual(pool.restarts, 0)
+
+    def test_reinicia_si_la_memoria_no_baja(self):
+        pool = FakePool(max_memory_mb=1000, memory_probe=lambda: 2000)
+        pool.get()
+        pool.navigations = MEMORY_CHECK_EVERY
+
+        pool.get()
+
+        self.assertEqual(pool.recycles, 1)
+        self.assertEqual(pool.restarts, 1)
+
+    def test_mismo_hilo(self):
+        pool = FakePool(max_memory_mb=0)
+        pool.get()
+        errors = []
+
+        def use_pool():
+            try:
+                pool.get()
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=use_pool)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+
+    @unittest.skipUnless(Path('/proc').is_dir(), "requiere /proc")
+    def test_memoria_del_proceso(self):
+        self.assertGreater(process_tree_rss_mb(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
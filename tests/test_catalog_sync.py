@@ -0,0 +1,102 @@
+"""
+Tests del aplanado de products.yml y de la sincronización masiva del catálogo.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils import database
+from shared.utils.database import PriceDatabase, flatten_catalog
+from tests.fakes import FakeDB
+
+CATALOG = [
+    {
+        'name': "Pañales T5", 'alias': 'panales_t5',
+        'presentations': [
+            {'size': "56 Unidades", 'unit_count': 56, 'stores': [
+                {'name': "Alkosto", 'url': "https://www.alkosto.com/p/1"},
+                {'name': "Éxito", 'url': "https://www.exito.com/p/1"},
+            ]},
+            {'size': "112 Unidades", 'unit_count': 112, 'stores': [
+                {'name': "Alkosto", 'url': "https://www.alkosto.com/p/2"},
+            ]},
+        ],
+    },
+    {
+        # Alias repetido: se conserva la primera definición
+        'name': "Pañales T5 (copia)", 'alias': 'panales_t5',
+        'presentations': [
+            {'size': "56 Unidades", 'unit_count': 50, 'stores': [
+                {'name': "Alkosto", 'url': "https://www.alkosto.com/p/1"},
+            ]},
+        ],
+    },
+]
+
+class TestFlattenCatalog(unittest.TestCase):
+
+    def test_aplana_la_jerarquia(self):
+        products, presentations, stores = flatten_catalog(CATALOG[:1])
+
+        self.assertEqual(products, [("Pañales T5", 'panales_t5')])
+        self.assertEqual(presentations, [
+            ('panales_t5', "56 Unidades", 56),
+            ('panales_t5', "112 Unidades", 112),
+        ])
+        self.assertEqual([url for *_, url in stores], [
+            "https://www.alkosto.com/p/1", "https://www.exito.com/p/1", "https://www.alkosto.com/p/2",
+        ])
+
+    def test_repetidos_gana_el_primero(self):
+        products, presentations, stores = flatten_catalog(CATALOG)
+
+        self.assertEqual(products, [("Pañales T5", 'panales_t5')])
+        self.assertEqual(len(presentations), 2)
+        self.assertIn(('panales_t5', "56 Unidades", 56), presentations)
+        self.assertEqual(len(stores), 3)
+
+    def test_catalogo_vacio(self):
+        self.assertEqual(flatten_catalog([]), ([], [], []))
+
+class CatalogDB(FakeDB):
+    """Ids de la jerarquía ya existente que devuelven los SELECT de sync_catalog."""
+
+    def fetchall(self, cursor):
+        if 'FROM products' in cursor.sql:
+            return [('panales_t5', 1)]
+        return [(1, "56 Unidades", 10), (1, "112 Unidades", 11)]
+
+class TestSyncCatalog(unittest.TestCase):
+
+    def test_aplica_ediciones_de_filas_existentes(self):
+        db = PriceDatabase.__new__(PriceDatabase)
+        db.presentations_unique = True
+        db.get_connection = CatalogDB().get_connection
+        statements = []
+
+        def fake_execute_values(cursor, sql, rows, page_size, fetch=False):
+            statements.append(sql)
+            # Una fila nueva y una editada (xmax != 0) por nivel
+            return [(True,), (False,)]
+
+        with patch.object(database, 'execute_values', fake_execute_values):
+            result = db.sync_catalog(CATALOG[:1], hashes={'panales_t5': 'abc'})
+
+        products_sql, presentations_sql, stores_sql, hashes_sql = statements
+        self.assertIn("SET name = EXCLUDED.name", products_sql)
+        self.assertIn("SET unit_count = EXCLUDED.unit_count", presentations_sql)
+        self.assertIn("SET presentation_id = EXCLUDED.presentation_id, store_name = EXCLUDED.store_name", stores_sql)
+        self.assertIn("catalog_state", hashes_sql)
+        self.assertEqual(result, {
+            'products': 1, 'updated_products': 1,
+            'presentations': 1, 'updated_presentations': 1,
+            'stores': 1, 'updated_stores': 1,
+        })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests de los checkpoints de corridas y su registro desde run_queue.
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.checkpoint import RunCheckpoint, ITEM_DONE, ITEM_FAILED, ITEM_PENDING
+from shared.utils.rate_limit import DomainRateLimiter
+from scraper import track
+from tests.fakes import FakeDB
+
+def url_info(n):
+    return {'url': f"https://tienda{n}.com/p", 'product_name': f"Producto {n}", 'store_name': 'Tienda'}
+
+class CheckpointDB(FakeDB):
+    """Una corrida interrumpida (`running_run`) con el estado de sus URLs (`items`)."""
+
+    def __init__(self, running_run=None, items=None):
+        super().__init__()
+        self.running_run = running_run
+        self.items = items or {}
+
+    def fetchone(self, cursor):
+        return (self.running_run,) if self.running_run else None
+
+    def fetchall(self, cursor):
+        return list(self.items.items())
+
+class FakeCheckpoint:
+    run_id = None
+
+    def __init__(self):
+        self.marks = []
+        self.finished = False
+
+    def mark(self, url, ok):
+        self.marks.append((url, ok))
+
+    def finish(self):
+        self.finished = True
+
+    def summary(self):
+        return "checkpoint"
+
+class TestResume(unittest.TestCase):
+
+    def test_retoma_solo_las_pendientes(self):
+        urls = [url_info(n) for n in range(4)]
+        db = CheckpointDB(running_run=7, items={
+            urls[0]['url']: ITEM_DONE,
+            urls[1]['url']: ITEM_FAILED,
+            urls[2]['url']: ITEM_PENDING,
+            # Quitada de la configuración desde entonces
+            "https://vieja.com/p": ITEM_PENDING,
+        })
+
+        checkpoint, pending = RunCheckpoint.resume(db, urls)
+
+        self.assertEqual(checkpoint.run_id, 7)
+        self.assertEqual(pending, [urls[2]])
+
+    def test_sin_corrida_interrumpida(self):
+        checkpoint, pending = RunCheckpoint.resume(CheckpointDB(), [url_info(1)])
+
+        self.assertIsNone(checkpoint)
+        self.assertEqual(pending, [])
+
+class TestStart(unittest.TestCase):
+
+    def test_solo_abandona_corridas_sin_actividad(self):
+        db = CheckpointDB(running_run=8)
+
+        with patch('shared.utils.checkpoint.execute_values') as insert_items:
+            checkpoint = RunCheckpoint.start(db, [url_info(1)], stale_seconds=600)
+
+        self.assertEqual(checkpoint.run_id, 8)
+        abandon = next(sql for sql in db.executed if 'UPDATE scrape_runs' in sql)
+        # Otra corrida que sigue registrando URLs no se marca como abandonada
+        self.assertIn('MAX(i.updated_at)', abandon)
+        self.assertIn('NOW() - make_interval(secs => %s)', abandon)
+        self.assertEqual(insert_items.call_args.args[2], [(8, url_info(1)['url'])])
+
+class TestResumeFlag(unittest.TestCase):
+
+    def test_sin_corrida_interrumpida_hace_una_corrida_normal(self):
+        urls = [url_info(1), url_info(2)]
+        processed = []
+        checkpoint = FakeCheckpoint()
+
+        def fake_run_sequential(db, urls_to_process, checkpoint=None):
+            processed.extend(urls_to_process)
+            return track.RunStats(total=len(urls_to_process)).finish()
+
+        with patch.dict(os.environ, {'TG_TOKEN': 'token', 'TG_CHAT_ID': 'chat'}), \
+                patch.object(track, 'load_dotenv', lambda: None), \
+                patch.object(track, 'setup_logging', lambda: None), \
+                patch.object(track, 'load_config', lambda: ([], urls)), \
+                patch.object(track, 'PriceDatabase', lambda: None), \
+                patch.object(track, 'sync_changed_catalog', lambda db, configs: None), \
+                patch.object(track.RunCheckpoint, 'resume', lambda db, urls_to_process: (None, [])), \
+                patch.object(track.RunCheckpoint, 'start', lambda db, urls_to_process: checkpoint), \
+                patch.object(track, 'run_sequential', fake_run_sequential), \
+                patch.object(track, 'report_timings', lambda *args: None), \
+                patch.object(track, 'record_run', lambda stats: None), \
+                patch.object(track, 'export_metrics', lambda: None):
+            track.main(['--resume'])
+
+        self.assertEqual(processed, urls)
+        self.assertTrue(checkpoint.finished)
+
+class TestRunQueueCheckpoint(unittest.TestCase):
+
+    def test_registra_solo_el_resultado_final(self):
+        urls = [url_info(1), url_info(2)]
+        results = {urls[0]['url']: [True], urls[1]['url']: [False] * track.MAX_RETRIES}
+        checkpoint = FakeCheckpoint()
+
+        def fake_process(page, db, info, max_retries, stats):
+            return results[info['url']].pop(0)
+
+        limiter = DomainRateLimiter(default={'rate': 1000, 'burst': 100})
+        with patch.object(track, 'process_product', fake_process), \
+                patch.object(track, 'retry_delay', lambda attempt: 0.0):
+            stats = track.run_queue(None, urls, page=None, limiter=limiter, checkpoint=checkpoint)
+
+        self.assertEqual(sorted(checkpoint.marks), [(urls[0]['url'], True), (urls[1]['url'], False)])
+        self.assertEqual((stats.succeeded, stats.failed), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
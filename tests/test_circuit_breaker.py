@@ -0,0 +1,119 @@
+"""
+Tests para el circuit breaker por dominio y su integración con la cola.
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.circuit_breaker import (
+    DomainCircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+)
+from scraper.work_queue import DomainWorkQueue
+from tests.fakes import FakeClock
+
+DEAD = "https://caida.com/1"
+
+class TestDomainCircuitBreaker(unittest.TestCase):
+    """Tests para DomainCircuitBreaker."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = DomainCircuitBreaker(failure_threshold=2, cooldown=30, max_trips=2, clock=self.clock)
+
+    def test_abre_tras_fallos_consecutivos(self):
+        self.breaker.record_failure(DEAD)
+        self.assertEqual(self.breaker.state(DEAD), STATE_CLOSED)
+
+        self.breaker.record_failure(DEAD)
+        self.assertEqual(self.breaker.state(DEAD), STATE_OPEN)
+        self.assertAlmostEqual(self.breaker.retry_after(DEAD), 30)
+
+    def test_exito_reinicia_el_conteo(self):
+        self.breaker.record_failure(DEAD)
+        self.breaker.record_success(DEAD)
+        self.breaker.record_failure(DEAD)
+
+        self.assertEqual(self.breaker.state(DEAD), STATE_CLOSED)
+
+    def test_half_open_deja_pasar_una_prueba(self):
+        self.breaker.record_failure(DEAD)
+        self.breaker.record_failure(DEAD)
+        self.clock.advance(30)
+
+        self.assertEqual(self.breaker.retry_after(DEAD), 0)
+        self.assertEqual(self.breaker.state(DEAD), STATE_HALF_OPEN)
+
+        self.breaker.on_dispatch(DEAD)
+        self.assertGreater(self.breaker.retry_after(DEAD), 0)
+
+        self.breaker.record_success(DEAD)
+        self.assertEqual(self.breaker.state(DEAD), STATE_CLOSED)
+        self.assertEqual(
+            [(t.from_state, t.to_state) for t in self.breaker.transitions],
+            [(STATE_CLOSED, STATE_OPEN), (STATE_OPEN, STATE_HALF_OPEN), (STATE_HALF_OPEN, STATE_CLOSED)]
+        )
+
+    def test_prueba_liberada_sin_resultado(self):
+        self.breaker.record_failure(DEAD)
+        self.breaker.record_failure(DEAD)
+        self.clock.advance(30)
+        self.breaker.retry_after(DEAD)
+        self.breaker.on_dispatch(DEAD)
+
+        # La URL de prueba pasó a otro nodo: otra URL del dominio puede probar
+        self.breaker.release(DEAD)
+        self.assertEqual(self.breaker.retry_after(DEAD), 0)
+        self.assertEqual(self.breaker.state(DEAD), STATE_HALF_OPEN)
+
+    def test_dominio_caido_tras_max_trips(self):
+        self.breaker.record_failure(DEAD)
+        self.breaker.record_failure(DEAD)
+        self.clock.advance(30)
+        self.breaker.retry_after(DEAD)
+        self.breaker.record_failure(DEAD)  # Falla la prueba
+
+        self.assertTrue(self.breaker.is_dead(DEAD))
+        self.assertIn("caida.com: half_open -> open", self.breaker.summary())
+
+class TestQueueWithBreaker(unittest.TestCase):
+    """Integración del breaker con DomainWorkQueue."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        limiter = DomainRateLimiter(default={'rate': 100, 'burst': 100}, clock=self.clock)
+        self.breaker = DomainCircuitBreaker(failure_threshold=1, cooldown=30, max_trips=1, clock=self.clock)
+        self.queue = DomainWorkQueue(limiter, clock=self.clock, breaker=self.breaker)
+
+    def test_dominio_abierto_no_frena_a_los_demas(self):
+        self.breaker.max_trips = 2
+        self.queue.add_all([{'url': "https://caida.com/1"}, {'url': "https://ok.com/1"}])
+
+        item, _ = self.queue.next_ready()
+        self.queue.record_result(item, ok=False)
+        self.queue.add(item.url_info, attempt=2)
+
+        item, _ = self.queue.next_ready()
+        self.assertEqual(item.url, "https://ok.com/1")
+
+        item, wait = self.queue.next_ready()
+        self.assertIsNone(item)
+        self.assertAlmostEqual(wait, 30)
+
+    def test_descarta_urls_de_dominio_caido(self):
+        self.queue.add_all([{'url': "https://caida.com/1"}, {'url': "https://caida.com/2"}])
+
+        item, _ = self.queue.next_ready()
+        self.queue.record_result(item, ok=False)
+
+        item, _ = self.queue.next_ready()
+        self.assertIsNone(item)
+        self.assertEqual([i.url for i in self.queue.skipped], ["https://caida.com/2"])
+        self.assertEqual(len(self.queue), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests del caché de configuración por hash de contenido.
+"""
+
+import sys
+import pickle
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.config_cache import ConfigCache, changed_products, content_hash, product_hash
+
+def product(alias, unit_count=1):
+    return {
+        'name': alias.title(), 'alias': alias,
+        'presentations': [{'size': "Única", 'unit_count': unit_count, 'stores': [
+            {'name': "Tienda", 'url': f"https://tienda.com/{alias}"},
+        ]}],
+    }
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'config_cache.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reutiliza_si_el_contenido_no_cambio(self):
+        digest = content_hash(b"products: []")
+        ConfigCache(self.path).put(digest, {'products': []}, [{'url': "https://tienda.com/a"}])
+
+        # Otro proceso lee el JSON
+        entry = ConfigCache(self.path).get(digest)
+
+        self.assertEqual(entry.config, {'products': []})
+        self.assertEqual(entry.urls, [{'url': "https://tienda.com/a"}])
+
+    def test_contenido_distinto_invalida(self):
+        cache = ConfigCache(self.path)
+        cache.put(content_hash(b"v1"), {}, [])
+
+        self.assertIsNone(cache.get(content_hash(b"v2")))
+
+    def test_archivo_corrupto_se_ignora(self):
+        self.path.write_bytes(b"no es JSON")
+
+        self.assertIsNone(ConfigCache(self.path).get(content_hash(b"v1")))
+
+    def test_no_deserializa_pickle(self):
+        # Un caché con el formato anterior (o plantado en db/) es un fallo de caché, no código a ejecutar
+        self.path.write_bytes(pickle.dumps({'version': 1, 'hash': content_hash(b"v1")}))
+
+        self.assertIsNone(ConfigCache(self.path).get(content_hash(b"v1")))
+
+    def test_valores_no_json_no_rompen_el_guardado(self):
+        cache = ConfigCache(self.path)
+        digest = content_hash(b"v1")
+
+        entry = cache.put(digest, {'desde': date(2025, 1, 1)}, [])
+
+        self.assertIs(cache.get(digest), entry)
+        self.assertIsNone(ConfigCache(self.path).get(digest))
+
+class TestProductHashes(unittest.TestCase):
+
+    def test_hash_no_depende_del_orden_de_las_claves(self):
+        a = {'name': "A", 'alias': 'a', 'presentations': []}
+        b = {'presentations': [], 'alias': 'a', 'name': "A"}
+
+        self.assertEqual(product_hash(a), product_hash(b))
+
+    def test_solo_los_productos_cambiados(self):
+        products = [product('a'), product('b'), product('c')]
+        known = {p['alias']: product_hash(p) for p in products}
+
+        products[1] = product('b', unit_count=2)
+        products.append(product('d'))
+
+        self.assertEqual([p['alias'] for p in changed_products(products, known)], ['b', 'd'])
+
+if __name__ == '__main__':
+    unittest.main()
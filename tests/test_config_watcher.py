@@ -0,0 +1,120 @@
+"""
+Tests de la recarga en caliente de products.yml.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper import main as daemon
+from scraper.config_watcher import ConfigWatcher
+
+def url_info(n, name=None):
+    return {'url': f"https://tienda.com/p/{n}", 'product_name': name or f"Producto {n}", 'store_name': 'Tienda'}
+
+class FakeLoader:
+    """Devuelve la lista de URLs que el test define, como read_config()."""
+
+    def __init__(self, urls):
+        self.urls = urls
+        self.calls = 0
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [{'alias': 'p'}], list(self.urls)
+
+class TestConfigWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'products.yml'
+        self.path.write_text("v1")
+        self.loader = FakeLoader([url_info(1), url_info(2)])
+        self.diffs = []
+        self.watcher = ConfigWatcher(self.path, self.loader, on_change=self.diffs.append)
+        self.watcher.prime()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, content):
+        self.path.write_text(content)
+        # mtime distinto aunque el sistema de archivos tenga poca resolución
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_sin_cambios_no_relee(self):
+        self.assertIsNone(self.watcher.poll())
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(self.diffs, [])
+
+    def test_detecta_urls_agregadas_quitadas_y_modificadas(self):
+        self.loader.urls = [url_info(2, name="Renombrado"), url_info(3)]
+        self.touch("v2")
+
+        diff = self.watcher.poll()
+
+        self.assertEqual(diff.added, [url_info(3)])
+        self.assertEqual(diff.removed, [url_info(1)])
+        self.assertEqual(diff.changed, [url_info(2, name="Renombrado")])
+        self.assertEqual(self.diffs, [diff])
+        self.assertFalse(self.watcher.has(url_info(1)['url']))
+        self.assertEqual(self.watcher.current()[1], self.loader.urls)
+
+    def test_archivo_invalido_mantiene_la_configuracion(self):
+        self.loader.error = ValueError("YAML inválido")
+        self.touch("roto")
+
+        self.assertIsNone(self.watcher.poll())
+        self.assertTrue(self.watcher.has(url_info(1)['url']))
+
+        # Al corregirlo se recarga
+        self.loader.error = None
+        self.loader.urls = [url_info(1)]
+        self.touch("v3")
+        self.assertEqual(self.watcher.poll().removed, [url_info(2)])
+
+class TestDaemonRateLimiter(unittest.TestCase):
+    """El daemon no debe salir ni abortar el ciclo si products.yml está roto."""
+
+    def setUp(self):
+        for name in ('_rate_limiter', '_rate_limits'):
+            p = patch.object(daemon, name, None)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def limiter_with(self, result):
+        def read():
+            if isinstance(result, Exception):
+                raise result
+            return result
+        with patch.object(daemon, 'read_rate_limits', read):
+            return daemon.current_rate_limiter()
+
+    def test_yaml_invalido_mantiene_el_ultimo_limitador(self):
+        limits = {'alkosto.com': {'rate': 0.5, 'burst': 1}}
+        first = self.limiter_with(limits)
+
+        self.assertIs(self.limiter_with(yaml.YAMLError("YAML inválido")), first)
+        # Sin cambios en la sección se conservan los buckets
+        self.assertIs(self.limiter_with(dict(limits)), first)
+        self.assertIsNot(self.limiter_with({'alkosto.com': {'rate': 1, 'burst': 1}}), first)
+
+    def test_yaml_invalido_al_arrancar_usa_los_limites_por_defecto(self):
+        limiter = self.limiter_with(yaml.YAMLError("YAML inválido"))
+        self.assertEqual(limiter.bucket_for("https://www.alkosto.com/p/1").rate,
+                         daemon.DomainRateLimiter().bucket_for("https://www.alkosto.com/p/1").rate)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests de la coordinación multi-nodo por shards.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper import track
+from shared.utils.coordination import (
+    FencedDatabase, LeaseLostError, ShardCoordinator, assign_shards, shard_for
+)
+from shared.utils.rate_limit import DomainRateLimiter
+from tests.fakes import FakeDB, FakePriceDB
+
+class ShardDB(FakeDB):
+    """Responde a las consultas del coordinador según los nodos vivos y la validez del lease."""
+
+    def __init__(self, live_nodes):
+        super().__init__()
+        self.live_nodes = live_nodes
+        self.lease_valid = True
+        self.inserted = []
+
+    def fetchall(self, cursor):
+        if 'FROM scrape_nodes' in cursor.sql:
+            return [(node,) for node in self.live_nodes]
+        if 'RETURNING shard_id, epoch' in cursor.sql:
+            return [(shard, 1) for shard in cursor.params[3]]
+        return []
+
+    def fetchone(self, cursor):
+        return (0,) if self.lease_valid else None
+
+    def _insert_price(self, cursor, url, name, official_price, discounted_price=None):
+        self.inserted.append(url)
+        return True
+
+    def get_last_price(self, url):
+        return 100.0
+
+class TestSharding(unittest.TestCase):
+
+    def test_shard_estable_y_en_rango(self):
+        url = "https://www.alkosto.com/producto/p/123"
+        self.assertEqual(shard_for(url, 16), shard_for(url, 16))
+        self.assertTrue(all(0 <= shard_for(f"https://t.com/{i}", 16) < 16 for i in range(100)))
+
+    def test_reparto_cubre_cada_shard_una_vez(self):
+        assignment = assign_shards(['a', 'b', 'c'], 64)
+        shards = sorted(s for owned in assignment.values() for s in owned)
+
+        self.assertEqual(shards, list(range(64)))
+        self.assertTrue(all(owned for owned in assignment.values()))
+
+    def test_caida_de_un_nodo_solo_mueve_sus_shards(self):
+        before = assign_shards(['a', 'b', 'c'], 64)
+        after = assign_shards(['a', 'c'], 64)
+
+        self.assertTrue(set(before['a']) <= set(after['a']))
+        self.assertTrue(set(before['c']) <= set(after['c']))
+        self.assertEqual(set(after['a']) | set(after['c']), set(range(64)))
+
+class TestShardCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ShardDB(live_nodes=['a', 'b'])
+        self.coordinator = ShardCoordinator(self.db, node_id='a', num_shards=16)
+
+    def test_heartbeat_toma_los_shards_asignados(self):
+        owned = self.coordinator.heartbeat()
+
+        self.assertEqual(sorted(owned), assign_shards(['a', 'b'], 16)['a'])
+
+    def test_filtra_las_urls_del_nodo(self):
+        self.coordinator.heartbeat()
+        urls = [{'url': f"https://t.com/{i}"} for i in range(50)]
+
+        mine = self.coordinator.filter_urls(urls)
+
+        self.assertTrue(mine)
+        self.assertTrue(all(shard_for(u['url'], 16) in self.coordinator.owned for u in mine))
+
+class TestFencedDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.db = ShardDB(live_nodes=['a'])
+        self.coordinator = ShardCoordinator(self.db, node_id='a', num_shards=16)
+        self.coordinator.heartbeat()
+        self.fenced = FencedDatabase(self.db, self.coordinator)
+
+    def test_guarda_con_lease_vigente(self):
+        self.fenced.save_price("https://t.com/1", "Producto", 100.0)
+
+        self.assertEqual(self.db.inserted, ["https://t.com/1"])
+        self.assertEqual(self.fenced.get_last_price("https://t.com/1"), 100.0)
+
+    def test_lease_perdido_descarta_el_precio(self):
+        self.db.lease_valid = False
+        url = "https://t.com/1"
+
+        with self.assertRaises(LeaseLostError):
+            self.fenced.save_price(url, "Producto", 100.0)
+
+        self.assertEqual(self.db.inserted, [])
+        self.assertEqual(self.db.rollbacks, 1)
+        self.assertFalse(self.coordinator.owns(url))
+
+        # Sin lease ni siquiera se intenta escribir
+        with self.assertRaises(LeaseLostError):
+            self.fenced.save_price(url, "Producto", 100.0)
+        self.assertEqual(self.db.rollbacks, 1)
+
+class LostLeaseDB(FakePriceDB):
+    """Como FencedDatabase cuando el shard pasó a otro nodo a mitad de la corrida."""
+
+    def __init__(self):
+        super().__init__()
+        self.saves = 0
+
+    def save_price(self, url, name, official_price, discounted_price=None):
+        self.saves += 1
+        raise LeaseLostError(f"Lease perdido, precio descartado: {url}")
+
+class TestRunQueueLeaseLost(unittest.TestCase):
+
+    def test_lease_perdido_cuenta_como_entregada(self):
+        db = LostLeaseDB()
+        urls = [
+            {'url': f"https://www.alkosto.com/p/{i}", 'product_name': f"Producto {i}", 'store_name': "Alkosto"}
+            for i in range(3)
+        ]
+        limiter = DomainRateLimiter(default={'rate': 1_000_000, 'burst': 1_000_000})
+
+        with patch.object(track, 'get_adapter_for_url', lambda url: object()), \
+                patch.object(track, 'fetch_price_http', lambda adapter, url: ("Producto", 1000.0, None)):
+            stats = track.run_queue(db, urls, page=None, limiter=limiter)
+
+        self.assertEqual((stats.succeeded, stats.failed, stats.handed_off), (0, 0, 3))
+        # Sin reintentos ni fallas para el circuit breaker del dominio
+        self.assertEqual(db.saves, 3)
+        self.assertEqual(stats.breaker_transitions, [])
+
+if __name__ == '__main__':
+    unittest.main()
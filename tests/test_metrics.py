@@ -0,0 +1,153 @@
+"""
+Tests de las métricas en formato Prometheus (shared/utils/metrics.py) y sus exportadores.
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+import importlib.util
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from shared.utils import metrics
+from shared.utils.metrics import start_http_exporter
+from shared.utils.database import sql_operation
+from scraper import track
+
+ROOT = Path(__file__).parent.parent
+
+def sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+class FailingAdapter:
+    __name__ = 'failing'
+
+    @staticmethod
+    def get_price_from_html(html, url):
+        raise ValueError("sin precio")
+
+    @staticmethod
+    def get_price(page, url):
+        raise ValueError("sin precio")
+
+class TestMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metrics.reset_merged)
+
+    def test_suma_snapshot_de_otro_proceso(self):
+        registry = CollectorRegistry()
+        counter = Counter('done_total', 'Hechas', ('domain',), registry=registry)
+        histogram = Histogram('stage_seconds', 'Etapa', buckets=(1.0,), registry=registry)
+        counter.labels(domain='alkosto.com').inc()
+        histogram.observe(0.5)
+
+        # Dos workers con los mismos valores
+        worker = metrics.snapshot(registry)
+        metrics.merge(worker)
+        metrics.merge(worker)
+        merged = CollectorRegistry(auto_describe=False)
+        merged.register(metrics._MergedCollector(registry))
+        text = metrics.render(merged).decode('utf-8')
+
+        self.assertIn('done_total{domain="alkosto.com"} 3.0', text)
+        self.assertIn('stage_seconds_bucket{le="1.0"} 3.0', text)
+        self.assertIn('stage_seconds_count 3.0', text)
+
+    def test_snapshot_sin_gauges(self):
+        self.assertNotIn('browser_pages_in_use', metrics.snapshot())
+        self.assertIn('scraper_attempts', metrics.snapshot())
+
+class TestMultiprocess(unittest.TestCase):
+
+    def test_suma_workers_de_gunicorn(self):
+        observe = (
+            "from shared.utils.metrics import HTTP_REQUEST_SECONDS; "
+            "HTTP_REQUEST_SECONDS.labels(method='GET', route='/health', status='200').observe(0.1)"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=tmp, PYTHONPATH=str(ROOT))
+            # Dos procesos, como dos workers de gunicorn
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', observe], cwd=ROOT, env=env, check=True)
+
+            with patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': tmp}):
+                text = metrics.render().decode('utf-8')
+
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/health",status="200"} 2.0', text)
+
+class TestExporters(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        Counter('runs_total', 'Corridas', registry=self.registry).inc()
+
+    def test_textfile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'textfile' / 'scraper.prom'
+            with patch.object(metrics, 'METRICS_TEXTFILE', str(path)), \
+                    patch.object(metrics, 'PUSHGATEWAY_URL', None):
+                metrics.export_metrics(self.registry)
+            self.assertIn('runs_total 1.0', path.read_text(encoding='utf-8'))
+            self.assertEqual([p.name for p in path.parent.iterdir()], ['scraper.prom'])
+
+    def test_servidor_http(self):
+        server = start_http_exporter(0, self.registry, host='127.0.0.1')
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(response.headers['Content-Type'], metrics.CONTENT_TYPE)
+                self.assertIn(b'runs_total 1.0', response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class TestScraperMetrics(unittest.TestCase):
+
+    def test_intentos_fallidos_por_dominio(self):
+        url = "https://www.tienda-metricas.com/p/1"
+        before = sample('scraper_attempts_total', domain='tienda-metricas.com', result='error')
+
+        with patch.object(track, 'get_adapter_for_url', lambda url: FailingAdapter), \
+                patch.object(track, 'HTTP_FIRST', False):
+            ok = track.process_product(None, None, {
+                'url': url, 'product_name': "Producto", 'store_name': "Tienda"
+            }, max_retries=1)
+
+        self.assertFalse(ok)
+        self.assertEqual(sample('scraper_attempts_total', domain='tienda-metricas.com', result='error'), before + 1)
+
+    def test_operacion_sql(self):
+        self.assertEqual(sql_operation("  SELECT * FROM prices"), 'select')
+        self.assertEqual(sql_operation(b"INSERT INTO stores VALUES (1)"), 'insert')
+        self.assertEqual(sql_operation("VACUUM"), 'other')
+        self.assertEqual(sql_operation(object()), 'other')
+
+@unittest.skipUnless(importlib.util.find_spec('flask'), "flask no instalado")
+class TestFlaskMetrics(unittest.TestCase):
+
+    def test_latencia_por_ruta(self):
+        import app.main as web
+
+        with patch.object(web, 'PriceDatabase', lambda: None):
+            client = web.create_app().test_client()
+        before = sample('http_request_duration_seconds_count', method='GET', route='/health', status='200')
+
+        client.get('/health')
+        response = client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_bucket', response.get_data(as_text=True))
+        self.assertEqual(sample('http_request_duration_seconds_count', method='GET', route='/health', status='200'),
+                         before + 1)
+
+if __name__ == '__main__':
+    unittest.main()
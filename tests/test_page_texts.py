@@ -0,0 +1,90 @@
+"""
+Tests de la extracción en lote (un solo page.evaluate por producto).
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters.html_extract import make_soup
+from shared.adapters.page_texts import PageTexts, collect_page_texts, COLLECT_TEXTS_JS
+from shared.adapters import alkosto
+
+CASCADES = {
+    'name': ['h1.missing', 'h1'],
+    'price': ['.price'],
+}
+
+class FakePage:
+    """Página falsa que cuenta las llamadas a evaluate."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def evaluate(self, script, arg=None):
+        self.calls.append((script, arg))
+        return self.result
+
+class TestPageTexts(unittest.TestCase):
+
+    def test_un_solo_evaluate(self):
+        page = FakePage({'texts': {'name': [[], ['Televisor']], 'price': [['$ 100']]}, 'scripts': []})
+
+        texts = collect_page_texts(page, CASCADES)
+
+        self.assertEqual(len(page.calls), 1)
+        script, arg = page.calls[0]
+        self.assertEqual(script, COLLECT_TEXTS_JS)
+        self.assertEqual(arg['cascades'], CASCADES)
+        self.assertEqual(texts.first_text('name'), 'Televisor')
+
+    def test_resultado_vacio(self):
+        texts = PageTexts.from_evaluate(CASCADES, None)
+        self.assertIsNone(texts.first_text('name'))
+        self.assertEqual(texts.scripts, [])
+
+    def test_selector_ganador(self):
+        texts = PageTexts.from_evaluate(CASCADES, {'texts': {'name': [[], ['  ', 'Nevera']]}})
+
+        self.assertEqual(texts.first_text('name'), 'Nevera')
+        self.assertEqual(texts.matched_selector('name'), (1, 'h1'))
+        self.assertIsNone(texts.matched_selector('price'))
+
+    def test_first_value_salta_textos_sin_precio(self):
+        texts = PageTexts.from_evaluate(CASCADES, {'texts': {'price': [['Precio', '$ 250']]}})
+        parse = lambda text: float(text.strip('$ ')) if any(c.isdigit() for c in text) else None
+
+        self.assertEqual(texts.first_value('price', parse), 250.0)
+
+    def test_desde_html_estatico(self):
+        soup = make_soup('<h1>Lavadora</h1><span class="price">$ 99</span>'
+                         '<script type="application/ld+json">{}</script>')
+
+        texts = PageTexts.from_soup(CASCADES, soup)
+
+        self.assertEqual(texts.texts['name'], [[], ['Lavadora']])
+        self.assertEqual(texts.texts['price'], [['$ 99']])
+        self.assertEqual(texts.scripts, ['{}'])
+
+class TestAlkostoBatch(unittest.TestCase):
+
+    def test_precios_desde_lote(self):
+        texts = PageTexts.from_evaluate(alkosto.SELECTOR_CASCADES, {'texts': {
+            'name': [[] for _ in alkosto.NAME_SELECTORS[:-1]] + [['Portátil']],
+            'current_price': [['$ 1.299.900']],
+            'old_price': [['$ 1.599.900']],
+        }})
+
+        self.assertEqual(alkosto._prices_from_texts(texts), ('Portátil', 1599900.0, 1299900.0))
+
+    def test_lote_incompleto(self):
+        texts = PageTexts.from_evaluate(alkosto.SELECTOR_CASCADES, {'texts': {'name': [['Portátil']]}})
+        with self.assertRaises(ValueError):
+            alkosto._prices_from_texts(texts)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Tests del motor por etapas (scraper/pipeline.py), sin navegador: las páginas
+del pool son objetos vacíos y el HTML viene de un fetch falso.
+"""
+
+import sys
+import time
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper import pipeline, track
+from scraper.pipeline import ALERTS, EVALUATION, EXTRACTION, NAVIGATION, PERSISTENCE, PipelineEngine
+from scraper.stats import RunStats, PATH_BROWSER, PATH_HTTP
+from scraper.work_queue import DomainWorkQueue
+from shared.utils.circuit_breaker import DomainCircuitBreaker
+from shared.utils.rate_limit import DomainRateLimiter
+from shared.utils.timing import STAGE_TOTAL
+from tests.fakes import FakePriceDB
+
+def url_infos(count):
+    return [
+        {'url': f"https://www.alkosto.com/p/{i}", 'product_name': f"Producto {i}", 'store_name': "Alkosto"}
+        for i in range(count)
+    ]
+
+class HtmlAdapter:
+    __name__ = 'html'
+
+    @staticmethod
+    def get_price_from_html(html, url):
+        return "Producto", 1000.0, None
+
+    @staticmethod
+    async def get_price_async(page, url):
+        raise AssertionError("No debería usar el navegador")
+
+class BrowserOnlyAdapter:
+    __name__ = 'browser'
+
+    @staticmethod
+    def get_price_from_html(html, url):
+        raise ValueError("precio renderizado con JavaScript")
+
+    @staticmethod
+    async def get_price_async(page, url):
+        await asyncio.sleep(0)
+        return "Producto", 1000.0, None
+
+class FlakyDB(FakePriceDB):
+    """Guardado lento (`save_delay`) y con las primeras `failures` escrituras fallidas."""
+
+    def __init__(self, last_price=None, save_delay=0.0, failures=0):
+        super().__init__(last_price)
+        self.save_delay = save_delay
+        self.failures = failures
+
+    def save_price(self, url, name, official_price, discounted_price=None):
+        time.sleep(self.save_delay)
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("conexión perdida")
+        super().save_price(url, name, official_price, discounted_price)
+
+def run_pipeline(engine, urls):
+    """Lo que hace AsyncScrapeEngine.run, sin lanzar el navegador."""
+    engine.stats = RunStats(total=len(urls))
+    engine._queue = DomainWorkQueue(engine.limiter, breaker=DomainCircuitBreaker())
+    engine._queue.add_all(urls)
+    engine._in_flight = 0
+    for _ in range(engine.concurrency):
+        engine._pages.put_nowait(object())
+    asyncio.run(engine._process_all())
+    return engine.stats
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.alerts = []
+        self.adapter = HtmlAdapter
+        patches = [
+            patch.object(pipeline, 'get_adapter_for_url', lambda url: self.adapter),
+            patch.object(pipeline, 'fetch_page_html', lambda url: "<html></html>"),
+            patch.object(track, 'HTTP_FIRST', True),
+            patch.object(track, 'send_price_alert_sync', lambda *args: self.alerts.append(args)),
+            patch('scraper.engine.retry_delay', lambda attempt: 0.0),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def engine(self, db, **kwargs):
+        limiter = DomainRateLimiter(default={'rate': 1_000_000, 'burst': 1_000_000})
+        return PipelineEngine(db, concurrency=2, limiter=limiter, **kwargs)
+
+    def test_recorre_todas_las_etapas(self):
+        db = FakePriceDB(last_price=2000.0)
+        engine = self.engine(db)
+
+        stats = run_pipeline(engine, url_infos(5))
+
+        self.assertEqual((stats.succeeded, stats.failed), (5, 0))
+        self.assertEqual(len(db.saved), 5)
+        self.assertEqual(stats.paths[PATH_HTTP], 5)
+        # Bajó 50%: cada URL alerta con el precio anterior como referencia
+        self.assertEqual(len(self.alerts), 5)
+        self.assertEqual(self.alerts[0][1:3], (2000.0, 1000.0))
+        self.assertEqual(len(stats.timings.by_stage()[STAGE_TOTAL]), 5)
+
+        report = engine.monitor.report()
+        for stage in (NAVIGATION, EXTRACTION, EVALUATION, PERSISTENCE, ALERTS):
+            self.assertEqual(report[stage]['processed'], 5)
+            self.assertLessEqual(report[stage]['utilization'], 1.0)
+        self.assertIn(PERSISTENCE, engine.monitor.summary())
+
+    def test_extraccion_fallida_pasa_al_navegador(self):
+        self.adapter = BrowserOnlyAdapter
+        db = FakePriceDB()
+        engine = self.engine(db)
+
+        stats = run_pipeline(engine, url_infos(3))
+
+        self.assertEqual(stats.succeeded, 3)
+        self.assertEqual(stats.paths[PATH_BROWSER], 3)
+        # Mismo intento: cada URL pasó dos veces por la navegación
+        self.assertEqual(engine.monitor.processed[NAVIGATION], 6)
+        self.assertEqual(engine.monitor.processed[EVALUATION], 3)
+
+    def test_contrapresion_con_bd_lenta(self):
+        db = FlakyDB(save_delay=0.02)
+        engine = self.engine(db, stage_workers={PERSISTENCE: 1}, queue_size=1)
+
+        stats = run_pipeline(engine, url_infos(12))
+
+        self.assertEqual(stats.succeeded, 12)
+        report = engine.monitor.report()
+        for stage in (EXTRACTION, EVALUATION, PERSISTENCE):
+            self.assertLessEqual(report[stage]['max_queue'], 1)
+        # La evaluación tuvo que esperar lugar en la cola de persistencia
+        self.assertGreater(report[EVALUATION]['blocked_s'], 0.0)
+        self.assertGreater(report[PERSISTENCE]['utilization'], report[EVALUATION]['utilization'])
+
+    def test_error_de_bd_reintenta_la_url(self):
+        db = FlakyDB(failures=1)
+        engine = self.engine(db)
+
+        stats = run_pipeline(engine, url_infos(2))
+
+        self.assertEqual((stats.succeeded, stats.failed), (2, 0))
+        self.assertEqual(engine.monitor.processed[PERSISTENCE], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Tests del parser de precios compartido por los adaptadores.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters import price_parser
+from shared.adapters.price_parser import parse_price, parse_prices, parse_prices_array, find_prices, first_price
+
+class TestParsePrice(unittest.TestCase):
+
+    def test_formatos_deducidos(self):
+        cases = [
+            ("$1.234.567", 1234567.0),
+            ("$ 1,234,567", 1234567.0),
+            ("1.234.567 COP", 1234567.0),
+            ("$45.000", 45000.0),
+            ("$1.234.567,89", 1234567.89),
+            ("1,234,567.89", 1234567.89),
+            ("1234,56", 1234.56),
+            ("1.234,56 €", 1234.56),
+            ("$ 89900", 89900.0),
+            ("", 0.0),
+            (None, 0.0),
+            ("texto sin números", 0.0),
+        ]
+        for price_text, expected in cases:
+            with self.subTest(price_text=price_text):
+                self.assertEqual(parse_price(price_text), expected)
+
+    def test_formato_explicito(self):
+        self.assertEqual(parse_price("1.234", fmt='US'), 1.234)
+        self.assertEqual(parse_price("1.234", fmt='COP'), 1234.0)
+        self.assertEqual(parse_price("12,50", fmt='EU'), 12.5)
+        self.assertEqual(parse_price("1,234.5", fmt='US'), 1234.5)
+        with self.assertRaises(ValueError):
+            parse_price("1.234", fmt='JPY')
+
+    def test_lote_memoriza_repetidos(self):
+        price_parser._parse_cached.cache_clear()
+
+        values = parse_prices(["$ 99.900", "$ 99.900", None, "$ 99.900"])
+
+        self.assertEqual(values, [99900.0, 99900.0, 0.0, 99900.0])
+        self.assertEqual(price_parser.cache_info().misses, 1)
+
+    def test_precios_en_texto_libre(self):
+        text = "Antes $ 129.900 Ahora $ 99.900 -23%"
+        self.assertEqual(find_prices(text), [129900.0, 99900.0, 23.0])
+        self.assertEqual(first_price(text), 129900.0)
+        self.assertEqual(first_price("Agotado"), 0.0)
+
+    @unittest.skipUnless(price_parser.np is not None, "numpy no instalado")
+    def test_lote_numpy(self):
+        values = parse_prices_array(["$1.000", "$2.500,50", "$1.000", None])
+        self.assertEqual(values.tolist(), [1000.0, 2500.5, 1000.0, 0.0])
+
+if __name__ == '__main__':
+    unittest.main()
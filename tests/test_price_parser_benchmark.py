@@ -0,0 +1,102 @@
+"""
+Microbenchmarks del parser de precios (requiere pytest-benchmark).
+
+Comparan el parser compartido contra la implementación anterior de
+alkosto._parse_price, copiada abajo como referencia:
+
+    pytest tests/test_price_parser_benchmark.py --benchmark-group-by=group
+"""
+
+import re
+import sys
+import random
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters import price_parser
+from shared.adapters.price_parser import parse_price, parse_prices, parse_prices_array, first_price
+
+def legacy_parse_price(price_text: str) -> float:
+    """alkosto._parse_price antes del parser compartido."""
+    if not price_text:
+        return 0.0
+    cleaned = re.sub(r'[^\d.,]', '', price_text.strip())
+    if not cleaned:
+        return 0.0
+    if ',' in cleaned and '.' in cleaned:
+        if cleaned.rfind(',') > cleaned.rfind('.'):
+            cleaned = cleaned.replace('.', '').replace(',', '.')
+        else:
+            cleaned = cleaned.replace(',', '')
+    elif '.' in cleaned:
+        parts = cleaned.split('.')
+        if not (len(parts) == 2 and len(parts[1]) <= 2):
+            cleaned = cleaned.replace('.', '')
+    elif ',' in cleaned:
+        parts = cleaned.split(',')
+        if len(parts) == 2 and len(parts[1]) <= 2:
+            cleaned = cleaned.replace(',', '.')
+        else:
+            cleaned = cleaned.replace(',', '')
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+def legacy_first_price(price_text: str) -> float:
+    for match in re.findall(r'\$?\s*[\d,\.]+', price_text):
+        price = legacy_parse_price(match)
+        if price > 0:
+            return price
+    return 0.0
+
+def price_corpus(size: int, distinct: int = 500):
+    """Textos como los de una corrida: pocos precios distintos, muy repetidos."""
+    rng = random.Random(0)
+    prices = [f"$ {rng.randrange(10_000, 5_000_000, 100):,}".replace(",", ".") for _ in range(distinct)]
+    return [rng.choice(prices) for _ in range(size)]
+
+CORPUS = price_corpus(10_000)
+ELEMENT_TEXTS = [f"Antes {a} Ahora {b} -15%" for a, b in zip(CORPUS[::2], CORPUS[1::2])]
+
+def test_mismos_resultados_que_la_version_anterior():
+    assert parse_prices(CORPUS) == [legacy_parse_price(text) for text in CORPUS]
+    assert [first_price(text) for text in ELEMENT_TEXTS] == [legacy_first_price(text) for text in ELEMENT_TEXTS]
+
+@pytest.mark.benchmark(group="parse_price")
+def test_bench_legacy(benchmark):
+    benchmark(lambda: [legacy_parse_price(text) for text in CORPUS])
+
+@pytest.mark.benchmark(group="parse_price")
+def test_bench_parse_price(benchmark):
+    benchmark(lambda: [parse_price(text) for text in CORPUS])
+
+@pytest.mark.benchmark(group="parse_price")
+def test_bench_parse_prices(benchmark):
+    benchmark(parse_prices, CORPUS)
+
+@pytest.mark.benchmark(group="parse_price")
+def test_bench_parse_prices_sin_cache(benchmark):
+    def run():
+        price_parser._parse_cached.cache_clear()
+        return parse_prices(CORPUS)
+    benchmark(run)
+
+@pytest.mark.benchmark(group="parse_price")
+@pytest.mark.skipif(price_parser.np is None, reason="numpy no instalado")
+def test_bench_parse_prices_array(benchmark):
+    benchmark(parse_prices_array, CORPUS)
+
+@pytest.mark.benchmark(group="first_price")
+def test_bench_first_price_legacy(benchmark):
+    benchmark(lambda: [legacy_first_price(text) for text in ELEMENT_TEXTS])
+
+@pytest.mark.benchmark(group="first_price")
+def test_bench_first_price(benchmark):
+    benchmark(lambda: [first_price(text) for text in ELEMENT_TEXTS])
@@ -0,0 +1,113 @@
+"""
+Tests para el rate limit por dominio y la cola de trabajo.
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.domains import normalize_domain
+from shared.utils.rate_limit import TokenBucket, DomainRateLimiter
+from scraper.work_queue import DomainWorkQueue
+from tests.fakes import FakeClock
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests para TokenBucket."""
+    
+    def test_burst_then_wait(self):
+        """Permite `burst` tokens seguidos y luego indica la espera."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+        
+        for _ in range(3):
+            self.assertEqual(bucket.try_acquire(), 0.0)
+        
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        
+        clock.advance(0.5)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+    
+    def test_refill_capped_at_burst(self):
+        """La recarga no supera la ráfaga máxima."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, burst=2, clock=clock)
+        
+        clock.advance(100)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertGreater(bucket.try_acquire(), 0.0)
+
+class TestDomainRateLimiter(unittest.TestCase):
+    """Tests para DomainRateLimiter."""
+    
+    def test_normalize_domain(self):
+        self.assertEqual(normalize_domain("https://WWW.Alkosto.com:443/p/1"), "alkosto.com")
+        self.assertEqual(normalize_domain("www.alkosto.com"), "alkosto.com")
+    
+    def test_config_per_domain_and_default(self):
+        """Cada dominio usa su entrada; subdominios heredan la del dominio padre."""
+        limiter = DomainRateLimiter.from_config({
+            'default': {'rate': 1, 'burst': 1},
+            'alkosto.com': {'rate': 5, 'burst': 4},
+        })
+        
+        self.assertEqual(limiter.bucket_for("https://www.alkosto.com/p/1").burst, 4)
+        self.assertEqual(limiter.bucket_for("https://m.alkosto.com/p/1").burst, 4)
+        self.assertEqual(limiter.bucket_for("https://www.exito.com/p/1").burst, 1)
+    
+    def test_scale(self):
+        limiter = DomainRateLimiter.from_config({'alkosto.com': {'rate': 4, 'burst': 1}}, scale=0.25)
+        self.assertAlmostEqual(limiter.bucket_for("https://alkosto.com/x").rate, 1.0)
+
+class TestDomainWorkQueue(unittest.TestCase):
+    """Tests para DomainWorkQueue."""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        limiter = DomainRateLimiter(
+            limits={'slow.com': {'rate': 0.1, 'burst': 1}},
+            default={'rate': 100, 'burst': 100},
+            clock=self.clock
+        )
+        self.queue = DomainWorkQueue(limiter, clock=self.clock)
+    
+    def test_slow_domain_does_not_block_fast_one(self):
+        """Con el dominio lento sin tokens, se siguen entregando URLs del rápido."""
+        self.queue.add_all([
+            {'url': "https://slow.com/1"},
+            {'url': "https://slow.com/2"},
+            {'url': "https://fast.com/1"},
+            {'url': "https://fast.com/2"},
+        ])
+        
+        served = []
+        while True:
+            item, _ = self.queue.next_ready()
+            if item is None:
+                break
+            served.append(item.url)
+        
+        self.assertEqual(served, ["https://slow.com/1", "https://fast.com/1", "https://fast.com/2"])
+        
+        item, wait = self.queue.next_ready()
+        self.assertIsNone(item)
+        self.assertAlmostEqual(wait, 10.0)
+    
+    def test_delayed_retry(self):
+        """Un reintento diferido no se entrega antes de su hora."""
+        self.queue.add({'url': "https://fast.com/1"}, attempt=2, delay=4)
+        
+        item, wait = self.queue.next_ready()
+        self.assertIsNone(item)
+        self.assertAlmostEqual(wait, 4.0)
+        
+        self.clock.advance(4)
+        item, _ = self.queue.next_ready()
+        self.assertEqual(item.attempt, 2)
+        self.assertEqual(len(self.queue), 0)
+
+if __name__ == "__main__":
+    unittest.main()
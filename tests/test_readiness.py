@@ -0,0 +1,115 @@
+"""
+Tests de la condición de página lista adaptativa.
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from shared.utils.readiness import ReadinessTracker, navigate, MIN_SAMPLES
+
+URL = 'https://www.tienda.com/producto/1'
+
+class FakePage:
+    """Página falsa que registra navegación y esperas."""
+
+    def __init__(self, price_appears=True):
+        self.price_appears = price_appears
+        self.gotos = []
+        self.waits = []
+
+    def goto(self, url, wait_until=None, timeout=None):
+        self.gotos.append((url, wait_until))
+
+    def wait_for_selector(self, selector, timeout=None):
+        self.waits.append((selector, timeout))
+        if not self.price_appears:
+            raise PlaywrightTimeoutError("timeout")
+
+class TestReadinessTracker(unittest.TestCase):
+
+    def test_sin_muestras_usa_el_maximo(self):
+        tracker = ReadinessTracker(max_timeout=15, min_timeout=3)
+        self.assertEqual(tracker.timeout_for(URL), 15)
+
+    def test_timeout_aprendido(self):
+        tracker = ReadinessTracker(max_timeout=15, min_timeout=1)
+        for _ in range(MIN_SAMPLES):
+            tracker.record(URL, 2.0)
+
+        self.assertAlmostEqual(tracker.timeout_for(URL), 3.0)
+        # Otros dominios no se ven afectados
+        self.assertEqual(tracker.timeout_for('https://otra.com/x'), 15)
+
+    def test_timeout_acotado_por_el_minimo(self):
+        tracker = ReadinessTracker(max_timeout=15, min_timeout=3)
+        for _ in range(MIN_SAMPLES):
+            tracker.record(URL, 0.2)
+
+        self.assertEqual(tracker.timeout_for(URL), 3)
+
+    def test_timeouts_suben_el_limite(self):
+        tracker = ReadinessTracker(max_timeout=15, min_timeout=1)
+        for _ in range(MIN_SAMPLES):
+            tracker.record(URL, 2.0)
+        for _ in range(MIN_SAMPLES):
+            tracker.record_timeout(URL)
+
+        self.assertEqual(tracker.timeout_for(URL), 15)
+        self.assertIn('5 timeouts', tracker.summary())
+
+    def test_muestras_persisten_entre_corridas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'db' / 'readiness.json'
+            # Cada corrida (p. ej. el cron horario) ve menos URLs del dominio que MIN_SAMPLES
+            for _ in range(MIN_SAMPLES):
+                tracker = ReadinessTracker(max_timeout=15, min_timeout=1, path=path)
+                self.assertEqual(tracker.timeout_for(URL), 15)
+                tracker.record(URL, 2.0)
+                tracker.save()
+
+            self.assertAlmostEqual(ReadinessTracker(max_timeout=15, min_timeout=1, path=path).timeout_for(URL), 3.0)
+
+    def test_archivo_corrupto_se_ignora(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'readiness.json'
+            path.write_text('{"samples": [1, 2]}', encoding='utf-8')
+
+            self.assertEqual(ReadinessTracker(max_timeout=15, path=path).timeout_for(URL), 15)
+
+class TestNavigate(unittest.TestCase):
+
+    def test_espera_el_selector_de_precio(self):
+        page = FakePage()
+        tracker = ReadinessTracker(max_timeout=10)
+
+        navigate(page, URL, {'selectors': ['#precio', '.precio']}, tracker)
+
+        self.assertEqual(page.gotos, [(URL, 'domcontentloaded')])
+        self.assertEqual(page.waits, [('#precio, .precio', 10000)])
+        self.assertIn('tienda.com', tracker.summary())
+
+    def test_timeout_de_precio_no_es_fatal(self):
+        page = FakePage(price_appears=False)
+        tracker = ReadinessTracker(max_timeout=10)
+
+        navigate(page, URL, {'selectors': ['#precio']}, tracker)
+
+        self.assertIn('1 timeouts', tracker.summary())
+
+    def test_sin_selectores_usa_networkidle(self):
+        page = FakePage()
+
+        navigate(page, URL, None, ReadinessTracker())
+
+        self.assertEqual(page.gotos, [(URL, 'networkidle')])
+        self.assertEqual(page.waits, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Tests del registro de adaptadores por dominio.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters.registry import AdapterRegistry, get_adapter
+from shared.adapters import test_adapter
+
+class TestAdapterRegistry(unittest.TestCase):
+
+    def test_busqueda_por_dominio(self):
+        registry = AdapterRegistry({'tienda.com': 'shared.adapters.test_adapter'}, discover=False)
+
+        self.assertIs(registry.get('https://www.tienda.com/p/1'), test_adapter)
+        self.assertIs(registry.get('https://m.tienda.com/p/2'), test_adapter)
+        self.assertIsNone(registry.get('https://otratienda.com/p/1'))
+
+    def test_importacion_perezosa(self):
+        registry = AdapterRegistry({'tienda.com': 'paquete.que.no.existe'}, discover=False)
+
+        # Registrar un módulo inexistente no falla hasta que se usa
+        self.assertIsNone(registry.get('https://otra.com/x'))
+        with self.assertRaises(ImportError):
+            registry.get('https://tienda.com/x')
+
+    def test_registro_de_modulo(self):
+        registry = AdapterRegistry({}, discover=False)
+        self.assertIsNone(registry.get('https://tienda.com/x'))
+
+        registry.register('www.tienda.com', test_adapter)
+
+        self.assertIs(registry.get('https://tienda.com/x'), test_adapter)
+        self.assertEqual(registry.domains(), ['tienda.com'])
+
+    def test_registro_compartido_incluye_alkosto(self):
+        adapter = get_adapter('https://www.alkosto.com/televisor/p/123')
+        self.assertEqual(adapter.__name__, 'shared.adapters.alkosto')
+
+if __name__ == '__main__':
+    unittest.main()
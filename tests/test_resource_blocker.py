@@ -0,0 +1,60 @@
+"""
+Tests para el bloqueo de recursos durante el scraping.
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.resource_blocker import BlockingProfile, ResourceBlocker
+
+PROFILE = BlockingProfile.from_dict({
+    'resource_types': ['image', 'font'],
+    'blocked_hosts': ['google-analytics.com'],
+})
+
+def fake_request(url: str, resource_type: str, main_frame: bool = True):
+    """Crea un objeto con la interfaz mínima de playwright Request."""
+    frame = SimpleNamespace(parent_frame=None if main_frame else object())
+    return SimpleNamespace(url=url, resource_type=resource_type, frame=frame)
+
+class TestBlockingProfile(unittest.TestCase):
+    """Tests para BlockingProfile."""
+    
+    def test_blocks_resource_types(self):
+        self.assertEqual(PROFILE.block_reason('image', "https://www.alkosto.com/a.jpg"), 'image')
+        self.assertIsNone(PROFILE.block_reason('script', "https://www.alkosto.com/app.js"))
+    
+    def test_blocks_hosts_and_subdomains(self):
+        self.assertEqual(PROFILE.block_reason('script', "https://ssl.google-analytics.com/ga.js"), 'host')
+    
+    def test_never_blocks_documents(self):
+        self.assertIsNone(PROFILE.block_reason('document', "https://ssl.google-analytics.com/"))
+    
+    def test_third_party(self):
+        profile = BlockingProfile.from_dict({'block_third_party': True, 'first_party_hosts': ['alkosto.com']})
+        self.assertIsNone(profile.block_reason('script', "https://static.alkosto.com/app.js"))
+        self.assertEqual(profile.block_reason('script', "https://cdn.other.com/x.js"), 'third_party')
+
+class TestResourceBlocker(unittest.TestCase):
+    """Tests para la decisión y las estadísticas del ResourceBlocker."""
+    
+    def test_profile_follows_main_navigation(self):
+        blocker = ResourceBlocker(lambda url: PROFILE if 'alkosto' in url else None)
+        
+        # Antes de navegar a Alkosto no hay perfil: nada se bloquea
+        self.assertIsNone(blocker._decide(1, fake_request("https://x.com/a.png", 'image')))
+        
+        blocker._decide(1, fake_request("https://www.alkosto.com/p/1", 'document'))
+        self.assertEqual(blocker._decide(1, fake_request("https://www.alkosto.com/a.png", 'image')), 'image')
+        self.assertEqual(blocker._decide(1, fake_request("https://www.alkosto.com/f.woff", 'font')), 'font')
+        
+        self.assertEqual(blocker.stats.blocked_requests, 2)
+        self.assertGreater(blocker.stats.estimated_bytes_saved, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests del caché de selectores aprendidos.
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.selector_cache import SelectorCache
+
+SELECTORS = ['.a', '.b', '.c']
+
+class TestSelectorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SelectorCache(path=None, max_failures=2)
+
+    def test_sin_datos_mantiene_orden(self):
+        self.assertEqual(self.cache.order('tienda', 'name', SELECTORS), SELECTORS)
+
+    def test_ultimo_exitoso_primero(self):
+        self.cache.record_failure('tienda', 'name', '.a')
+        self.cache.record_failure('tienda', 'name', '.b')
+        self.cache.record_hit('tienda', 'name', '.c', position=2)
+
+        self.assertEqual(self.cache.order('tienda', 'name', SELECTORS), ['.c', '.a', '.b'])
+
+    def test_orden_por_tasa_de_aciertos(self):
+        self.cache.record_hit('tienda', 'name', '.b', position=1)
+        self.cache.record_hit('tienda', 'name', '.c', position=2)
+        self.cache.record_failure('tienda', 'name', '.c')
+
+        # '.c' fue el último exitoso; '.b' tiene mejor tasa que '.a'
+        self.assertEqual(self.cache.order('tienda', 'name', SELECTORS), ['.c', '.b', '.a'])
+
+    def test_expira_tras_fallos_consecutivos(self):
+        self.cache.record_hit('tienda', 'name', '.c', position=2)
+        self.cache.record_failure('tienda', 'name', '.c')
+        self.cache.record_failure('tienda', 'name', '.c')
+
+        self.assertEqual(self.cache.order('tienda', 'name', SELECTORS), SELECTORS)
+
+    def test_contadores_de_aciertos(self):
+        self.cache.record_hit('tienda', 'name', '.a', position=0)
+        self.cache.record_hit('tienda', 'name', '.b', position=1)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 0.5)
+
+    def test_campos_independientes(self):
+        self.cache.record_hit('tienda', 'price', '.c', position=2)
+        self.assertEqual(self.cache.order('tienda', 'name', SELECTORS), SELECTORS)
+
+    def test_genericos_no_pasan_adelante(self):
+        self.cache.record_failure('tienda', 'price', '.a')
+        self.cache.record_failure('tienda', 'price', '.b')
+        self.cache.record_hit('tienda', 'price', '.c', position=2)
+
+        # Sólo '.a' y '.b' son específicos: '.c' queda detrás aunque haya ganado
+        self.assertEqual(self.cache.order('tienda', 'price', SELECTORS, reorderable=2), SELECTORS)
+        self.cache.record_hit('tienda', 'price', '.b', position=1)
+        self.assertEqual(self.cache.order('tienda', 'price', SELECTORS, reorderable=2), ['.b', '.a', '.c'])
+
+    def test_persistencia(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'cache' / 'selectores.json'
+            cache = SelectorCache(path=path)
+            cache.record_hit('tienda', 'name', '.b', position=1)
+            cache.save()
+
+            reloaded = SelectorCache(path=path)
+            self.assertEqual(reloaded.order('tienda', 'name', SELECTORS), ['.b', '.a', '.c'])
+
+if __name__ == '__main__':
+    unittest.main()
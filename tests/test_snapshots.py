@@ -0,0 +1,174 @@
+"""
+Tests del store de snapshots (grabar y reproducir páginas).
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.database import InMemoryPriceDatabase
+from shared.utils.snapshots import MODE_RECORD, MODE_REPLAY, SnapshotSession, SnapshotStore, configure_snapshots
+from scraper import track
+
+URL = "https://www.alkosto.com/producto/p/123"
+
+class FakeRequest:
+    def __init__(self, url, resource_type='document'):
+        self.url = url
+        self.resource_type = resource_type
+
+class FakeResponse:
+    def __init__(self, url, body, resource_type='document', content_type='text/html'):
+        self.url = url
+        self.request = FakeRequest(url, resource_type)
+        self.status = 200
+        self.headers = {'content-type': content_type}
+        self._body = body
+
+    def body(self):
+        return self._body
+
+class FakeRoute:
+    def __init__(self, url):
+        self.request = FakeRequest(url)
+        self.fulfilled = None
+        self.aborted = False
+
+    def fulfill(self, **kwargs):
+        self.fulfilled = kwargs
+
+    def abort(self):
+        self.aborted = True
+
+class FakePage:
+    def __init__(self):
+        self.handlers = {}
+        self.route_handler = None
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def route(self, pattern, handler):
+        self.route_handler = handler
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_guarda_y_lee(self):
+        self.store.put(URL, b"<html>precio</html>")
+
+        snapshot = self.store.get(URL)
+
+        self.assertEqual(self.store.body(snapshot), b"<html>precio</html>")
+        self.assertIsNone(self.store.get("https://otra.com/"))
+
+    def test_mismo_contenido_un_solo_objeto(self):
+        self.store.put(URL, b"<html>igual</html>")
+        self.store.put(URL + "?color=rojo", b"<html>igual</html>")
+
+        self.assertEqual(len(list(self.store.objects_dir.glob('*/*.gz'))), 1)
+
+class TestSnapshotSession(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_graba_y_reproduce_el_camino_http(self):
+        recorder = SnapshotSession(self.store, MODE_RECORD)
+        recorder.fetch_html(URL, lambda url: "<html>$ 1.299.900</html>")
+
+        replayer = SnapshotSession(self.store, MODE_REPLAY)
+
+        def no_network(url):
+            raise AssertionError("no debe salir a la red")
+
+        self.assertEqual(replayer.fetch_html(URL, no_network), "<html>$ 1.299.900</html>")
+        with self.assertRaises(LookupError):
+            replayer.fetch_html("https://otra.com/", no_network)
+
+    def test_graba_documento_y_xhr_del_navegador(self):
+        recorder = SnapshotSession(self.store, MODE_RECORD)
+        page = FakePage()
+        recorder.install(page)
+
+        page.handlers['response'](FakeResponse(URL, b"<html></html>"))
+        page.handlers['response'](FakeResponse(URL + "/api/price", b'{"price": 1}', 'xhr', 'application/json'))
+        page.handlers['response'](FakeResponse(URL + "/logo.png", b"png", 'image', 'image/png'))
+        recorder.flush(page)
+
+        self.assertEqual(recorder.recorded, 2)
+        self.assertEqual(self.store.get(URL + "/api/price").content_type, 'application/json')
+        self.assertIsNone(self.store.get(URL + "/logo.png"))
+
+    def test_reproduce_por_route(self):
+        self.store.put(URL, b"<html>grabado</html>")
+        replayer = SnapshotSession(self.store, MODE_REPLAY)
+        page = FakePage()
+        replayer.install(page)
+
+        recorded, missing = FakeRoute(URL), FakeRoute("https://cdn.com/app.js")
+        page.route_handler(recorded)
+        page.route_handler(missing)
+
+        self.assertEqual(recorded.fulfilled['body'], b"<html>grabado</html>")
+        self.assertTrue(missing.aborted)
+        self.assertEqual((replayer.replayed, replayer.missing), (1, 1))
+
+class TestReplayIsolation(unittest.TestCase):
+    """Una corrida --replay no toca la BD real ni envía alertas."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        configure_snapshots(MODE_REPLAY, Path(self.tmp.name))
+
+    def tearDown(self):
+        configure_snapshots(None)
+        self.tmp.cleanup()
+
+    def test_bd_en_memoria(self):
+        with patch.object(track, 'PriceDatabase', side_effect=AssertionError("no debe abrir PostgreSQL")):
+            db = track.open_database()
+
+        self.assertIsInstance(db, InMemoryPriceDatabase)
+        db.save_price(URL, "Celular", 1_299_900)
+        db.save_price(URL, "Celular", 1_199_900, 1_099_900)
+        self.assertEqual(db.get_last_price(URL), 1_199_900)
+        self.assertEqual([row[2] for row in db.get_price_history(URL)], [1_099_900, None])
+
+    def test_alertas_no_se_envian(self):
+        alert = track.PriceAlert("Celular (Alkosto)", 1_299_900, 999_900, URL, "baja")
+
+        with patch.object(track, 'send_price_alert_sync') as send:
+            track.dispatch_alert(alert)
+
+        send.assert_not_called()
+
+    def test_no_exige_telegram(self):
+        with patch.dict('os.environ', {'TG_TOKEN': '', 'TG_CHAT_ID': ''}), \
+                patch.object(track, 'setup_logging'), \
+                patch.object(track, 'load_config', return_value=([], [])) as load_config:
+            track.main(['--replay', '--snapshot-dir', self.tmp.name])
+
+        load_config.assert_called_once()
+
+    def test_replay_no_se_combina_con_resume(self):
+        with self.assertRaises(SystemExit):
+            track.parse_args(['--replay', '--resume'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests para la extracción de datos estructurados (JSON-LD / estado embebido).
+"""
+
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.adapters.structured_data import extract_product
+
+class TestStructuredData(unittest.TestCase):
+    """Tests para extract_product."""
+    
+    def test_json_ld_product_offer(self):
+        blob = {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": "Celular Honor X5b Plus",
+            "offers": {"@type": "Offer", "price": "899900.00", "priceCurrency": "COP"}
+        }
+        product = extract_product([json.dumps(blob)])
+        
+        self.assertEqual(product.name, "Celular Honor X5b Plus")
+        self.assertEqual(product.price, 899900.0)
+        self.assertIsNone(product.list_price)
+    
+    def test_graph_and_list_price(self):
+        """Product dentro de @graph, con precio de lista en priceSpecification."""
+        blob = {"@graph": [
+            {"@type": "BreadcrumbList", "itemListElement": []},
+            {"@type": ["Product"], "name": "Pañales T5", "offers": [{
+                "@type": "Offer", "price": 89900,
+                "priceSpecification": [{"priceType": "https://schema.org/ListPrice", "price": 99900}]
+            }]}
+        ]}
+        product = extract_product([json.dumps(blob)])
+        
+        self.assertEqual(product.price, 89900.0)
+        self.assertEqual(product.list_price, 99900.0)
+    
+    def test_embedded_state_blob(self):
+        """Un Product dentro de un blob de estado (p. ej. __NEXT_DATA__)."""
+        blob = {"props": {"pageProps": {"product": {
+            "@type": "Product", "name": "TV 55", "offers": {"@type": "AggregateOffer", "lowPrice": "1999900"}
+        }}}}
+        self.assertEqual(extract_product([json.dumps(blob)]).price, 1999900.0)
+    
+    def test_string_prices_with_thousands_separators(self):
+        """Precios como string con separador de miles (formato COP)."""
+        def price_of(price, list_price):
+            blob = {"@type": "Product", "name": "Nevera", "offers": {
+                "@type": "Offer", "price": price,
+                "priceSpecification": {"priceType": "ListPrice", "price": list_price}
+            }}
+            product = extract_product([json.dumps(blob)])
+            return product.price, product.list_price
+        
+        self.assertEqual(price_of("899.900", "1.299.900"), (899900.0, 1299900.0))
+        self.assertEqual(price_of("$ 899.900", "1,299,900.00"), (899900.0, 1299900.0))
+    
+    def test_invalid_or_missing(self):
+        """JSON inválido, productos sin precio o sin Product retornan None."""
+        texts = [
+            "{not json",
+            json.dumps({"@type": "Product", "name": "Sin precio", "offers": {}}),
+            json.dumps({"@type": "Organization", "name": "Alkosto"}),
+        ]
+        self.assertIsNone(extract_product(texts))
+
+if __name__ == "__main__":
+    unittest.main()
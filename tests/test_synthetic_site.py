@@ -0,0 +1,58 @@
+"""
+Tests del sitio sintético y de las utilidades del benchmark de scraping.
+"""
+
+import sys
+import unittest
+import urllib.request
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_site import SiteConfig, SyntheticSite, render_product_page, synthetic_product
+from benchmarks.scrape_benchmark import BenchmarkDB, percentile, latency_summary
+from shared.adapters import alkosto
+
+class TestSyntheticPages(unittest.TestCase):
+
+    def test_el_adaptador_extrae_el_producto_sintetico(self):
+        config = SiteConfig(discount_ratio=0.5, page_kb=50)
+        for product_id in range(20):
+            html = render_product_page(product_id, config).decode('utf-8')
+            result = alkosto.get_price_from_html(html, f"http://127.0.0.1/p/{product_id}")
+            self.assertEqual(result, synthetic_product(product_id, config))
+
+    def test_proporcion_de_descuentos_y_peso(self):
+        self.assertTrue(all(synthetic_product(i, SiteConfig(discount_ratio=1.0))[2] for i in range(10)))
+        self.assertFalse(any(synthetic_product(i, SiteConfig(discount_ratio=0.0))[2] for i in range(10)))
+        self.assertGreaterEqual(len(render_product_page(1, SiteConfig(page_kb=64))), 64 * 1024)
+
+    def test_servidor_local(self):
+        with SyntheticSite(SiteConfig(latency_ms=0, page_kb=10)) as site:
+            url = site.url_infos(3)[2]['url']
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read()
+
+            self.assertEqual(body, render_product_page(2, site.config))
+            self.assertEqual(site.requests, 1)
+
+class TestBenchmarkHelpers(unittest.TestCase):
+
+    def test_percentiles(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertAlmostEqual(percentile(values, 50), 50.5)
+        self.assertAlmostEqual(percentile(values, 99), 99.01)
+        self.assertIsNone(percentile([], 95))
+        self.assertEqual(latency_summary([])['p95'], None)
+
+    def test_db_en_memoria(self):
+        db = BenchmarkDB()
+        db.save_price("u", "Producto", 100.0, 90.0)
+        db.save_price("u", "Producto", 120.0)
+
+        self.assertEqual(db.get_last_price("u"), 120.0)
+        self.assertEqual(len(db.get_price_history("u")), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests de la cola durable de tareas (implementación SQLite).
+"""
+
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils.task_queue import SQLiteTaskQueue, STATUS_DEAD, STATUS_DONE, STATUS_PENDING
+from tests.fakes import FakeClock
+
+def url_info(n):
+    return {'url': f"https://tienda.com/p/{n}", 'product_name': f"Producto {n}", 'store_name': 'Tienda'}
+
+class TestSQLiteTaskQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock(1000.0)
+        self.queue = SQLiteTaskQueue(Path(self.tmp.name) / 'tasks.sqlite', clock=self.clock)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_encolar_ignora_duplicados_activos(self):
+        self.assertEqual(self.queue.enqueue([url_info(1), url_info(2)]), 2)
+        self.assertEqual(self.queue.enqueue([url_info(1), url_info(3)]), 1)
+        self.assertEqual(self.queue.counts(), {STATUS_PENDING: 3})
+
+    def test_claim_y_complete(self):
+        self.queue.enqueue([url_info(1)])
+
+        tasks = self.queue.claim('w1')
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].url_info, url_info(1))
+        self.assertEqual(tasks[0].attempts, 1)
+        self.assertEqual(self.queue.claim('w2'), [])
+
+        self.queue.complete(tasks[0], 'w1')
+        self.assertEqual(self.queue.counts(), {STATUS_DONE: 1})
+
+        # Terminada, se puede volver a encolar
+        self.assertEqual(self.queue.enqueue([url_info(1)]), 1)
+
+    def test_lease_vencido_se_retoma(self):
+        self.queue.enqueue([url_info(1)])
+        first = self.queue.claim('w1', lease_seconds=60)[0]
+
+        self.clock.advance(61)
+        retaken = self.queue.claim('w2')[0]
+
+        self.assertEqual(retaken.id, first.id)
+        self.assertEqual(retaken.attempts, 2)
+
+        # El worker original ya no puede cerrar la tarea
+        self.queue.complete(first, 'w1')
+        self.assertNotIn(STATUS_DONE, self.queue.counts())
+
+    def test_fallos_reintentan_y_luego_dead(self):
+        self.queue.enqueue([url_info(1)], max_attempts=2)
+
+        task = self.queue.claim('w1')[0]
+        self.queue.fail(task, 'w1', "error", retry_delay=30)
+        self.assertEqual(self.queue.claim('w1'), [])  # Aún no disponible
+
+        self.clock.advance(30)
+        task = self.queue.claim('w1')[0]
+        self.assertTrue(task.is_last_attempt)
+        self.queue.fail(task, 'w1', "error")
+
+        self.assertEqual(self.queue.counts(), {STATUS_DEAD: 1})
+
+    def test_workers_concurrentes_no_comparten_tareas(self):
+        self.queue.enqueue([url_info(n) for n in range(40)])
+        claimed = []
+
+        def worker(worker_id):
+            queue = SQLiteTaskQueue(self.queue.path, clock=self.clock)
+            while tasks := queue.claim(worker_id, limit=3):
+                claimed.extend(task.id for task in tasks)
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), 40)
+        self.assertEqual(len(set(claimed)), 40)
+
+if __name__ == '__main__':
+    unittest.main()
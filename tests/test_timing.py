@@ -0,0 +1,121 @@
+"""
+Tests de los tiempos por etapa (shared/utils/timing.py) y su registro en process_product.
+"""
+
+import sys
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Añadir el directorio padre al path para importar módulos
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.utils import timing
+from shared.utils.timing import (
+    RunTimings, STAGE_DB_READ, STAGE_DB_WRITE, STAGE_HTML_PARSE, STAGE_HTTP_FETCH, STAGE_TOTAL,
+    persist_timings, span, timed_url
+)
+from scraper import track
+from scraper.stats import RunStats
+from tests.fakes import FakeDB, FakePriceDB
+
+URL = "https://www.alkosto.com/producto/p/1"
+
+class FakeAdapter:
+    __name__ = 'fake'
+
+    @staticmethod
+    def get_price_from_html(html, url):
+        return "Producto", 1000.0, None
+
+class TestSpans(unittest.TestCase):
+
+    def test_span_fuera_de_una_url_no_registra(self):
+        timings = RunTimings()
+        with span(STAGE_DB_READ):
+            pass
+        self.assertEqual(len(timings), 0)
+
+    def test_etapas_dentro_de_la_url(self):
+        timings = RunTimings()
+        with timed_url(timings, URL):
+            with span(STAGE_DB_READ):
+                pass
+            with self.assertRaises(RuntimeError):
+                with span(STAGE_DB_WRITE):
+                    raise RuntimeError("timeout")
+
+        self.assertEqual([(url, stage) for url, stage, _ in timings.samples],
+                         [(URL, STAGE_DB_READ), (URL, STAGE_DB_WRITE), (URL, STAGE_TOTAL)])
+
+    def test_tareas_concurrentes_no_se_mezclan(self):
+        timings = RunTimings()
+
+        def save():
+            with span(STAGE_DB_WRITE):
+                pass
+
+        async def process(url):
+            with timed_url(timings, url):
+                with span(STAGE_DB_READ):
+                    await asyncio.sleep(0)
+                # Como handle_extracted_price en el motor: en otro hilo
+                await asyncio.to_thread(save)
+
+        async def main():
+            await asyncio.gather(process("https://a.com/1"), process("https://b.com/2"))
+
+        asyncio.run(main())
+
+        for stage in (STAGE_DB_READ, STAGE_DB_WRITE):
+            urls = sorted(url for url, s, _ in timings.samples if s == stage)
+            self.assertEqual(urls, ["https://a.com/1", "https://b.com/2"])
+
+class TestRunTimings(unittest.TestCase):
+
+    def test_resumen_por_etapa(self):
+        timings = RunTimings()
+        for ms in range(1, 101):
+            timings.add(URL, STAGE_HTTP_FETCH, ms / 1000)
+        timings.add(URL, STAGE_TOTAL, 0.5)
+
+        stats = timings.stage_stats()
+
+        self.assertEqual(list(stats), [STAGE_TOTAL, STAGE_HTTP_FETCH])
+        self.assertAlmostEqual(stats[STAGE_HTTP_FETCH]['min_ms'], 1.0)
+        self.assertAlmostEqual(stats[STAGE_HTTP_FETCH]['mean_ms'], 50.5)
+        self.assertAlmostEqual(stats[STAGE_HTTP_FETCH]['p95_ms'], 96.0)
+        self.assertIn(STAGE_HTTP_FETCH, timings.summary())
+
+    def test_guarda_con_el_dominio(self):
+        timings = RunTimings([(URL, STAGE_TOTAL, 0.25)])
+        inserted = []
+
+        def fake_execute_values(cursor, sql, rows, page_size):
+            inserted.extend(rows)
+
+        with patch.object(timing, 'execute_values', fake_execute_values):
+            self.assertEqual(persist_timings(FakeDB(), timings, run_id=3), 1)
+
+        self.assertEqual(inserted, [(3, URL, 'alkosto.com', STAGE_TOTAL, 250.0)])
+
+class TestProcessProductTimings(unittest.TestCase):
+
+    def test_registra_las_etapas_del_camino_http(self):
+        stats = RunStats()
+        with patch.object(track, 'get_adapter_for_url', lambda url: FakeAdapter), \
+                patch.object(track, 'fetch_html', lambda url: "<html></html>"), \
+                patch.object(track, 'HTTP_FIRST', True):
+            ok = track.process_product(None, FakePriceDB(), {
+                'url': URL, 'product_name': "Producto", 'store_name': "Alkosto"
+            }, max_retries=1, stats=stats)
+
+        self.assertTrue(ok)
+        self.assertEqual(
+            sorted(stats.timings.by_stage()),
+            sorted([STAGE_TOTAL, STAGE_HTTP_FETCH, STAGE_HTML_PARSE, STAGE_DB_READ, STAGE_DB_WRITE])
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Tests para el reparto de URLs entre procesos workers.
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Agregar directorio padre al path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scraper.workers import split_shards
+
+class TestSplitShards(unittest.TestCase):
+    """Tests para split_shards."""
+    
+    def setUp(self):
+        self.urls = [{'url': f"https://www.alkosto.com/p/{i}"} for i in range(10)]
+    
+    def test_every_url_assigned_once(self):
+        """Cada URL cae en exactamente un shard."""
+        shards = split_shards(self.urls, 3)
+        assigned = [info['url'] for shard in shards for info in shard]
+        
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(sorted(assigned), sorted(info['url'] for info in self.urls))
+    
+    def test_balanced_sizes(self):
+        """Los shards difieren a lo sumo en una URL."""
+        sizes = [len(shard) for shard in split_shards(self.urls, 4)]
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+    
+    def test_more_workers_than_urls(self):
+        """No se crean shards vacíos."""
+        shards = split_shards(self.urls[:2], 8)
+        self.assertEqual(len(shards), 2)
+        self.assertTrue(all(shards))
+
+if __name__ == "__main__":
+    unittest.main()